@@ -0,0 +1,92 @@
+"""Compare size and load time of the compressed tracks in gpx and the compact formats
+
+Usage:
+
+    python benchmarks/bench_compact_format.py [--scale small] [--repeat 3] [--corpus-dir DIR]
+
+The tracks of the synthetic corpus are compressed once into each format. Prints the file size and
+the median time to load each file, gpx with gpxpy and with the streaming reader, the compact formats
+with their readers, and the savings against gpx loaded with gpxpy.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from synthetic_corpus import SCALES, GenerateCorpus  # noqa: E402
+
+
+def _LoadWithGpxpy(fileName: str):
+    import gpxpy
+
+    with open(fileName, 'r', encoding='utf-8') as gpxFile:
+        return gpxpy.parse(gpxFile)
+
+
+def _LoadGeoJson(fileName: str):
+    with open(fileName, 'r', encoding='utf-8') as geoJsonFile:
+        return json.load(geoJsonFile)
+
+
+def Loaders() -> list[tuple]:
+    """Name, output format and load function of each case, the first case is the reference"""
+    from gpxpert.CompactTrackFormat import ReadCompactTracks, ReadPolylineTracks
+    from gpxpert.GpxReader import ReadTrackData
+
+    return [
+        ('gpx/gpxpy', 'gpx', _LoadWithGpxpy),
+        ('gpx/ReadTrackData', 'gpx', ReadTrackData),
+        ('binary', 'binary', ReadCompactTracks),
+        ('polyline', 'polyline', ReadPolylineTracks),
+        ('geojson/json', 'geojson', _LoadGeoJson),
+    ]
+
+
+def Compare(inputs, elevationDir: str, repeat: int = 3) -> list[dict]:
+    """Size in bytes and median load time in seconds of the compressed tracks of inputs in each format"""
+    from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+    fileNames = {}
+    results = []
+    try:
+        for name, outputFormat, load in Loaders():
+            if outputFormat not in fileNames:
+                fileNames[outputFormat] = TrackToWaypointConverter(inputs, elevationDir=elevationDir,
+                                                                   outputFormat=outputFormat).Compress()
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                load(fileNames[outputFormat])
+                seconds.append(time.perf_counter() - start)
+            results.append({'name': name, 'bytes': os.path.getsize(fileNames[outputFormat]),
+                            'seconds': statistics.median(seconds)})
+    finally:
+        for fileName in fileNames.values():
+            os.remove(fileName)
+    return results
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'gpxpert_corpus'))
+    args = parser.parse_args(args)
+
+    scaleDir = os.path.join(args.corpus_dir, args.scale)
+    GenerateCorpus(scaleDir, args.scale)
+    results = Compare(os.path.join(scaleDir, 'small'), os.path.join(scaleDir, 'elevation'), args.repeat)
+    reference = results[0]
+    print(f'{"format":<20}{"bytes":>12}{"size":>8}{"load s":>10}{"speedup":>10}')
+    for result in results:
+        print(f'{result["name"]:<20}{result["bytes"]:>12}{result["bytes"] / reference["bytes"]:>8.1%}'
+              f'{result["seconds"]:>10.3f}{reference["seconds"] / result["seconds"]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,59 @@
+"""Compare the gpx serializer of track data with gpxpy's to_xml on a large compressed track
+
+Usage:
+
+    python benchmarks/bench_serializer.py [--points 1000000] [--segments 10]
+
+The synthetic track is split into segments and compressed like Compress does, coordinates rounded
+to 5 decimals, integer elevations and no times. Both serializers must produce the same gpx.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bench_simplify import SyntheticTrack  # noqa: E402
+from gpxpert.GpxWriter import TrackDataXml, TrackXml, WaypointXml  # noqa: E402
+from gpxpert.TrackData import TrackData  # noqa: E402
+
+
+def CompressedTrackData(pointCount: int, segmentCount: int) -> TrackData:
+    trackData = TrackData()
+    trackData.latitude, trackData.longitude, trackData.elevation = SyntheticTrack(pointCount)
+    trackData.time = np.full(pointCount, np.nan)
+    trackData.segmentOffsets = np.linspace(0, pointCount, segmentCount + 1).astype(np.int64)
+    trackData.trackOffsets = np.array([0, segmentCount], dtype=np.int64)
+    trackData.trackNames, trackData.trackDescriptions = ['Synthetic'], [None]
+    trackData.RoundCoordinates(5)
+    trackData.RoundElevation()
+    return trackData
+
+
+def _ToXml(trackData: TrackData) -> tuple[str, str]:
+    gpx = trackData.ToGpx()
+    return ''.join(WaypointXml(waypoint) for waypoint in gpx.waypoints), ''.join(TrackXml(track) for track in gpx.tracks)
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=1000000)
+    parser.add_argument('--segments', type=int, default=10)
+    args = parser.parse_args(args)
+
+    trackData = CompressedTrackData(args.points, args.segments)
+    results = {}
+    for name, serialize in [('to_xml', _ToXml), ('TrackDataXml', TrackDataXml)]:
+        start = time.perf_counter()
+        results[name] = serialize(trackData)
+        seconds = time.perf_counter() - start
+        print(f'{name:<14}{seconds:>8.2f} s{args.points / seconds:>14.0f} points/s'
+              f'{len(results[name][1]) / seconds / 1e6:>8.1f} MB/s')
+    assert results['to_xml'] == results['TrackDataXml'], 'serializers differ'
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,104 @@
+"""Compare converting uploads one command line call each with posting them to the conversion server
+
+Usage:
+
+    python benchmarks/bench_server.py [--requests 20] [--concurrency 4] [--jobs 1]
+
+Each upload is a copy of a test track. The command line pays interpreter startup, imports and cold
+elevation data per call, the server pays them once. Prints the mean latency of both and the
+statistics reported by the server.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+_ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+_SRC_DIR = os.path.join(_ROOT_DIR, 'src')
+_GPX_FILE = os.path.join(_ROOT_DIR, 'res', 'test', 'Track_01.gpx')
+
+sys.path.insert(0, _SRC_DIR)
+
+from gpxpert.ConversionServer import ConversionServer  # noqa: E402
+
+
+def _Post(port: int, path: str, body: bytes) -> int:
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    try:
+        connection.request('POST', path, body)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def _Get(port: int, path: str) -> dict:
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    try:
+        connection.request('GET', path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def MeasureCommandLine(requests: int) -> float:
+    """Mean seconds of one command line conversion of a fresh copy of the track"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_SRC_DIR, os.environ.get('PYTHONPATH')])))
+    tempDir = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        for i in range(requests):
+            gpxFile = shutil.copy(_GPX_FILE, os.path.join(tempDir, f'upload_{i}.gpx'))
+            subprocess.run([sys.executable, '-m', 'gpxpert.TrackToWaypointConverterClient', gpxFile], env=env,
+                           check=True, capture_output=True)
+        return (time.perf_counter() - start) / requests
+    finally:
+        shutil.rmtree(tempDir)
+
+
+async def MeasureServer(requests: int, concurrency: int, jobs: int) -> tuple[float, dict]:
+    """Seconds per conversion posted to the server with concurrent clients, and the server statistics"""
+    with open(_GPX_FILE, 'rb') as gpxFile:
+        body = gpxFile.read()
+    server = ConversionServer(port=0, jobs=jobs, maxQueued=requests)
+    port = await server.Start()
+    try:
+        clients = asyncio.Semaphore(concurrency)
+
+        async def Post(i):
+            async with clients:
+                return await asyncio.to_thread(_Post, port, f'/summarize?name=upload_{i}', body)
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(Post(i) for i in range(requests)))
+        seconds = (time.perf_counter() - start) / requests
+        assert statuses == [200] * requests, statuses
+        return seconds, await asyncio.to_thread(_Get, port, '/stats')
+    finally:
+        await server.Close()
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--jobs', type=int, default=1)
+    args = parser.parse_args(args)
+
+    commandLine = MeasureCommandLine(args.requests)
+    server, stats = asyncio.run(MeasureServer(args.requests, args.concurrency, args.jobs))
+    print(f'command line: {1000 * commandLine:.1f} ms per upload')
+    print(f'server:       {1000 * server:.1f} ms per upload, {commandLine / server:.1f}x faster')
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,65 @@
+"""Compare the simplification modes with gpxpy's reduce_points on a large synthetic track
+
+Usage:
+
+    python benchmarks/bench_simplify.py [--points 1000000] [--tolerance 5 20 50]
+
+gpxpy is only run on a tenth of the points (at most 100000), its runtime is scaled up linearly.
+"""
+import argparse
+import os
+import sys
+import time
+
+import gpxpy
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from gpxpert.Simplify import SIMPLIFY_MODES, SimplifyIndices  # noqa: E402
+
+
+def SyntheticTrack(pointCount: int, seed: int = 0) -> tuple:
+    """Random walk with 2 m steps, slowly changing heading and 1 m position noise, 20% without elevation"""
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0, 0.02, pointCount))
+    x = np.cumsum(2 * np.cos(heading)) + rng.normal(0, 1, pointCount)
+    y = np.cumsum(2 * np.sin(heading)) + rng.normal(0, 1, pointCount)
+    latitude = 46 + y / 111319.49
+    longitude = 8.9 + x / (111319.49 * np.cos(np.radians(46)))
+    elevation = 500 + np.cumsum(rng.normal(0, .2, pointCount))
+    elevation[rng.random(pointCount) < .2] = np.nan
+    return latitude, longitude, elevation
+
+
+def _GpxpyReducePoints(latitude, longitude, elevation, minDistance: float) -> tuple[int, float]:
+    segment = gpxpy.gpx.GPXTrackSegment()
+    segment.points = [gpxpy.gpx.GPXTrackPoint(lat, lon, None if np.isnan(ele) else ele)
+                      for lat, lon, ele in zip(latitude.tolist(), longitude.tolist(), elevation.tolist())]
+    start = time.perf_counter()
+    segment.reduce_points(minDistance)
+    return len(segment.points), time.perf_counter() - start
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=1000000)
+    parser.add_argument('--tolerance', type=float, nargs='+', default=[5, 20, 50])
+    args = parser.parse_args(args)
+
+    latitude, longitude, elevation = SyntheticTrack(args.points)
+    gpxpyPointCount = min(args.points // 10, 100000)
+    print(f'{"mode":<24}{"tolerance":>10}{"points":>10}{"seconds":>10}')
+    for tolerance in args.tolerance:
+        keptCount, seconds = _GpxpyReducePoints(latitude[:gpxpyPointCount], longitude[:gpxpyPointCount],
+                                                elevation[:gpxpyPointCount], tolerance)
+        scale = args.points / gpxpyPointCount
+        print(f'{"gpxpy reduce_points":<24}{tolerance:>10g}{round(keptCount * scale):>10}{seconds * scale:>10.3f}')
+        for mode in SIMPLIFY_MODES:
+            start = time.perf_counter()
+            keptCount = len(SimplifyIndices(mode, latitude, longitude, elevation, tolerance))
+            print(f'{mode:<24}{tolerance:>10g}{keptCount:>10}{time.perf_counter() - start:>10.3f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,65 @@
+"""Measure the import time of the command line entry points, like ``python -X importtime``
+
+Usage:
+
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 300]
+
+Each entry point is imported in a fresh interpreter. Prints the median cumulative import time,
+the slowest imported modules and whether heavy dependencies were loaded. Exits with 1 if an entry
+point exceeds the budget.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = ['gpxpert.TrackToWaypointConverterClient', 'gpxpert.WaypointTableConverterClient',
+                'gpxpert.ConversionServerClient']
+HEAVY_MODULES = ['numpy', 'srtm', 'requests']
+
+_SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+_IMPORT_TIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def MeasureImport(module: str) -> tuple[float, list[tuple[float, str]], list[str]]:
+    """Import a module in a fresh interpreter
+
+    Returns:
+        cumulative import time in ms, self times in ms and names of all imported modules,
+        heavy modules that were imported
+    """
+    code = f'import sys, {module}; print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_SRC_DIR, os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            env=env, check=True)
+    cumulative = 0.
+    selfTimes = []
+    for match in _IMPORT_TIME_LINE.finditer(result.stderr):
+        selfTimes.append((int(match.group(1)) / 1000, match.group(4)))
+        if match.group(4) == module and len(match.group(3)) == 1:
+            cumulative = int(match.group(2)) / 1000
+    return cumulative, selfTimes, list(filter(None, result.stdout.strip().split(',')))
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=300)
+    args = parser.parse_args(args)
+
+    overBudget = False
+    for module in ENTRY_POINTS:
+        measurements = [MeasureImport(module) for _ in range(args.runs)]
+        median = statistics.median(cumulative for cumulative, _, _ in measurements)
+        overBudget |= median > args.budget_ms
+        print(f'{module}: {median:.1f} ms (budget {args.budget_ms:g} ms), '
+              f'heavy modules: {", ".join(measurements[0][2]) or "none"}')
+        for selfTime, name in sorted(measurements[0][1], reverse=True)[:5]:
+            print(f'    {selfTime:8.1f} ms  {name}')
+    return 1 if overBudget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,80 @@
+"""Compare the time of the track statistics with the time to parse the tracks
+
+Usage:
+
+    python benchmarks/bench_statistics.py [--scale small] [--repeat 3] [--corpus-dir DIR]
+
+The small and huge tracks of the synthetic corpus are read with the streaming reader, then the
+statistics of the track data are computed. Prints the median time of both and their ratio, and the
+time of Convert without statistics, which reads only the first track point, and with statistics.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from synthetic_corpus import SCALES, GenerateCorpus  # noqa: E402
+
+
+def _Median(function, repeat: int) -> float:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds)
+
+
+def Compare(gpxFileNames: list[str], elevationDir: str, repeat: int) -> dict:
+    """Median seconds to parse the files, compute their statistics and convert them with and without statistics"""
+    from gpxpert.GpxReader import ReadTrackData
+    from gpxpert.OutputFormats import STATISTICS_CSV
+    from gpxpert.TrackStatistics import TrackStatistics
+    from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+    trackData = [ReadTrackData(gpxFileName) for gpxFileName in gpxFileNames]
+    outputs = []
+
+    def Convert(**kwargs):
+        converter = TrackToWaypointConverter(gpxFileNames, elevationDir=elevationDir, **kwargs)
+        outputs.append(converter.Convert())
+
+    results = {
+        'parse': _Median(lambda: [ReadTrackData(gpxFileName) for gpxFileName in gpxFileNames], repeat),
+        'statistics': _Median(lambda: [TrackStatistics(data) for data in trackData], repeat),
+        'Convert': _Median(Convert, repeat),
+        'Convert+statistics': _Median(lambda: Convert(statistics=STATISTICS_CSV), repeat),
+    }
+    for fileName in set(outputs):
+        os.remove(fileName)
+        if os.path.exists(fileName.removesuffix('.gpx') + '_STATISTICS.csv'):
+            os.remove(fileName.removesuffix('.gpx') + '_STATISTICS.csv')
+    return results
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'gpxpert_corpus'))
+    args = parser.parse_args(args)
+
+    scaleDir = os.path.join(args.corpus_dir, args.scale)
+    GenerateCorpus(scaleDir, args.scale)
+    print(f'{"tracks":<8}{"parse s":>10}{"stats s":>10}{"ratio":>8}{"Convert s":>12}{"+stats s":>10}')
+    for name in ['small', 'huge']:
+        directory = os.path.join(scaleDir, name)
+        gpxFileNames = sorted(os.path.join(directory, fileName) for fileName in os.listdir(directory)
+                              if fileName.endswith('.gpx'))
+        results = Compare(gpxFileNames, os.path.join(scaleDir, 'elevation'), args.repeat)
+        print(f'{name:<8}{results["parse"]:>10.3f}{results["statistics"]:>10.3f}'
+              f'{results["statistics"] / results["parse"]:>8.1%}{results["Convert"]:>12.3f}'
+              f'{results["Convert+statistics"]:>10.3f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,146 @@
+"""Time the converters on synthetic corpora and compare the results with a stored baseline
+
+Usage:
+
+    python benchmarks/bench_suite.py [--scales small medium] [--repeat 3] [--jobs 1] [--corpus-dir DIR]
+                                     [--output results.json] [--baseline baseline.json] [--threshold 0.2]
+
+The corpora are generated with synthetic_corpus.py and kept in the corpus directory for later runs.
+Each case is run repeat times, the median is reported with the throughput in points/s and files/s.
+Results are written as JSON, a results file of an earlier run can be passed as baseline. Exits with
+1 if a case is more than threshold slower than in the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from synthetic_corpus import SCALES, GenerateCorpus  # noqa: E402
+
+_VERSION = 1
+
+
+def _ConvertTracks(inputs, jobs: int, elevationDir: str):
+    from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+    TrackToWaypointConverter(inputs, jobs, elevationDir=elevationDir).Convert()
+
+
+def _CompressTracks(inputs, jobs: int, elevationDir: str):
+    from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+    TrackToWaypointConverter(inputs, jobs, elevationDir=elevationDir).Compress()
+
+
+def _ConvertTable(tableFile: str, jobs: int, elevationDir: str):
+    from gpxpert.WaypointTableConverter import WaypointTableConverter
+
+    WaypointTableConverter(tableFile, elevationDir, jobs=jobs).Convert()
+
+
+def Cases(corpusDir: str, counts: dict) -> list[tuple]:
+    """Name, function, input, file count and point count of each benchmark case"""
+    smallDir = os.path.join(corpusDir, 'small')
+    hugeFiles = [os.path.join(corpusDir, 'huge', f'Huge_{i}.gpx') for i in range(counts['hugeFiles'])]
+    archive = os.path.join(corpusDir, 'archives', 'Tracks.zip')
+    tableFile = os.path.join(corpusDir, 'waypoints_table.txt')
+    smallSet = (counts['smallFiles'], counts['smallFiles'] * counts['smallPoints'])
+    hugeSet = (counts['hugeFiles'], counts['hugeFiles'] * counts['hugePoints'])
+    archiveSet = (counts['archiveFiles'], counts['archiveFiles'] * counts['smallPoints'])
+    return [
+        ('Convert/small', _ConvertTracks, smallDir, *smallSet),
+        ('Compress/small', _CompressTracks, smallDir, *smallSet),
+        ('Convert/huge', _ConvertTracks, hugeFiles, *hugeSet),
+        ('Compress/huge', _CompressTracks, hugeFiles, *hugeSet),
+        # the nested archive gets a summary and compressed output in both cases
+        ('Convert/archive', _ConvertTracks, archive, *archiveSet),
+        ('Compress/archive', _CompressTracks, archive, *archiveSet),
+        ('WaypointTable/table', _ConvertTable, tableFile, 1, counts['tableRows']),
+    ]
+
+
+def _ListFiles(directory: str) -> set[str]:
+    return {os.path.join(root, fileName) for root, _, fileNames in os.walk(directory) for fileName in fileNames}
+
+
+def TimeCase(function, inputs, corpusDir: str, repeat: int, jobs: int) -> list[float]:
+    """Seconds of each run, the outputs of a run are removed before the next"""
+    corpusFiles = _ListFiles(corpusDir)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(inputs, jobs, os.path.join(corpusDir, 'elevation'))
+        seconds.append(time.perf_counter() - start)
+        for fileName in _ListFiles(corpusDir) - corpusFiles:
+            os.remove(fileName)
+    return seconds
+
+
+def RunSuite(scales: list[str], corpusDir: str, repeat: int = 3, jobs: int = 1) -> dict:
+    results = []
+    for scale in scales:
+        scaleDir = os.path.join(corpusDir, scale)
+        start = time.perf_counter()
+        counts = GenerateCorpus(scaleDir, scale)['counts']
+        print(f'corpus {scale} ready after {time.perf_counter() - start:.1f} s', file=sys.stderr)
+        for name, function, inputs, fileCount, pointCount in Cases(scaleDir, counts):
+            seconds = TimeCase(function, inputs, scaleDir, repeat, jobs)
+            median = statistics.median(seconds)
+            results.append({'scale': scale, 'name': name, 'files': fileCount, 'points': pointCount,
+                             'seconds': median, 'runs': seconds, 'filesPerSecond': fileCount / median,
+                             'pointsPerSecond': pointCount / median})
+            print(f'{scale:<8}{name:<22}{median:>10.3f}{pointCount / median:>14.0f}{fileCount / median:>12.1f}')
+    return {'version': _VERSION, 'python': platform.python_version(), 'platform': platform.platform(),
+            'jobs': jobs, 'repeat': repeat, 'results': results}
+
+
+def CompareWithBaseline(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Cases more than threshold slower than in the baseline, cases missing in either are skipped"""
+    baselineSeconds = {(result['scale'], result['name']): result['seconds'] for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        key = (result['scale'], result['name'])
+        if key not in baselineSeconds:
+            continue
+        ratio = result['seconds'] / baselineSeconds[key]
+        print(f'{result["scale"]:<8}{result["name"]:<22}{baselineSeconds[key]:>10.3f}{result["seconds"]:>10.3f}'
+              f'{ratio - 1:>+10.1%}')
+        if ratio > 1 + threshold:
+            regressions.append(f'{result["scale"]} {result["name"]}')
+    return regressions
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'gpxpert_corpus'))
+    parser.add_argument('--output', help='JSON file the results are written to')
+    parser.add_argument('--baseline', help='results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=.2, help='tolerated slowdown, 0.2 is 20%%')
+    args = parser.parse_args(args)
+
+    print(f'{"scale":<8}{"case":<22}{"seconds":>10}{"points/s":>14}{"files/s":>12}')
+    results = RunSuite(args.scales, args.corpus_dir, args.repeat, args.jobs)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as resultFile:
+            json.dump(results, resultFile, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as baselineFile:
+            baseline = json.load(baselineFile)
+        print(f'\n{"scale":<8}{"case":<22}{"baseline":>10}{"seconds":>10}{"change":>10}')
+        regressions = CompareWithBaseline(results, baseline, args.threshold)
+        if regressions:
+            print(f'slower than baseline: {", ".join(regressions)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,150 @@
+"""Generate a deterministic synthetic corpus of gpx files for the benchmarks
+
+Usage:
+
+    python benchmarks/synthetic_corpus.py DIR [--scale small|medium|large] [--seed 0]
+
+The corpus contains many small tracks in small/, a few huge tracks in huge/, a ZIP file with a
+nested archive in archives/, a waypoint table and .hgt elevation tiles covering all points, so no
+elevation data is downloaded. The same scale and seed always generate the same files.
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import zipfile
+
+import numpy as np
+
+from bench_simplify import SyntheticTrack
+
+# file and point counts of each scale
+SCALES = {
+    'small': {'smallFiles': 100, 'smallPoints': 500, 'hugeFiles': 1, 'hugePoints': 100000,
+              'archiveFiles': 50, 'tableRows': 2000},
+    'medium': {'smallFiles': 1000, 'smallPoints': 500, 'hugeFiles': 2, 'hugePoints': 500000,
+               'archiveFiles': 500, 'tableRows': 20000},
+    'large': {'smallFiles': 5000, 'smallPoints': 500, 'hugeFiles': 4, 'hugePoints': 1000000,
+              'archiveFiles': 2000, 'tableRows': 200000},
+}
+
+_VERSION = 1
+_TILE_SIDE = 1201
+# south-west corners of the elevation tiles, all points are folded into them
+_TILES = [(45, 8), (45, 9), (46, 8), (46, 9)]
+_GPX_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n' \
+              '<gpx xmlns="http://www.topografix.com/GPX/1/1" version="1.1" creator="synthetic_corpus">\n'
+
+
+def _Fold(values: np.ndarray, low: float, high: float) -> np.ndarray:
+    """Reflect values at the bounds until they lie within, continuous like a walk bouncing off walls"""
+    width = high - low
+    offset = np.mod(values - low, 2 * width)
+    return low + np.where(offset > width, 2 * width - offset, offset)
+
+
+def TrackGpx(name: str, pointCount: int, seed: int) -> str:
+    """Gpx document with one track of a random walk, times in 1 s steps and a start waypoint"""
+    rng = np.random.default_rng(seed)
+    latitude, longitude, elevation = SyntheticTrack(pointCount, seed)
+    latitude = _Fold(latitude + rng.uniform(-.9, .9), 45.01, 46.99)
+    longitude = _Fold(longitude + rng.uniform(-.8, 1), 8.01, 9.99)
+    times = np.datetime64('2024-01-01T00:00:00') + np.timedelta64(seed, 'h') + np.arange(pointCount).astype('m8[s]')
+    timeStrings = np.datetime_as_string(times, unit='s')
+    lines = [_GPX_HEADER,
+             f'<wpt lat="{latitude[0]:.6f}" lon="{longitude[0]:.6f}"><name>Start {name}</name></wpt>\n',
+             f'<trk><name>{name}</name><trkseg>\n']
+    for lat, lon, ele, time in zip(latitude.tolist(), longitude.tolist(), elevation.tolist(), timeStrings.tolist()):
+        eleTag = '' if ele != ele else f'<ele>{ele:.1f}</ele>'
+        lines.append(f'<trkpt lat="{lat:.7f}" lon="{lon:.7f}">{eleTag}<time>{time}Z</time></trkpt>\n')
+    lines.append('</trkseg></trk>\n</gpx>\n')
+    return ''.join(lines)
+
+
+def _WriteTiles(directory: str, seed: int):
+    os.makedirs(directory)
+    rng = np.random.default_rng(seed)
+    ramp = np.add.outer(np.arange(_TILE_SIDE)[::-1], np.arange(_TILE_SIDE)) // 2
+    for latitude, longitude in _TILES:
+        heights = (200 + ramp + rng.integers(0, 20, (_TILE_SIDE, _TILE_SIDE))).astype('>i2')
+        heights.tofile(os.path.join(directory, f'N{latitude:02d}E{longitude:03d}.hgt'))
+
+
+def _WriteTable(fileName: str, rowCount: int, seed: int):
+    rng = np.random.default_rng(seed)
+    latitude = rng.uniform(45.01, 46.99, rowCount)
+    longitude = rng.uniform(8.01, 9.99, rowCount)
+    with open(fileName, 'w', encoding='utf-8') as tableFile:
+        for i, (lat, lon) in enumerate(zip(latitude.tolist(), longitude.tolist())):
+            tableFile.write(f'{i % 100:02d} Summit {i} Village N{lat:.6f} E{lon:.6f}\n')
+
+
+def _WriteMember(archive: zipfile.ZipFile, name: str, content: str | bytes):
+    # a fixed time stamp keeps the archives byte for byte reproducible
+    archive.writestr(zipfile.ZipInfo(name, date_time=(2024, 1, 1, 0, 0, 0)), content, zipfile.ZIP_DEFLATED)
+
+
+def _WriteArchive(fileName: str, fileCount: int, pointCount: int, seed: int):
+    # half of the tracks are in a nested archive
+    nestedArchive = io.BytesIO()
+    with zipfile.ZipFile(nestedArchive, 'w') as nestedZip:
+        for i in range(fileCount // 2, fileCount):
+            _WriteMember(nestedZip, f'Nested_{i:05d}.gpx', TrackGpx(f'Nested {i}', pointCount, seed + i))
+    with zipfile.ZipFile(fileName, 'w') as archive:
+        for i in range(fileCount // 2):
+            _WriteMember(archive, f'Track_{i:05d}.gpx', TrackGpx(f'Archived {i}', pointCount, seed + i))
+        _WriteMember(archive, 'Nested.zip', nestedArchive.getvalue())
+
+
+def GenerateCorpus(directory: str, scale: str = 'small', seed: int = 0) -> dict:
+    """Generate the corpus of a scale into directory, an existing corpus of the same scale and seed is reused
+
+    Returns:
+        description of the corpus, file and point counts of each input set
+    """
+    counts = SCALES[scale]
+    descriptionFileName = os.path.join(directory, 'corpus.json')
+    description = {'version': _VERSION, 'scale': scale, 'seed': seed, 'counts': counts}
+    try:
+        with open(descriptionFileName, 'r', encoding='utf-8') as descriptionFile:
+            if json.load(descriptionFile) == description:
+                return description
+    except (OSError, ValueError):
+        pass
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+
+    _WriteTiles(os.path.join(directory, 'elevation'), seed)
+    os.makedirs(os.path.join(directory, 'small'))
+    for i in range(counts['smallFiles']):
+        with open(os.path.join(directory, 'small', f'Track_{i:05d}.gpx'), 'w', encoding='utf-8') as gpxFile:
+            gpxFile.write(TrackGpx(f'Track {i}', counts['smallPoints'], seed + i))
+    os.makedirs(os.path.join(directory, 'huge'))
+    for i in range(counts['hugeFiles']):
+        with open(os.path.join(directory, 'huge', f'Huge_{i}.gpx'), 'w', encoding='utf-8') as gpxFile:
+            gpxFile.write(TrackGpx(f'Huge {i}', counts['hugePoints'], seed + 100000 + i))
+    os.makedirs(os.path.join(directory, 'archives'))
+    _WriteArchive(os.path.join(directory, 'archives', 'Tracks.zip'), counts['archiveFiles'], counts['smallPoints'],
+                  seed + 200000)
+    _WriteTable(os.path.join(directory, 'waypoints_table.txt'), counts['tableRows'], seed)
+
+    # written last, an interrupted generation is redone
+    with open(descriptionFileName, 'w', encoding='utf-8') as descriptionFile:
+        json.dump(description, descriptionFile)
+    return description
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory')
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(args)
+    print(json.dumps(GenerateCorpus(args.directory, args.scale, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,14 +1,111 @@
 import argparse
+import json
 import logging
 import sys
 
 from gpxpert import __version__
+from gpxpert.OutputFormats import STATISTICS_OUTPUTS
 
 _logger = logging.getLogger(__name__)
 
 
+def _converter_parser(description, file_help):
+    """Argument parser with the options shared by the converter clients
+
+    Args:
+      description (str): description of the client
+      file_help (str): help of the positional file argument, naming what the converter expands
+
+    Returns:
+      :obj:`argparse.ArgumentParser`: parser, the verbosity options are added by :func:`_parse`
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--version",
+        action="version",
+        version=f"GPXpert {__version__}",
+    )
+    parser.add_argument(
+        dest="file",
+        help=file_help,
+        type=str,
+        nargs="+",
+        metavar="STR",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        help="number of worker processes, 0 uses all available cores (default: 1)",
+        type=int,
+        default=1,
+        metavar="INT",
+    )
+    parser.add_argument(
+        "--elevation-dir",
+        dest="elevationDir",
+        help="directory of local .hgt elevation tiles, used instead of downloading SRTM data",
+        type=str,
+        default=None,
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--gzip",
+        dest="gzipOutput",
+        help="write gzip compressed .gpx.gz files",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        help="write a JSON report of the time spent in each stage to FILE, or to stdout without FILE",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="FILE",
+    )
+    return parser
+
+
+def _parse(parser, args):
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        dest="loglevel",
+        help="set loglevel to INFO",
+        action="store_const",
+        const=logging.INFO,
+    )
+    parser.add_argument(
+        "-vv",
+        "--very-verbose",
+        dest="loglevel",
+        help="set loglevel to DEBUG",
+        action="store_const",
+        const=logging.DEBUG,
+    )
+    return parser.parse_args(args)
+
+
 def parse_args(args):
-    """Parse command line parameters
+    """Parse command line parameters of the waypoint table converter
+
+    Args:
+      args (List[str]): command line parameters as list of strings
+          (for example  ``["--help"]``).
+
+    Returns:
+      :obj:`argparse.Namespace`: command line parameters namespace
+    """
+    parser = _converter_parser(
+        "Parse names and Positions from a table-like formatted test file",
+        "text files to be converted, directories of .txt files or glob patterns are accepted as well",
+    )
+    return _parse(parser, args)
+
+
+def parse_track_args(args):
+    """Parse command line parameters of the track to waypoint converter
 
     Args:
       args (List[str]): command line parameters as list of strings
@@ -17,13 +114,129 @@ def parse_args(args):
     Returns:
       :obj:`argparse.Namespace`: command line parameters namespace
     """
-    parser = argparse.ArgumentParser(description="Parse names and Positions from a table-like formatted test file")
+    parser = _converter_parser(
+        "Summarize the first points of gpx tracks as waypoints, or compress the tracks",
+        "a gpx file, a zip file or a directory of gpx and zip files to be converted, or several gpx files",
+    )
+    parser.add_argument(
+        "--compress",
+        dest="compress",
+        help="write the simplified tracks of all files to one _SMALL file instead of the summary",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cacheDir",
+        help="directory of a persistent parse cache for gpx files",
+        type=str,
+        default=None,
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--incremental",
+        dest="incremental",
+        help="only process new or modified gpx files of a directory, using a manifest next to the output",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--merge-radius",
+        dest="mergeRadius",
+        help="merge summary waypoints within this many meters of an earlier one (default: 0, keep all)",
+        type=float,
+        default=0,
+        metavar="METERS",
+    )
+    parser.add_argument(
+        "--skip-duplicates",
+        dest="skipDuplicates",
+        help="skip gpx files with the same track as an earlier file, also if recorded slightly differently, "
+             "in the summary or with --compress in the compressed tracks",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--statistics",
+        dest="statistics",
+        help="add distance, ascent, descent, bounds and duration of the tracks to the summary, "
+             "as waypoint description or as csv or json file next to it",
+        choices=STATISTICS_OUTPUTS,
+        default=None,
+    )
+    return _parse(parser, args)
+
+
+def parse_serve_args(args):
+    """Parse command line parameters of the conversion server
+
+    Args:
+      args (List[str]): command line parameters as list of strings
+
+    Returns:
+      :obj:`argparse.Namespace`: command line parameters namespace
+    """
+    parser = argparse.ArgumentParser(description="Serve the converters over HTTP on localhost")
     parser.add_argument(
         "--version",
         action="version",
         version=f"GPXpert {__version__}",
     )
-    parser.add_argument(dest="file", help="text file to be converted", type=str, metavar="STR")
+    parser.add_argument(
+        "--host",
+        dest="host",
+        help="address to listen on (default: 127.0.0.1)",
+        type=str,
+        default="127.0.0.1",
+        metavar="HOST",
+    )
+    parser.add_argument(
+        "-p",
+        "--port",
+        dest="port",
+        help="port to listen on (default: 8080)",
+        type=int,
+        default=8080,
+        metavar="INT",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        help="number of worker processes, 0 uses all available cores (default: 1)",
+        type=int,
+        default=1,
+        metavar="INT",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cacheDir",
+        help="directory of a persistent parse cache for uploaded gpx files",
+        type=str,
+        default=None,
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--elevation-dir",
+        dest="elevationDir",
+        help="directory of local .hgt elevation tiles, used instead of downloading SRTM data",
+        type=str,
+        default=None,
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--max-queued",
+        dest="maxQueued",
+        help="requests waiting for a worker, further requests are answered with 503 (default: 64)",
+        type=int,
+        default=64,
+        metavar="INT",
+    )
+    parser.add_argument(
+        "--batch-size",
+        dest="batchSize",
+        help="queued requests sent to a worker at once (default: 8)",
+        type=int,
+        default=8,
+        metavar="INT",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -53,3 +266,19 @@ def setup_logging(loglevel):
     logging.basicConfig(
         level=loglevel, stream=sys.stdout, format=logformat, datefmt="%Y-%m-%d %H:%M:%S"
     )
+
+
+def write_profile(target):
+    """Write the profiling report as JSON
+
+    Args:
+      target (str): file name, or ``-`` for stdout
+    """
+    from gpxpert.Profiler import ProfileReport
+
+    report = json.dumps(ProfileReport(), indent=2)
+    if target == "-":
+        print(report)
+    else:
+        with open(target, "w", encoding="utf-8") as profileFile:
+            profileFile.write(report)
@@ -0,0 +1,381 @@
+"""Compact formats of compressed tracks, smaller and much faster to load than gpx
+
+Binary format (.gpxb), all numbers little-endian::
+
+    header  'GPXB', uint16 version, uint32 n, n bytes JSON {"name": document name}
+    blocks  one per written track data, until the end of the file:
+            uint32 n, n bytes JSON {"waypointNames", "trackNames", "trackDescriptions",
+                                    "waypointCount", "segmentCount", "pointCount"}
+            uint32[tracks]        number of segments of each track    (segment index)
+            uint32[segments]      number of points of each segment
+            int32[waypoints] x 2  waypoint latitude, longitude in 1e-5 degrees
+            int16[waypoints]      waypoint elevation in m
+            int32[points] x 2     point latitude, longitude in 1e-5 degrees, each the difference to
+                                  the previous point of the block
+            int16[points]         point elevation in m
+            int32[points]         point time in whole seconds, each the difference to the previous
+                                  point with a time, only if the JSON has "timeOrigin", the time of
+                                  the first point with a time
+
+Missing elevations and times are stored as -32768 and -2147483648. Version 1 files have no times.
+Files ending with .gz are gzip compressed. The GeoJSON and encoded polyline variants are feature
+collections with waypoints as points, tracks are multi line strings or Google encoded polylines of
+their segments. Times are stored as ISO 8601 "coordTimes" of GeoJSON tracks and as differences
+like in the binary format in the "times" of polyline tracks, starting with the time since the epoch.
+"""
+import gzip
+import json
+import os
+import struct
+
+import numpy as np
+
+from gpxpert.TrackData import MISSING_ELEVATION, TrackData
+
+MAGIC = b'GPXB'
+_VERSION = 2
+_READABLE_VERSIONS = (1, 2)
+# fixed point scale, 1e-5 degrees is the precision of the compressed tracks
+_SCALE = 100000
+_MISSING_ELEVATION_16 = np.iinfo(np.int16).min
+_MISSING_TIME_32 = np.iinfo(np.int32).min
+_HEADER = struct.Struct('<4sHI')
+_LENGTH = struct.Struct('<I')
+# a 5 bit chunk per character, int64 values need at most 13 chunks
+_CHUNK_SHIFTS = np.arange(13, dtype=np.int64) * 5
+
+
+def _FixedPoint(degrees: np.ndarray) -> np.ndarray:
+    return np.round(np.asarray(degrees, dtype=np.float64) * _SCALE).astype(np.int64)
+
+
+def _Elevation16(elevation: np.ndarray) -> np.ndarray:
+    """Elevations in whole meters as int16, missing elevations (MISSING_ELEVATION or NaN) as -32768"""
+    if np.issubdtype(elevation.dtype, np.integer):
+        missing = elevation == MISSING_ELEVATION
+    else:
+        missing = np.isnan(elevation)
+        elevation = np.round(np.where(missing, 0, elevation))
+    return np.where(missing, _MISSING_ELEVATION_16, np.clip(elevation, -32767, 32767)).astype('<i2')
+
+
+def _Elevation32(elevation16: np.ndarray) -> np.ndarray:
+    # widened first, numpy 2 would cast MISSING_ELEVATION to int16
+    return np.where(elevation16 == _MISSING_ELEVATION_16, MISSING_ELEVATION, elevation16.astype(np.int32))
+
+
+def _ElevationValues(elevation: np.ndarray) -> list:
+    return [None if ele == _MISSING_ELEVATION_16 else ele for ele in _Elevation16(elevation).tolist()]
+
+
+def _TimeDeltas(time: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Differences of the known times in whole seconds to the previous known time and where times are known
+
+    The first difference is the time since the epoch.
+    """
+    known = ~np.isnan(time)
+    seconds = np.round(time[known]).astype(np.int64)
+    return np.diff(seconds, prepend=0), known
+
+
+def _Times(deltas: np.ndarray, known: np.ndarray) -> np.ndarray:
+    """Times of the points from the differences of :func:`_TimeDeltas`, NaN where unknown"""
+    time = np.full(len(known), np.nan)
+    time[known] = np.cumsum(deltas, dtype=np.int64)
+    return time
+
+
+def _TimeValues(time: np.ndarray) -> list:
+    """Times of polyline segments, see :func:`_TimeDeltas`, None where unknown"""
+    deltas, known = _TimeDeltas(time)
+    values = [None] * len(time)
+    for i, delta in zip(np.flatnonzero(known).tolist(), deltas.tolist()):
+        values[i] = delta
+    return values
+
+
+def _IsoTimes(time: np.ndarray) -> list:
+    strings = np.datetime_as_string(np.round(np.nan_to_num(time)).astype(np.int64).astype('datetime64[s]'))
+    return [None if missing else string + 'Z' for missing, string in zip(np.isnan(time).tolist(), strings.tolist())]
+
+
+def _OpenOutput(fileName: str, binary: bool):
+    mode = 'wb' if binary else 'wt'
+    encoding = None if binary else 'utf-8'
+    if fileName.endswith('.gz'):
+        return gzip.open(fileName, mode, encoding=encoding)
+    return open(fileName, mode, encoding=encoding)
+
+
+def _ReadInput(file) -> bytes:
+    if not isinstance(file, (str, os.PathLike)):
+        return file.read()
+    with (gzip.open(file, 'rb') if os.fspath(file).endswith('.gz') else open(file, 'rb')) as stream:
+        return stream.read()
+
+
+def EncodePolyline(latitude: np.ndarray, longitude: np.ndarray) -> str:
+    """Google encoded polyline of a line with precision 5, all points are encoded at once"""
+    points = np.column_stack((_FixedPoint(latitude), _FixedPoint(longitude)))
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    chunkCount = 1 + (values[:, None] >= (np.int64(1) << _CHUNK_SHIFTS[1:])).sum(axis=1)
+    chunks = (values[:, None] >> _CHUNK_SHIFTS) & 0x1f
+    following = _CHUNK_SHIFTS // 5 < (chunkCount - 1)[:, None]
+    chunks = np.where(following, chunks | 0x20, chunks) + 63
+    return chunks[_CHUNK_SHIFTS // 5 < chunkCount[:, None]].astype(np.uint8).tobytes().decode('ascii')
+
+
+def DecodePolyline(polyline: str) -> tuple[np.ndarray, np.ndarray]:
+    """Latitude and longitude of a Google encoded polyline with precision 5"""
+    chunks = np.frombuffer(polyline.encode('ascii'), dtype=np.uint8).astype(np.int64) - 63
+    if not len(chunks):
+        return np.empty(0), np.empty(0)
+    last = chunks < 0x20
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    valueIndex = np.cumsum(np.concatenate(([0], last[:-1])))
+    shifts = (np.arange(len(chunks)) - starts[valueIndex]) * 5
+    values = np.add.reduceat((chunks & 0x1f) << shifts, starts)
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    points = np.cumsum(deltas.reshape(-1, 2), axis=0)
+    return points[:, 0] / _SCALE, points[:, 1] / _SCALE
+
+
+class _TrackFileWriter:
+    """Context manager of the track writers, an incomplete file is removed if writing fails"""
+
+    def __init__(self, fileName: str, binary: bool):
+        self.fileName = fileName
+        self._file = _OpenOutput(fileName, binary)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.Close()
+        else:
+            self._file.close()
+            if os.path.exists(self.fileName):
+                os.remove(self.fileName)
+
+    def Close(self):
+        self._file.close()
+
+
+class CompactTrackWriter(_TrackFileWriter):
+    """Writes track data in the binary format, one block per call of :meth:`WriteTrackData`
+
+    Usage::
+
+        with CompactTrackWriter('tracks.gpxb', name='tracks') as writer:
+            writer.WriteTrackData(trackData)
+    """
+
+    def __init__(self, fileName: str, name: str | None = None):
+        """
+        Args:
+            fileName: file to write, gzip compressed if it ends with .gz
+            name: name of the document
+        """
+        super().__init__(fileName, binary=True)
+        header = json.dumps({'name': name}).encode('utf-8')
+        self._file.write(_HEADER.pack(MAGIC, _VERSION, len(header)) + header)
+
+    def WriteTrackData(self, trackData: TrackData):
+        timeDeltas, timeKnown = _TimeDeltas(trackData.time)
+        blockHeader = {
+            'waypointNames': trackData.waypointNames, 'trackNames': trackData.trackNames,
+            'trackDescriptions': trackData.trackDescriptions, 'waypointCount': len(trackData.waypointLatitude),
+            'segmentCount': len(trackData.segmentOffsets) - 1, 'pointCount': trackData.pointCount,
+        }
+        times = []
+        if timeKnown.any():
+            blockHeader['timeOrigin'] = int(timeDeltas[0])
+            timeDeltas[0] = 0
+            if np.abs(timeDeltas).max() > np.iinfo(np.int32).max:
+                raise ValueError('Times of a track data more than 68 years apart cannot be stored')
+            time32 = np.full(trackData.pointCount, _MISSING_TIME_32, dtype='<i4')
+            time32[timeKnown] = timeDeltas
+            times.append(time32.tobytes())
+        header = json.dumps(blockHeader).encode('utf-8')
+        latitude, longitude = _FixedPoint(trackData.latitude), _FixedPoint(trackData.longitude)
+        self._file.write(b''.join([
+            _LENGTH.pack(len(header)), header,
+            np.diff(trackData.trackOffsets).astype('<u4').tobytes(),
+            np.diff(trackData.segmentOffsets).astype('<u4').tobytes(),
+            _FixedPoint(trackData.waypointLatitude).astype('<i4').tobytes(),
+            _FixedPoint(trackData.waypointLongitude).astype('<i4').tobytes(),
+            _Elevation16(trackData.waypointElevation).tobytes(),
+            np.diff(latitude, prepend=0).astype('<i4').tobytes(),
+            np.diff(longitude, prepend=0).astype('<i4').tobytes(),
+            _Elevation16(trackData.elevation).tobytes(),
+        ] + times))
+
+
+def ReadCompactTracks(file) -> TrackData:
+    """Load a file of the binary format into one track data, use its ToGpx for gpxpy objects
+
+    Args:
+        file: file name, gzip compressed if it ends with .gz, or binary file object
+
+    Raises:
+        ValueError: if the file is not in the binary format
+    """
+    data = _ReadInput(file)
+    if len(data) < _HEADER.size:
+        raise ValueError('Not a compact track file')
+    magic, version, nameLength = _HEADER.unpack_from(data)
+    if magic != MAGIC or version not in _READABLE_VERSIONS:
+        raise ValueError(f'Not a compact track file of version {_VERSION}')
+    offset = _HEADER.size + nameLength
+    columns = {key: [] for key in ['trackSegments', 'segmentPoints', 'waypointLatitude', 'waypointLongitude',
+                                   'waypointElevation', 'latitude', 'longitude', 'elevation', 'time']}
+    trackData = TrackData()
+
+    def Take(key: str, dtype: str, count: int):
+        nonlocal offset
+        column = np.frombuffer(data, dtype, count, offset)
+        offset += column.nbytes
+        columns[key].append(column)
+
+    while offset < len(data):
+        (headerLength,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        header = json.loads(data[offset:offset + headerLength])
+        offset += headerLength
+        trackData.waypointNames += header['waypointNames']
+        trackData.trackNames += header['trackNames']
+        trackData.trackDescriptions += header['trackDescriptions']
+        waypointCount, pointCount = header['waypointCount'], header['pointCount']
+        Take('trackSegments', '<u4', len(header['trackNames']))
+        Take('segmentPoints', '<u4', header['segmentCount'])
+        Take('waypointLatitude', '<i4', waypointCount)
+        Take('waypointLongitude', '<i4', waypointCount)
+        Take('waypointElevation', '<i2', waypointCount)
+        # the deltas start over in each block
+        for key in ['latitude', 'longitude']:
+            Take(key, '<i4', pointCount)
+            columns[key][-1] = np.cumsum(columns[key][-1], dtype=np.int64)
+        Take('elevation', '<i2', pointCount)
+        if header.get('timeOrigin') is None:
+            columns['time'].append(np.full(pointCount, np.nan))
+        else:
+            Take('time', '<i4', pointCount)
+            known = columns['time'][-1] != _MISSING_TIME_32
+            deltas = columns['time'][-1][known].astype(np.int64)
+            deltas[:1] += header['timeOrigin']
+            columns['time'][-1] = _Times(deltas, known)
+
+    column = {key: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64) for key, parts in columns.items()}
+    trackData.trackOffsets = np.concatenate(([0], np.cumsum(column['trackSegments']))).astype(np.int64)
+    trackData.segmentOffsets = np.concatenate(([0], np.cumsum(column['segmentPoints']))).astype(np.int64)
+    for key in ['waypointLatitude', 'waypointLongitude', 'latitude', 'longitude']:
+        setattr(trackData, key, column[key] / _SCALE)
+    trackData.waypointElevation = _Elevation32(column['waypointElevation'])
+    trackData.elevation = _Elevation32(column['elevation'])
+    trackData.time = column['time'].astype(np.float64)
+    return trackData
+
+
+class GeoJsonWriter(_TrackFileWriter):
+    """Writes track data as a GeoJSON feature collection, tracks are multi line strings of their segments"""
+
+    def __init__(self, fileName: str, name: str | None = None):
+        """
+        Args:
+            fileName: file to write, gzip compressed if it ends with .gz
+            name: name of the feature collection
+        """
+        super().__init__(fileName, binary=False)
+        self._file.write(f'{{"type": "FeatureCollection", "name": {json.dumps(name)}, "features": [')
+        self._separator = '\n'
+
+    def WriteTrackData(self, trackData: TrackData):
+        features = [self._WaypointFeature(*waypoint) for waypoint in zip(
+            trackData.waypointNames, trackData.waypointLatitude.tolist(), trackData.waypointLongitude.tolist(),
+            _ElevationValues(trackData.waypointElevation))]
+        features += [self._TrackFeature(trackData, trackIndex) for trackIndex in range(len(trackData.trackNames))]
+        for feature in features:
+            self._file.write(self._separator + json.dumps(feature, separators=(',', ':')))
+            self._separator = ',\n'
+
+    def Close(self):
+        self._file.write('\n]}\n')
+        super().Close()
+
+    @staticmethod
+    def _WaypointFeature(name: str | None, latitude: float, longitude: float, elevation: int | None) -> dict:
+        coordinates = [longitude, latitude] if elevation is None else [longitude, latitude, elevation]
+        return {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': coordinates},
+                'properties': {'name': name}}
+
+    def _TrackFeature(self, trackData: TrackData, trackIndex: int) -> dict:
+        lines = []
+        for points in trackData.TrackSegments(trackIndex):
+            lines.append([[lon, lat] if ele is None else [lon, lat, ele] for lat, lon, ele in zip(
+                trackData.latitude[points].tolist(), trackData.longitude[points].tolist(),
+                _ElevationValues(trackData.elevation[points]))])
+        properties = {'name': trackData.trackNames[trackIndex], 'description': trackData.trackDescriptions[trackIndex]}
+        segments = trackData.TrackSegments(trackIndex)
+        if any(not np.isnan(trackData.time[points]).all() for points in segments):
+            properties['coordTimes'] = [_IsoTimes(trackData.time[points]) for points in segments]
+        return {'type': 'Feature', 'geometry': {'type': 'MultiLineString', 'coordinates': lines},
+                'properties': properties}
+
+
+class PolylineWriter(GeoJsonWriter):
+    """Writes track data as a GeoJSON feature collection with the segments of tracks as encoded polylines
+
+    Track features have no geometry, their properties hold the encoded polyline and the elevations
+    of each segment.
+    """
+
+    def _TrackFeature(self, trackData: TrackData, trackIndex: int) -> dict:
+        segments = trackData.TrackSegments(trackIndex)
+        properties = {'name': trackData.trackNames[trackIndex], 'description': trackData.trackDescriptions[trackIndex],
+                      'polylines': [EncodePolyline(trackData.latitude[points], trackData.longitude[points])
+                                    for points in segments],
+                      'elevations': [_ElevationValues(trackData.elevation[points]) for points in segments]}
+        if any(not np.isnan(trackData.time[points]).all() for points in segments):
+            properties['times'] = [_TimeValues(trackData.time[points]) for points in segments]
+        return {'type': 'Feature', 'geometry': None, 'properties': properties}
+
+
+def ReadPolylineTracks(file) -> TrackData:
+    """Load a file written by :class:`PolylineWriter` into one track data
+
+    Args:
+        file: file name, gzip compressed if it ends with .gz, or binary file object
+    """
+    features = json.loads(_ReadInput(file))['features']
+    trackData = TrackData()
+    waypoints, lines, elevations, times, segmentCounts = [], [], [], [], []
+    for feature in features:
+        properties = feature['properties']
+        if feature['geometry']:
+            longitude, latitude, *elevation = feature['geometry']['coordinates']
+            trackData.waypointNames.append(properties['name'])
+            waypoints.append((latitude, longitude, elevation[0] if elevation else MISSING_ELEVATION))
+            continue
+        trackData.trackNames.append(properties['name'])
+        trackData.trackDescriptions.append(properties['description'])
+        segmentCounts.append(len(properties['polylines']))
+        lines += [DecodePolyline(polyline) for polyline in properties['polylines']]
+        elevations += [[MISSING_ELEVATION if ele is None else ele for ele in segment]
+                       for segment in properties['elevations']]
+        segmentLines = lines[len(lines) - len(properties['polylines']):]
+        times += properties.get('times') or [[None] * len(latitude) for latitude, _ in segmentLines]
+
+    waypointColumns = np.array(waypoints, dtype=np.float64).reshape(-1, 3).T
+    trackData.waypointLatitude, trackData.waypointLongitude = waypointColumns[0].copy(), waypointColumns[1].copy()
+    trackData.waypointElevation = waypointColumns[2].astype(np.int32)
+    trackData.trackOffsets = np.concatenate(([0], np.cumsum(segmentCounts, dtype=np.int64)))
+    trackData.segmentOffsets = np.concatenate(([0], np.cumsum([len(lat) for lat, _ in lines], dtype=np.int64)))
+    trackData.latitude = np.concatenate([lat for lat, _ in lines] or [np.empty(0)])
+    trackData.longitude = np.concatenate([lon for _, lon in lines] or [np.empty(0)])
+    trackData.elevation = np.array([ele for segment in elevations for ele in segment], dtype=np.int32)
+    trackData.time = np.concatenate([_Times(np.array([delta for delta in segment if delta is not None], dtype=np.int64),
+                                            np.array([delta is not None for delta in segment], dtype=bool))
+                                     for segment in times] or [np.empty(0)])
+    return trackData
@@ -0,0 +1,400 @@
+"""Long-running local HTTP service for the converters
+
+Endpoints, each converting the request body and answering with the written file:
+
+- ``POST /summarize?name=NAME``: gpx file or ZIP archive of gpx files, answers the summary gpx
+- ``POST /compress?name=NAME&simplify=MODE&tolerance=METERS&format=FORMAT``: the same input, answers
+  the compressed tracks in one of gpxpert.OutputFormats.OUTPUT_FORMATS
+- ``POST /table?name=NAME``: waypoint table text, answers the waypoint gpx
+- ``GET /stats``: latency and throughput of the endpoints as JSON
+
+Conversions run in a pool of worker processes that import gpxpy and numpy and set up the elevation
+data once, so tiles and parsers stay warm between requests. Requests arriving while all workers are
+busy are queued and sent to the next free worker as one batch. If the queue is full, requests are
+answered with 503 right away.
+"""
+import asyncio
+import collections
+import functools
+import http
+import json
+import logging
+import os
+import tempfile
+import time
+import urllib.parse
+
+_logger = logging.getLogger(__name__)
+
+SUMMARIZE = 'summarize'
+COMPRESS = 'compress'
+TABLE = 'table'
+ENDPOINTS = (SUMMARIZE, COMPRESS, TABLE)
+_CONTENT_TYPES = {'.gpx': 'application/gpx+xml', '.gpxb': 'application/octet-stream',
+                  '.geojson': 'application/geo+json', '.json': 'application/json'}
+_ZIP_SIGNATURE = b'PK\x03\x04'
+# latencies kept per endpoint for the percentiles of the statistics
+_LATENCY_WINDOW = 1024
+
+
+class RequestError(Exception):
+    """Invalid request, answered with its HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _WarmWorker(elevationDir: str | None):
+    """Import the converters and set up the elevation data of a worker process before its first request"""
+    import numpy  # noqa: F401
+
+    from gpxpert import TrackToWaypointConverter, WaypointTableConverter  # noqa: F401
+    from gpxpert.ElevationData import GetElevationData
+    from gpxpert.ElevationLookup import ElevationLookup  # noqa: F401
+    from gpxpert.TrackData import TrackData  # noqa: F401
+
+    GetElevationData(elevationDir)
+
+
+def _Name(params: dict, default: str) -> str:
+    """File name stem of the upload, without any directory"""
+    name = os.path.basename(params.get('name', default)).strip()
+    return name if name and name not in ('.', '..') else default
+
+
+def _ConvertTracks(endpoint: str, body: bytes, params: dict, tempDir: str, elevationDir: str | None,
+                   cacheDir: str | None) -> tuple[str, dict]:
+    from gpxpert.OutputFormats import GPX
+    from gpxpert.SimplifyModes import MIN_DISTANCE
+    from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+    isZip = body.startswith(_ZIP_SIGNATURE)
+    fileName = os.path.join(tempDir, _Name(params, 'upload') + ('.zip' if isZip else '.gpx'))
+    with open(fileName, 'wb') as uploadFile:
+        uploadFile.write(body)
+    try:
+        tolerance = float(params.get('tolerance', 50))
+    except ValueError:
+        raise RequestError(400, f'Invalid tolerance {params["tolerance"]}')
+    try:
+        converter = TrackToWaypointConverter(fileName, cacheDir=cacheDir, elevationDir=elevationDir,
+                                             simplify=params.get('simplify', MIN_DISTANCE), tolerance=tolerance,
+                                             outputFormat=params.get('format', GPX))
+    except ValueError as e:
+        raise RequestError(400, str(e))
+    outputFileName = converter.Convert() if endpoint == SUMMARIZE else converter.Compress()
+    if converter.failedFiles and not isZip:
+        raise RequestError(422, converter.failedFiles[0][1])
+    # like the command line, gpx files that cannot be parsed are skipped and only logged
+    return outputFileName, {'X-Failed-Files': str(len(converter.failedFiles))}
+
+
+def _ConvertTable(body: bytes, params: dict, tempDir: str, elevationDir: str | None) -> tuple[str, dict]:
+    from gpxpert.WaypointTableConverter import WaypointTableConverter
+
+    fileName = os.path.join(tempDir, _Name(params, 'table') + '.txt')
+    with open(fileName, 'wb') as uploadFile:
+        uploadFile.write(body)
+    return WaypointTableConverter(fileName, elevationDir).Convert(), {}
+
+
+def _ConvertRequest(endpoint: str, body: bytes, params: dict, elevationDir: str | None,
+                    cacheDir: str | None) -> tuple[int, str, bytes, dict]:
+    """Convert one request in a temporary directory
+
+    Returns:
+        status, content type, body and additional headers of the response
+    """
+    try:
+        with tempfile.TemporaryDirectory(prefix='gpxpert-') as tempDir:
+            if endpoint == TABLE:
+                outputFileName, headers = _ConvertTable(body, params, tempDir, elevationDir)
+            else:
+                outputFileName, headers = _ConvertTracks(endpoint, body, params, tempDir, elevationDir, cacheDir)
+            with open(outputFileName, 'rb') as outputFile:
+                content = outputFile.read()
+        extension = os.path.splitext(outputFileName[:-len('.gz')] if outputFileName.endswith('.gz')
+                                     else outputFileName)[1]
+        return 200, _CONTENT_TYPES.get(extension, 'application/octet-stream'), content, headers
+    except RequestError as e:
+        return e.status, 'text/plain; charset=utf-8', str(e).encode('utf-8'), {}
+    except Exception as e:
+        _logger.exception(f'Failed to convert a {endpoint} request')
+        return 500, 'text/plain; charset=utf-8', f'{type(e).__name__}: {e}'.encode('utf-8'), {}
+
+
+def _ConvertBatch(requests: list, elevationDir: str | None, cacheDir: str | None) -> list[tuple]:
+    """Responses of several requests converted by one worker call, see :func:`_ConvertRequest`"""
+    return [_ConvertRequest(endpoint, body, params, elevationDir, cacheDir) for endpoint, body, params in requests]
+
+
+class _EndpointStats:
+    __slots__ = ('requests', 'errors', 'bytesIn', 'bytesOut', 'latencies')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytesIn = 0
+        self.bytesOut = 0
+        self.latencies = collections.deque(maxlen=_LATENCY_WINDOW)
+
+
+def _Percentile(sortedValues: list, fraction: float) -> float:
+    return sortedValues[min(int(fraction * len(sortedValues)), len(sortedValues) - 1)] if sortedValues else 0.
+
+
+class ConversionServer:
+    """Asyncio HTTP server on localhost converting uploads with a pool of warm worker processes
+
+    Usage::
+
+        server = ConversionServer(port=8080, jobs=4, elevationDir='hgt')
+        asyncio.run(server.Serve())
+
+    or from a running event loop::
+
+        port = await server.Start()
+        ...
+        await server.Close()
+    """
+    # converts a batch of requests in a worker process, see _ConvertBatch, replaceable by any picklable function
+    convertBatch = staticmethod(_ConvertBatch)
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8080, jobs: int = 1, elevationDir: str | None = None,
+                 cacheDir: str | None = None, maxQueued: int = 64, batchSize: int = 8,
+                 maxBodyBytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            host: address to listen on, localhost by default
+            port: port to listen on, 0 picks a free port
+            jobs: number of worker processes, 0 uses all available cores
+            elevationDir: directory of local .hgt elevation tiles used instead of downloading SRTM data
+            cacheDir: directory of a persistent parse cache for uploaded gpx files
+            maxQueued: requests waiting for a worker, further requests are answered with 503
+            batchSize: queued requests sent to a worker at once
+            maxBodyBytes: larger uploads are answered with 413
+        """
+        self.host = host
+        self.port = port
+        self.jobs: int = jobs or os.cpu_count() or 1
+        self.elevationDir = elevationDir
+        self.cacheDir = cacheDir
+        self.maxQueued = maxQueued
+        self.batchSize = batchSize
+        self.maxBodyBytes = maxBodyBytes
+        self._server: asyncio.Server | None = None
+        self._executor = None
+        self._queue: asyncio.Queue | None = None
+        self._dispatcher: asyncio.Task | None = None
+        self._stats = {endpoint: _EndpointStats() for endpoint in ENDPOINTS}
+        self._rejected = 0
+        self._batches = 0
+        self._batchedRequests = 0
+        self._busyWorkers = 0
+        self._startTime = time.perf_counter()
+
+    async def Start(self) -> int:
+        """Start the worker pool and listen for requests
+
+        Returns:
+            the port listened on
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        loop = asyncio.get_running_loop()
+        self._executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_WarmWorker,
+                                             initargs=(self.elevationDir,))
+        # start all workers now, so the first requests do not wait for imports
+        await asyncio.gather(*(loop.run_in_executor(self._executor, self.convertBatch, [], None, None)
+                               for _ in range(self.jobs)))
+        self._queue = asyncio.Queue(maxsize=self.maxQueued)
+        self._dispatcher = asyncio.create_task(self._Dispatch())
+        self._server = await asyncio.start_server(self._HandleConnection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._startTime = time.perf_counter()
+        _logger.info(f'Serving on http://{self.host}:{self.port} with {self.jobs} workers')
+        return self.port
+
+    async def Close(self):
+        """Stop listening, cancel queued requests and shut the worker pool down"""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        while self._queue and not self._queue.empty():
+            self._queue.get_nowait()[-1].cancel()
+        if self._executor:
+            # waiting for the running conversions must not block the event loop
+            await asyncio.to_thread(self._executor.shutdown, cancel_futures=True)
+
+    async def Serve(self):
+        """Serve until cancelled, e.g. by KeyboardInterrupt in asyncio.run"""
+        await self.Start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.Close()
+
+    def Stats(self) -> dict:
+        """Requests, errors, latency percentiles in ms and throughput of each endpoint, and the batching
+
+        Latencies are measured from the end of the upload to the start of the response, over the
+        last requests of each endpoint. Rejected requests are not included in the endpoints.
+        """
+        uptime = time.perf_counter() - self._startTime
+        endpoints = {}
+        for endpoint, stats in self._stats.items():
+            latencies = sorted(stats.latencies)
+            endpoints[endpoint] = {
+                'requests': stats.requests,
+                'errors': stats.errors,
+                'requestsPerSecond': stats.requests / uptime if uptime else 0.,
+                'bytesIn': stats.bytesIn,
+                'bytesOut': stats.bytesOut,
+                'latencyMs': {name: 1000 * _Percentile(latencies, fraction) for name, fraction in
+                              [('p50', .5), ('p95', .95), ('p99', .99), ('max', 1.)]},
+            }
+        return {
+            'uptimeSeconds': uptime,
+            'workers': self.jobs,
+            'busyWorkers': self._busyWorkers,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'rejected': self._rejected,
+            'batches': self._batches,
+            'meanBatchSize': self._batchedRequests / self._batches if self._batches else 0.,
+            'endpoints': endpoints,
+        }
+
+    async def _Dispatch(self):
+        """Send the queued requests to free workers, all requests queued meanwhile as one batch"""
+        loop = asyncio.get_running_loop()
+        freeWorkers = asyncio.Semaphore(self.jobs)
+        while True:
+            await freeWorkers.acquire()
+            batch = [await self._queue.get()]
+            while len(batch) < self.batchSize and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            batch = [request for request in batch if not request[-1].cancelled()]
+            if not batch:
+                freeWorkers.release()
+                continue
+            self._batches += 1
+            self._batchedRequests += len(batch)
+            self._busyWorkers += 1
+            responses = loop.run_in_executor(self._executor, self.convertBatch,
+                                             [request[:-1] for request in batch], self.elevationDir, self.cacheDir)
+            responses.add_done_callback(functools.partial(self._BatchDone, batch, freeWorkers))
+
+    def _BatchDone(self, batch: list, freeWorkers: asyncio.Semaphore, responses: asyncio.Future):
+        self._busyWorkers -= 1
+        freeWorkers.release()
+        if responses.cancelled():
+            results = [(503, 'text/plain; charset=utf-8', b'Server shutting down', {})] * len(batch)
+        elif responses.exception():
+            # e.g. a worker process died, the pool cannot be used anymore
+            error = responses.exception()
+            _logger.error(f'Worker pool failed: {error}')
+            results = [(500, 'text/plain; charset=utf-8', f'{type(error).__name__}: {error}'.encode('utf-8'), {})] \
+                * len(batch)
+        else:
+            results = responses.result()
+        for (*_, future), response in zip(batch, results):
+            if not future.done():
+                future.set_result(response)
+
+    async def _HandleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the requests of a connection, several if the client keeps it alive"""
+        try:
+            while True:
+                try:
+                    request = await self._ReadRequest(reader)
+                except RequestError as e:
+                    writer.write(_Response(e.status, 'text/plain; charset=utf-8', str(e).encode('utf-8'), {}, False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, params, body, keepAlive = request
+                status, contentType, content, headers = await self._Respond(method, path, params, body)
+                writer.write(_Response(status, contentType, content, headers, keepAlive))
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _ReadRequest(self, reader: asyncio.StreamReader) -> tuple | None:
+        """Method, path, query parameters, body and keep-alive of the next request, None at the end of the connection
+
+        Raises:
+            RequestError: for malformed requests and too large uploads
+        """
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise RequestError(400, 'Incomplete request')
+            return None
+        except asyncio.LimitOverrunError:
+            raise RequestError(431, 'Request header too large')
+        requestLine, *headerLines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = requestLine.split(' ')
+        except ValueError:
+            raise RequestError(400, f'Malformed request line {requestLine}')
+        headers = {}
+        for line in filter(None, headerLines):
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            raise RequestError(411, 'Chunked uploads are not supported, send a Content-Length')
+        try:
+            contentLength = int(headers.get('content-length', 0))
+        except ValueError:
+            raise RequestError(400, 'Invalid Content-Length')
+        if contentLength > self.maxBodyBytes:
+            raise RequestError(413, f'Upload larger than {self.maxBodyBytes} bytes')
+        body = await reader.readexactly(contentLength)
+        connection = headers.get('connection', '').lower()
+        keepAlive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        url = urllib.parse.urlsplit(target)
+        params = {name: values[-1] for name, values in urllib.parse.parse_qs(url.query).items()}
+        return method, url.path, params, body, keepAlive
+
+    async def _Respond(self, method: str, path: str, params: dict, body: bytes) -> tuple[int, str, bytes, dict]:
+        endpoint = path.strip('/')
+        if endpoint == 'stats':
+            if method != 'GET':
+                return 405, 'text/plain; charset=utf-8', b'Use GET', {'Allow': 'GET'}
+            return 200, 'application/json', json.dumps(self.Stats(), indent=2).encode('utf-8'), {}
+        if endpoint not in ENDPOINTS:
+            return 404, 'text/plain; charset=utf-8', f'No endpoint {path}'.encode('utf-8'), {}
+        if method != 'POST':
+            return 405, 'text/plain; charset=utf-8', b'Use POST', {'Allow': 'POST'}
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((endpoint, body, params, future))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            return 503, 'text/plain; charset=utf-8', b'Too many queued requests', {'Retry-After': '1'}
+        start = time.perf_counter()
+        response = await future
+        stats = self._stats[endpoint]
+        stats.requests += 1
+        stats.errors += response[0] >= 400
+        stats.bytesIn += len(body)
+        stats.bytesOut += len(response[2])
+        stats.latencies.append(time.perf_counter() - start)
+        return response
+
+
+def _Response(status: int, contentType: str, content: bytes, headers: dict, keepAlive: bool) -> bytes:
+    lines = [f'HTTP/1.1 {status} {http.HTTPStatus(status).phrase}', f'Content-Type: {contentType}',
+             f'Content-Length: {len(content)}', f'Connection: {"keep-alive" if keepAlive else "close"}']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + content
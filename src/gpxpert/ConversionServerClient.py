@@ -0,0 +1,43 @@
+import asyncio
+import logging
+import sys
+
+from common.client import parse_serve_args, setup_logging
+from gpxpert.ConversionServer import ConversionServer
+
+_logger = logging.getLogger(__name__)
+
+
+def main(args):
+    """Wrapper allowing this function to be called with string arguments in a CLI fashion
+
+    Args:
+      args (List[str]): command line parameters as list of strings
+          (for example  ``["--port", "8080"]``).
+    """
+    args = parse_serve_args(args)
+    setup_logging(args.loglevel)
+    server = ConversionServer(args.host, args.port, args.jobs, elevationDir=args.elevationDir,
+                              cacheDir=args.cacheDir, maxQueued=args.maxQueued, batchSize=args.batchSize)
+    print(f"Serve on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.Serve())
+    except KeyboardInterrupt:
+        pass
+    _logger.info("Script ends here")
+
+
+def run():
+    """Calls :func:`main` passing the CLI arguments extracted from :obj:`sys.argv`
+
+    This function can be used as entry point to create console scripts with setuptools.
+    """
+    main(sys.argv[1:])
+
+
+if __name__ == "__main__":
+    # Usage from terminal:
+    #
+    #   python src/gpxpert/ConversionServerClient.py --port 8080 --jobs 4 -v
+    #
+    run()
@@ -0,0 +1,22 @@
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def GetElevationData(elevationDir: str | None = None):
+    """Elevation provider of this process, shared by all converters and created on first use
+
+    Args:
+        elevationDir: directory of .hgt tiles, which are memory-mapped by :class:`HgtTileStore`; srtm.py's data
+            if None
+
+    Returns:
+        an object whose get_file(latitude, longitude) returns a tile, as read by :class:`ElevationLookup`
+    """
+    # srtm and numpy are imported here, so importing this module keeps the CLI start fast
+    if elevationDir:
+        from gpxpert.HgtTileStore import HgtTileStore
+
+        return HgtTileStore(elevationDir)
+    import srtm
+
+    return srtm.get_data()
@@ -0,0 +1,110 @@
+import logging
+import math
+
+import numpy as np
+
+from gpxpert.Profiler import Count
+
+_logger = logging.getLogger(__name__)
+
+# elevations outside this range are voids or invalid, as in srtm.py
+_MIN_VALID_ELEVATION = -1000
+_MAX_VALID_ELEVATION = 10000
+
+
+def _TileKeys(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Unique number of the 1x1 degree tile of each point"""
+    return (np.floor(latitude).astype(np.int64) + 90) * 360 + (np.floor(longitude).astype(np.int64) + 180)
+
+
+def _ValidElevation(values: np.ndarray) -> np.ndarray:
+    elevation = values.astype(np.float64)
+    elevation[(values > _MAX_VALID_ELEVATION) | (values < _MIN_VALID_ELEVATION)] = np.nan
+    return elevation
+
+
+class ElevationLookup:
+    """Batched elevation lookup in SRTM tiles
+
+    Points are grouped by tile and the elevations of all points of a tile are read from the tile's
+    height grid in one vectorized step. Without interpolation the results equal srtm.py's
+    ``get_elevation``; repeated coordinates are looked up once.
+    """
+
+    def __init__(self, elevationData, interpolate: bool = False, decimals: int | None = None):
+        """
+        Args:
+            elevationData: srtm.py GeoElevationData, or any object whose get_file(latitude, longitude) returns
+                a GeoElevationFile-like tile or None
+            interpolate: interpolate bilinearly between the four surrounding grid points
+            decimals: coordinates are rounded to this many decimals before the lookup, so points closer than
+                that share one lookup, None keeps them unchanged
+        """
+        self.elevationData = elevationData
+        self.interpolate = interpolate
+        self.decimals = decimals
+
+    def GetElevations(self, latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+        """Elevations in meters of all points, NaN where unknown
+
+        Args:
+            latitude: latitudes of the points
+            longitude: longitudes of the points, same length as latitude
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        elevation = np.full(len(latitude), np.nan)
+        valid = np.isfinite(latitude) & np.isfinite(longitude)
+        if not valid.any():
+            return elevation
+
+        coordinates = np.column_stack((latitude[valid], longitude[valid]))
+        if self.decimals is not None:
+            coordinates = np.round(coordinates, self.decimals)
+        coordinates, pointIndex = np.unique(coordinates, axis=0, return_inverse=True)
+        Count('elevationLookups', len(latitude))
+        Count('elevationUniquePoints', len(coordinates))
+        uniqueLatitude, uniqueLongitude = coordinates[:, 0], coordinates[:, 1]
+        uniqueElevation = np.full(len(coordinates), np.nan)
+
+        tileKeys = _TileKeys(uniqueLatitude, uniqueLongitude)
+        order = np.argsort(tileKeys, kind='stable')
+        tileStarts = np.flatnonzero(np.diff(tileKeys[order], prepend=-1) != 0)
+        Count('elevationTiles', len(tileStarts))
+        for points in np.split(order, tileStarts[1:]):
+            tile = self._GetTile(float(uniqueLatitude[points[0]]), float(uniqueLongitude[points[0]]))
+            if tile is not None:
+                uniqueElevation[points] = self._ReadTile(tile, uniqueLatitude[points], uniqueLongitude[points])
+
+        elevation[valid] = uniqueElevation[pointIndex.ravel()]
+        return elevation
+
+    def _GetTile(self, latitude: float, longitude: float):
+        try:
+            return self.elevationData.get_file(latitude, longitude)
+        except Exception as e:
+            # srtm.py raises plain exceptions for failed downloads, only the points of this tile are affected
+            _logger.warning(f'unable to load elevation tile for {math.floor(latitude)}, {math.floor(longitude)}: {e}')
+        return None
+
+    def _ReadTile(self, tile, latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+        side = tile.square_side
+        grid = np.frombuffer(tile.data, dtype='>i2', count=side * side).reshape(side, side)
+        row = (tile.latitude + 1 - latitude) * float(side - 1)
+        column = (longitude - tile.longitude) * float(side - 1)
+        # the same grid point as srtm.py's get_row_and_column
+        nearest = _ValidElevation(grid[np.floor(row).astype(np.int64), np.floor(column).astype(np.int64)])
+        if not self.interpolate:
+            return nearest
+
+        row0 = np.minimum(np.floor(row).astype(np.int64), side - 2)
+        column0 = np.minimum(np.floor(column).astype(np.int64), side - 2)
+        rowFraction = row - row0
+        columnFraction = column - column0
+        interpolated = \
+            _ValidElevation(grid[row0, column0]) * (1 - rowFraction) * (1 - columnFraction) + \
+            _ValidElevation(grid[row0 + 1, column0]) * rowFraction * (1 - columnFraction) + \
+            _ValidElevation(grid[row0, column0 + 1]) * (1 - rowFraction) * columnFraction + \
+            _ValidElevation(grid[row0 + 1, column0 + 1]) * rowFraction * columnFraction
+        # next to voids the nearest grid point is used
+        return np.where(np.isnan(interpolated), nearest, interpolated)
@@ -0,0 +1,130 @@
+"""Gpx track points of rounded coordinates and elevations, formatted with array operations
+
+Numbers on a fixed decimal grid are written digit by digit into a character matrix with one row per
+point, unwanted characters (leading zeros, trailing fraction zeros, missing elevation tags) are masked
+out. The result is the same as formatting each number with gpxpy's make_str.
+"""
+import numpy as np
+
+from gpxpert.TrackData import MISSING_ELEVATION
+
+COORDINATE_DECIMALS = 5
+# points formatted per matrix, bounds the memory of the matrix
+_CHUNK_POINTS = 1 << 16
+_COORDINATE_DIGITS = 3
+_LEVEL_START = '\n        <extensions>\n          <gpxpert:lod>'
+_LEVEL_END = '</gpxpert:lod>\n        </extensions>'
+# times of years 1000 to 9999 have a fixed width, in seconds since the epoch
+_TIME_RANGE = (-30610224000, 253402300799)
+
+
+def _Text(text: str, rowCount: int) -> tuple[np.ndarray, np.ndarray]:
+    characters = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    return np.broadcast_to(characters, (rowCount, len(characters))), np.ones((rowCount, len(characters)), dtype=bool)
+
+
+def _Digits(values: np.ndarray, count: int) -> np.ndarray:
+    """The last count decimal digits of non-negative integers, most significant first, as characters"""
+    powers = 10 ** np.arange(count - 1, -1, -1, dtype=np.int64)
+    return (values[:, None] // powers % 10 + ord('0')).astype(np.uint8)
+
+
+def _Number(values: np.ndarray, negative: np.ndarray, decimals: int) -> tuple[np.ndarray, np.ndarray]:
+    """Characters and mask of numbers given as non-negative integers in units of 10**-decimals
+
+    The fraction is written without trailing zeros but with at least one digit, no fraction is
+    written for decimals 0.
+    """
+    integer, fraction = np.divmod(values, 10 ** decimals)
+    integerDigits = len(str(int(integer.max()))) if len(values) else 1
+    integerPowers = 10 ** np.arange(integerDigits - 1, 0, -1, dtype=np.int64)
+    columns = [(np.where(negative, ord('-'), ord(' ')).astype(np.uint8)[:, None], negative[:, None]),
+               (_Digits(integer, integerDigits),
+                np.column_stack([integer[:, None] >= integerPowers, np.ones(len(values), dtype=bool)]))]
+    if decimals:
+        fractionPowers = 10 ** np.arange(decimals, 0, -1, dtype=np.int64)
+        keepFraction = fraction[:, None] % fractionPowers != 0
+        keepFraction[:, 0] = True
+        columns += [_Text('.', len(values)), (_Digits(fraction, decimals), keepFraction)]
+    return np.concatenate([characters for characters, _ in columns], axis=1), \
+        np.concatenate([keep for _, keep in columns], axis=1)
+
+
+def _Coordinate(degrees: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    scaled = np.abs(np.round(degrees * 10 ** COORDINATE_DECIMALS)).astype(np.int64)
+    characters, keep = _Number(scaled, np.signbit(degrees), COORDINATE_DECIMALS)
+    # gpxpy writes zero coordinates as 0, without sign and fraction
+    zero = degrees == 0
+    keep[zero, 0] = False
+    keep[zero, -(COORDINATE_DECIMALS + 1):] = False
+    return characters, keep
+
+
+def _OnGrid(degrees: np.ndarray) -> bool:
+    return bool(np.all(np.round(degrees * 10 ** COORDINATE_DECIMALS) / 10 ** COORDINATE_DECIMALS == degrees)) and \
+        bool(np.all(np.abs(degrees) < 10 ** _COORDINATE_DIGITS))
+
+
+def _WholeSeconds(time: np.ndarray) -> bool:
+    known = time[~np.isnan(time)]
+    return bool(np.all((known == np.round(known)) & (known >= _TIME_RANGE[0]) & (known <= _TIME_RANGE[1])))
+
+
+def Supported(latitude: np.ndarray, longitude: np.ndarray, elevation: np.ndarray, time: np.ndarray) -> bool:
+    """Whether points can be formatted by :func:`TrackPointsXml`
+
+    Coordinates must be rounded to COORDINATE_DECIMALS, elevations must be integers and times unknown
+    or whole seconds.
+    """
+    return np.issubdtype(elevation.dtype, np.integer) and _WholeSeconds(time) and \
+        _OnGrid(latitude) and _OnGrid(longitude)
+
+
+def _Time(time: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Characters and mask of times in whole seconds, formatted like numpy's datetime_as_string"""
+    strings = np.datetime_as_string(np.nan_to_num(time).astype(np.int64).astype('datetime64[s]'))
+    characters = np.char.encode(strings, 'ascii').view(np.uint8).reshape(len(time), -1)
+    return characters, np.ones(characters.shape, dtype=bool)
+
+
+def TrackPointsXml(latitude: np.ndarray, longitude: np.ndarray, elevation: np.ndarray,
+                   levels: np.ndarray | None = None, time: np.ndarray | None = None) -> tuple[str, np.ndarray]:
+    """Track points formatted like gpxpy's to_xml inside a track segment, see :func:`Supported`
+
+    Args:
+        levels: level of detail of each point, written as extension like
+            :func:`gpxpert.GpxWriter.LevelExtensionXml`
+        time: times of the points in whole seconds, NaN where unknown
+
+    Returns:
+        the points and the offsets of each point in the text, with the end of the text last
+    """
+    texts, lengths = [], []
+    for start in range(0, len(latitude), _CHUNK_POINTS):
+        points = slice(start, start + _CHUNK_POINTS)
+        rowCount = len(latitude[points])
+        missing = elevation[points] == MISSING_ELEVATION
+        eleValues = np.where(missing, 0, elevation[points]).astype(np.int64)
+        eleCharacters, eleKeep = _Number(np.abs(eleValues), eleValues < 0, 0)
+        columns = [_Text('\n      <trkpt lat="', rowCount), _Coordinate(latitude[points]),
+                   _Text('" lon="', rowCount), _Coordinate(longitude[points]), _Text('">', rowCount)]
+        eleTag = [_Text('\n        <ele>', rowCount), (eleCharacters, eleKeep), _Text('</ele>', rowCount)]
+        for characters, keep in eleTag:
+            keep[missing] = False
+        columns += eleTag
+        if time is not None and not np.isnan(time[points]).all():
+            timeTag = [_Text('\n        <time>', rowCount), _Time(time[points]), _Text('Z</time>', rowCount)]
+            for characters, keep in timeTag:
+                keep[np.isnan(time[points])] = False
+            columns += timeTag
+        if levels is not None:
+            levelValues = levels[points].astype(np.int64)
+            columns += [_Text(_LEVEL_START, rowCount), _Number(levelValues, levelValues < 0, 0),
+                        _Text(_LEVEL_END, rowCount)]
+        columns.append(_Text('\n      </trkpt>', rowCount))
+        characters = np.concatenate([characters for characters, _ in columns], axis=1)
+        keep = np.concatenate([keep for _, keep in columns], axis=1)
+        texts.append(characters[keep].tobytes())
+        lengths.append(keep.sum(axis=1))
+    offsets = np.concatenate([[0]] + [np.cumsum(np.concatenate(lengths))]) if lengths else np.zeros(1, np.int64)
+    return b''.join(texts).decode('ascii'), offsets.astype(np.int64)
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zipfile
+
+from gpxpert.Profiler import Count
+from gpxpert.TrackData import TrackData
+
+_logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def _HashFile(fileName: str) -> str:
+    contentHash = hashlib.blake2b(digest_size=20)
+    with open(fileName, 'rb') as file:
+        while chunk := file.read(_HASH_CHUNK_SIZE):
+            contentHash.update(chunk)
+    return contentHash.hexdigest()
+
+
+def _WriteAtomic(fileName: str, write):
+    """Write to a temporary file next to fileName and move it into place, so readers never see partial files"""
+    fd, tempName = tempfile.mkstemp(dir=os.path.dirname(fileName), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            write(file)
+        os.replace(tempName, fileName)
+    except BaseException:
+        if os.path.exists(tempName):
+            os.remove(tempName)
+        raise
+
+
+class GpxParseCache:
+    """Persistent on-disk cache of parsed gpx files
+
+    Parsed files are stored as :class:`TrackData` entries addressed by the hash of the file content,
+    so copies of a file share one entry. A small reference per file path records size, modification
+    time and content hash: unchanged files are found without being read, touched but unmodified files
+    are found after hashing. Once the entries exceed maxBytes, the least recently used are evicted.
+
+    Several processes may share one cache directory.
+    """
+
+    def __init__(self, cacheDir: str, maxBytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cacheDir: directory the cache is stored in, created if missing
+            maxBytes: upper bound of the total size of all cache entries
+        """
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self._dataDir = os.path.join(cacheDir, 'data')
+        self._refDir = os.path.join(cacheDir, 'refs')
+        os.makedirs(self._dataDir, exist_ok=True)
+        os.makedirs(self._refDir, exist_ok=True)
+
+    def Get(self, gpxFileName: str) -> TrackData | None:
+        """Return the cached track data of a file, or None if the file is not cached
+
+        Only the reference of the file is checked, the file is not read. Files that are new, modified
+        or touched since they were cached return None, :meth:`Load` finds the touched ones by hash.
+        """
+        return self._Lookup(gpxFileName, hashFile=False)[1]
+
+    def Load(self, gpxFileName: str, readFunction) -> TrackData | None:
+        """Return the cached track data of a file, reading and caching it on a miss
+
+        Args:
+            gpxFileName: gpx file to load
+            readFunction: called with gpxFileName to parse the file on a cache miss,
+                may return None for files that cannot be parsed
+        """
+        contentHash, trackData = self._Lookup(gpxFileName)
+        if trackData is None:
+            trackData = readFunction(gpxFileName)
+            if trackData is not None:
+                self._Store(gpxFileName, contentHash, trackData)
+        return trackData
+
+    def Invalidate(self, gpxFileName: str):
+        """Drop the cache entry of a file"""
+        ref = self._ReadRef(gpxFileName)
+        for fileName in [self._RefPath(gpxFileName), ref and self._DataPath(ref['hash'])]:
+            if fileName and os.path.exists(fileName):
+                os.remove(fileName)
+
+    def Clear(self):
+        """Drop all cache entries"""
+        for directory in [self._dataDir, self._refDir]:
+            for fileName in os.listdir(directory):
+                os.remove(os.path.join(directory, fileName))
+
+    def Size(self) -> int:
+        """Total size of all cache entries in bytes"""
+        return sum(size for _, size, _ in self._Entries())
+
+    def _RefPath(self, gpxFileName: str) -> str:
+        pathHash = hashlib.blake2b(os.path.abspath(gpxFileName).encode('utf-8'), digest_size=20).hexdigest()
+        return os.path.join(self._refDir, pathHash + '.json')
+
+    def _DataPath(self, contentHash: str) -> str:
+        return os.path.join(self._dataDir, contentHash + '.npz')
+
+    def _ReadRef(self, gpxFileName: str) -> dict | None:
+        try:
+            with open(self._RefPath(gpxFileName), 'r', encoding='utf-8') as refFile:
+                return json.load(refFile)
+        except (OSError, ValueError):
+            return None
+
+    def _WriteRef(self, gpxFileName: str, contentHash: str):
+        stat = os.stat(gpxFileName)
+        ref = {'path': os.path.abspath(gpxFileName), 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+               'hash': contentHash}
+        _WriteAtomic(self._RefPath(gpxFileName), lambda file: file.write(json.dumps(ref).encode('utf-8')))
+
+    def _Lookup(self, gpxFileName: str, hashFile: bool = True) -> tuple[str | None, TrackData | None]:
+        stat = os.stat(gpxFileName)
+        ref = self._ReadRef(gpxFileName)
+        refIsCurrent = ref is not None and ref['size'] == stat.st_size and ref['mtime'] == stat.st_mtime_ns
+        if not refIsCurrent and not hashFile:
+            self.misses += 1
+            Count('parseCacheMisses')
+            return None, None
+        contentHash = ref['hash'] if refIsCurrent else _HashFile(gpxFileName)
+
+        dataPath = self._DataPath(contentHash)
+        try:
+            trackData = TrackData.Load(dataPath)
+            # the modification time of an entry is its last use, evictions go by it
+            os.utime(dataPath)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            self.misses += 1
+            Count('parseCacheMisses')
+            return contentHash, None
+
+        self.hits += 1
+        Count('parseCacheHits')
+        if not refIsCurrent:
+            self._WriteRef(gpxFileName, contentHash)
+        return contentHash, trackData
+
+    def _Store(self, gpxFileName: str, contentHash: str, trackData: TrackData):
+        _WriteAtomic(self._DataPath(contentHash), trackData.Save)
+        self._WriteRef(gpxFileName, contentHash)
+        self._Evict()
+
+    def _Entries(self) -> list[tuple[int, int, str]]:
+        """Last use, size and path of all data entries, skipping files other processes are still writing"""
+        entries = []
+        for entry in os.scandir(self._dataDir):
+            if not entry.name.endswith('.npz'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def _Evict(self):
+        entries = self._Entries()
+        totalSize = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if totalSize <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+                _logger.debug(f'evicted {path} from gpx parse cache')
+            except FileNotFoundError:
+                pass
+            totalSize -= size
@@ -0,0 +1,213 @@
+import datetime
+import logging
+import math
+import xml.etree.ElementTree as ET
+from typing import TYPE_CHECKING
+
+from gpxpy.gpx import GPXTrackPoint
+from gpxpy.gpxfield import parse_time
+
+if TYPE_CHECKING:
+    from gpxpert.TrackData import TrackData
+
+_logger = logging.getLogger(__name__)
+
+
+def _LocalName(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _ReadFirstTrackPointFromStream(gpxStream) -> GPXTrackPoint | None:
+    path = []
+    trackName = None
+    firstPoint = None
+    for event, element in ET.iterparse(gpxStream, events=('start', 'end')):
+        if event == 'start':
+            path.append(_LocalName(element.tag))
+            continue
+
+        tag = path.pop()
+        if len(path) == 1:
+            if tag == 'trk':
+                break
+            # top level elements before the first track (metadata, waypoints, routes) are not needed
+            element.clear()
+        elif path[1:] == ['trk'] and tag == 'name':
+            trackName = element.text
+        elif path[1:] == ['trk'] and tag == 'trkseg':
+            # only the first segment of the first track is considered
+            break
+        elif path[1:] == ['trk', 'trkseg'] and tag == 'trkpt':
+            # the name of a track comes before its segments
+            firstPoint = _TrackPointFromElement(element)
+            break
+
+    if firstPoint:
+        firstPoint.name = trackName
+    return firstPoint
+
+
+# optional fields of a track point as (attribute, type) of gpxpy's GPXTrackPoint by gpx tag
+_POINT_FIELDS = {
+    'magvar': ('magnetic_variation', float),
+    'geoidheight': ('geoid_height', float),
+    'name': ('name', str),
+    'cmt': ('comment', str),
+    'desc': ('description', str),
+    'src': ('source', str),
+    'sym': ('symbol', str),
+    'type': ('type', str),
+    'fix': ('type_of_gpx_fix', str),
+    'sat': ('satellites', int),
+    'hdop': ('horizontal_dilution', float),
+    'vdop': ('vertical_dilution', float),
+    'pdop': ('position_dilution', float),
+    'ageofdgpsdata': ('age_of_dgps_data', float),
+    'dgpsid': ('dgps_id', int),
+}
+
+
+def SetPointFields(point: GPXTrackPoint, fields: list) -> GPXTrackPoint:
+    """Set the optional fields of a track point, like name, description or satellites, from their gpx text
+
+    Args:
+        point: gpxpy track point, changed in place
+        fields: (tag, text) pairs of the optional fields, as read into :attr:`TrackData.pointFields`
+
+    Returns:
+        point
+    """
+    for tag, text in fields:
+        attribute, fieldType = _POINT_FIELDS[tag]
+        setattr(point, attribute, fieldType(text) if fieldType is str else fieldType(text.strip()))
+    return point
+
+
+def PointFields(point: GPXTrackPoint) -> list:
+    """(tag, text) pairs of the optional fields of a gpxpy track point, the inverse of :func:`SetPointFields`"""
+    return [(tag, str(getattr(point, attribute))) for tag, (attribute, _) in _POINT_FIELDS.items()
+            if getattr(point, attribute) is not None]
+
+
+def _TrackPointFromElement(element) -> GPXTrackPoint:
+    """Track point with the fields gpxpy reads, except time and extensions, which the summary drops
+
+    Like gpxpy, links of track points are not read.
+    """
+    lat, lon, ele, _, _, fields = _ReadPointElement(element)
+    return SetPointFields(GPXTrackPoint(latitude=lat, longitude=lon, elevation=ele), fields)
+
+
+def _ParseSeconds(timeText: str | None) -> float:
+    if not timeText:
+        return math.nan
+    try:
+        time = datetime.datetime.fromisoformat(timeText.strip())
+    except ValueError:
+        time = parse_time(timeText.strip())
+        if time is None:
+            return math.nan
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=datetime.timezone.utc)
+    return time.timestamp()
+
+
+def _ReadPointElement(element) -> tuple:
+    """Coordinates, elevation, name, time text and the (tag, text) pairs of the optional fields of a point"""
+    elevation = None
+    name = None
+    timeText = None
+    fields = []
+    for child in element:
+        tag = _LocalName(child.tag)
+        if tag == 'ele' and child.text:
+            elevation = float(child.text)
+        elif tag == 'time':
+            timeText = child.text
+        elif tag in _POINT_FIELDS and child.text:
+            if tag == 'name':
+                name = child.text
+            fields.append((tag, child.text))
+    return float(element.get('lat')), float(element.get('lon')), elevation, name, timeText, fields
+
+
+def _ReadTrackDataFromStream(gpxStream) -> 'TrackData':
+    # numpy is only loaded when track data is needed, reading first points does without
+    from gpxpert.TrackData import TrackDataBuilder
+
+    builder = TrackDataBuilder()
+    path = []
+    trackName = None
+    trackDescription = None
+    root = None
+    for event, element in ET.iterparse(gpxStream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            path.append(_LocalName(element.tag))
+            continue
+
+        tag = path.pop()
+        if len(path) == 1:
+            if tag == 'wpt':
+                lat, lon, ele, name, _, _ = _ReadPointElement(element)
+                builder.AddWaypoint(lat, lon, ele, name)
+            elif tag == 'trk':
+                builder.EndTrack(trackName, trackDescription)
+                trackName = trackDescription = None
+            root.clear()
+        elif path[1:] == ['trk']:
+            if tag == 'name':
+                trackName = element.text
+            elif tag == 'desc':
+                trackDescription = element.text
+            elif tag == 'trkseg':
+                builder.EndSegment()
+                element.clear()
+        elif path[1:] == ['trk', 'trkseg'] and tag == 'trkpt':
+            lat, lon, ele, _, timeText, fields = _ReadPointElement(element)
+            builder.AddPoint(lat, lon, ele, _ParseSeconds(timeText), fields)
+            element.clear()
+    return builder.Build()
+
+
+def ReadTrackData(gpxSource) -> 'TrackData':
+    """Read waypoints and tracks of a gpx document into columnar arrays
+
+    The document is parsed incrementally and no gpxpy objects are created.
+
+    Args:
+        gpxSource: gpx file name or binary file object
+
+    Raises:
+        xml.etree.ElementTree.ParseError: if the document is malformed
+        ValueError: if a point has invalid coordinates
+    """
+    if isinstance(gpxSource, str):
+        with open(gpxSource, 'rb') as gpxStream:
+            return _ReadTrackDataFromStream(gpxStream)
+    return _ReadTrackDataFromStream(gpxSource)
+
+
+def ReadFirstTrackPoint(gpxSource) -> GPXTrackPoint | None:
+    """Read the start point of the first track without building the whole gpx object tree
+
+    The document is parsed incrementally and parsing stops as soon as the first point of the
+    first segment of the first track has been read. The point keeps its optional fields like
+    description and symbol, but not its time and extensions. A track name after the segments, which
+    is invalid gpx, is not read.
+
+    Args:
+        gpxSource: gpx file name or binary file object
+
+    Returns:
+        first track point, named after its track, or None if there is none
+
+    Raises:
+        xml.etree.ElementTree.ParseError: if the document is malformed before the first point
+        ValueError: if the first point has invalid coordinates
+    """
+    if isinstance(gpxSource, str):
+        with open(gpxSource, 'rb') as gpxStream:
+            return _ReadFirstTrackPointFromStream(gpxStream)
+    return _ReadFirstTrackPointFromStream(gpxSource)
@@ -0,0 +1,263 @@
+import datetime
+import gzip
+import itertools
+import os
+import shutil
+import tempfile
+from typing import TYPE_CHECKING
+from xml.sax.saxutils import escape
+
+import gpxpy
+from gpxpy.gpx import GPXTrack, GPXTrackPoint, GPXTrackSegment, GPXWaypoint
+from gpxpy.gpxfield import format_time, gpx_fields_to_xml
+from gpxpy.utils import make_str
+
+from gpxpert.GpxReader import SetPointFields
+
+if TYPE_CHECKING:
+    from gpxpert.TrackData import TrackData
+
+_VERSION = '1.1'
+_UTC = datetime.timezone.utc
+_CLOSING_TAG = '\n</gpx>'
+# namespace of the extensions written by GPXpert, declared with prefix gpxpert
+GPXPERT_NAMESPACE = 'https://github.com/pamagister/GPXpert'
+
+
+def _ElementXml(element, tag: str, indent: str) -> str:
+    return gpx_fields_to_xml(element, tag, _VERSION, indent=indent)
+
+
+def WaypointXml(waypoint: GPXWaypoint) -> str:
+    """Waypoint formatted as written by :meth:`GpxWriter.WriteWaypoint`"""
+    return _ElementXml(waypoint, 'wpt', '  ')
+
+
+def SimpleWaypointXml(latitude: float, longitude: float, elevation: float | None = None,
+                      name: str | None = None) -> str:
+    """Same as :func:`WaypointXml` of a waypoint with only these fields, without creating a GPXWaypoint"""
+    eleTag = '' if elevation is None else f'\n    <ele>{make_str(elevation)}</ele>'
+    nameTag = '' if name is None else f'\n    <name>{escape(name)}</name>'
+    # like gpxpy, which stores 'latitude or 0'
+    return f'\n  <wpt lat="{make_str(latitude or 0)}" lon="{make_str(longitude or 0)}">{eleTag}{nameTag}\n  </wpt>'
+
+
+def TrackXml(track: GPXTrack) -> str:
+    """Track formatted as written by :meth:`GpxWriter.WriteTrack`"""
+    return _ElementXml(track, 'trk', '  ')
+
+
+def _NumberStrings(values) -> list[str]:
+    """make_str of each value of an array, the shortest repr unless it would need an exponent"""
+    strings = list(map(str, values.tolist()))
+    if values.dtype.kind == 'f' and (((values != 0) & (abs(values) < 1e-4)) | (abs(values) >= 1e16)).any():
+        strings = [make_str(value) for value in values.tolist()]
+    return strings
+
+
+def _CoordinateStrings(values) -> list[str]:
+    """Like :func:`_NumberStrings`, zero is written as 0 like gpxpy does for coordinates"""
+    strings = _NumberStrings(values)
+    if (values == 0).any():
+        strings = ['0' if value == 0 else string for value, string in zip(values.tolist(), strings)]
+    return strings
+
+
+def _Missing(elevation):
+    from gpxpert.TrackData import MISSING_ELEVATION
+
+    return elevation == MISSING_ELEVATION if elevation.dtype.kind in 'iu' else elevation != elevation
+
+
+def _ElevationTags(elevation) -> list[str]:
+    return ['' if missing else f'\n        <ele>{ele}</ele>'
+            for missing, ele in zip(_Missing(elevation).tolist(), _NumberStrings(elevation))]
+
+
+def _TimeTags(time) -> list[str]:
+    known = time == time
+    if not known.any():
+        return [''] * len(time)
+    import numpy as np
+
+    # whole seconds are formatted at once, others like gpxpy
+    wholeSeconds = known & (time == np.floor(time))
+    strings = np.datetime_as_string(np.where(wholeSeconds, time, 0).astype(np.int64).astype('datetime64[s]'))
+    tags = []
+    for whole, isKnown, seconds, string in zip(wholeSeconds.tolist(), known.tolist(), time.tolist(), strings.tolist()):
+        if whole:
+            tags.append(f'\n        <time>{string}Z</time>')
+        elif isKnown:
+            tags.append(f'\n        <time>{format_time(datetime.datetime.fromtimestamp(seconds, _UTC))}</time>')
+        else:
+            tags.append('')
+    return tags
+
+
+def LevelExtensionXml(level: int) -> str:
+    """Extension of a track point with its level of detail, formatted like gpxpy's to_xml
+
+    The gpx document must declare GPXPERT_NAMESPACE with the prefix gpxpert.
+    """
+    return f'\n        <extensions>\n          <gpxpert:lod>{level}</gpxpert:lod>\n        </extensions>'
+
+
+def _PointFieldsXml(fields: list) -> str:
+    """Optional fields of a track point, formatted and ordered by gpxpy like in :func:`TrackXml`"""
+    pointXml = _ElementXml(SetPointFields(GPXTrackPoint(0, 0), fields), 'trkpt', '      ')
+    # the fields between the start and end tag of the point
+    return pointXml[pointXml.index('>') + 1:pointXml.rindex('\n')]
+
+
+def _TrackPointsXml(trackData: 'TrackData') -> tuple[str, list[int]]:
+    """Track points formatted like in :func:`TrackXml` and the offsets of each point in the text
+
+    The level of detail of each point is written as extension if the track data has levels.
+    Points with optional fields are rare, track data with such points is formatted point by point.
+    """
+    from gpxpert import FixedPrecisionXml
+
+    if not len(trackData.fieldIndices) and FixedPrecisionXml.Supported(
+            trackData.latitude, trackData.longitude, trackData.elevation, trackData.time):
+        text, offsets = FixedPrecisionXml.TrackPointsXml(trackData.latitude, trackData.longitude, trackData.elevation,
+                                                         trackData.levels, trackData.time)
+        return text, offsets.tolist()
+    extensions = [''] * trackData.pointCount if trackData.levels is None else \
+        list(map(LevelExtensionXml, trackData.levels.tolist()))
+    fields = [''] * trackData.pointCount
+    for i, pointFields in zip(trackData.fieldIndices.tolist(), trackData.pointFields):
+        fields[i] = _PointFieldsXml(pointFields)
+    points = [f'\n      <trkpt lat="{lat}" lon="{lon}">{ele}{time}{pointFields}{extension}\n      </trkpt>'
+              for lat, lon, ele, time, pointFields, extension in zip(
+                  _CoordinateStrings(trackData.latitude), _CoordinateStrings(trackData.longitude),
+                  _ElevationTags(trackData.elevation), _TimeTags(trackData.time), fields, extensions)]
+    return ''.join(points), [0] + list(itertools.accumulate(map(len, points)))
+
+
+def TrackDataXml(trackData: 'TrackData') -> tuple[str, str]:
+    """Waypoints and tracks of track data formatted like the gpx of its ToGpx written by :class:`GpxWriter`
+
+    Numbers are formatted from the arrays directly, without creating gpxpy objects. Compressed
+    tracks, with rounded coordinates and elevations, are formatted with array operations of
+    :mod:`gpxpert.FixedPrecisionXml`.
+
+    Returns:
+        waypoints formatted like :func:`WaypointXml` and tracks formatted like :func:`TrackXml`
+    """
+    waypointElevation = [None if missing else ele for missing, ele in zip(
+        _Missing(trackData.waypointElevation).tolist(), trackData.waypointElevation.tolist())]
+    waypoints = ''.join(SimpleWaypointXml(*waypoint) for waypoint in zip(
+        trackData.waypointLatitude.tolist(), trackData.waypointLongitude.tolist(), waypointElevation,
+        trackData.waypointNames))
+    points, offsets = _TrackPointsXml(trackData)
+    tracks = []
+    for trackIndex, (name, description) in enumerate(zip(trackData.trackNames, trackData.trackDescriptions)):
+        tracks.append(TrackXml(GPXTrack(name, description)).removesuffix('\n  </trk>'))
+        for segment in trackData.TrackSegments(trackIndex):
+            tracks += ['\n    <trkseg>', points[offsets[segment.start]:offsets[segment.stop]], '\n    </trkseg>']
+        tracks.append('\n  </trk>')
+    return waypoints, ''.join(tracks)
+
+
+class GpxWriter:
+    """Writes a gpx document incrementally, formatted exactly like gpxpy's ``to_xml``
+
+    Waypoints are written to the file as they come. Since gpx requires all waypoints before the
+    tracks, track segments go to a temporary file first and are appended on :meth:`Close`, so
+    memory use does not depend on the size of the document. File names ending with .gz are written
+    gzip compressed.
+
+    Usage::
+
+        with GpxWriter('summary.gpx', name='summary') as writer:
+            writer.WriteWaypoint(waypoint)
+            writer.WriteTrack(track)
+    """
+
+    def __init__(self, fileName: str, name: str | None = None, namespaces: dict | None = None):
+        """
+        Args:
+            fileName: gpx file to write, gzip compressed if it ends with .gz
+            name: name of the gpx document
+            namespaces: prefix and namespace of the extensions used in the document,
+                e.g. {'gpxpert': GPXPERT_NAMESPACE} for levels of detail
+        """
+        self.fileName = fileName
+        if fileName.endswith('.gz'):
+            self._file = gzip.open(fileName, 'wt', encoding='utf-8')
+        else:
+            self._file = open(fileName, 'w', encoding='utf-8')
+        self._tracks = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self._trackOpen = False
+
+        header = gpxpy.gpx.GPX()
+        header.name = name
+        header.nsmap.update(namespaces or {})
+        self._file.write(header.to_xml(_VERSION).removesuffix(_CLOSING_TAG))
+
+    def __enter__(self) -> 'GpxWriter':
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.Close()
+        else:
+            self._Abort()
+
+    def WriteWaypoint(self, waypoint: GPXWaypoint):
+        self._file.write(WaypointXml(waypoint))
+
+    def WriteWaypointXml(self, waypointXml: str):
+        """Write waypoints formatted with :func:`WaypointXml`"""
+        self._file.write(waypointXml)
+
+    def WriteTrack(self, track: GPXTrack):
+        """Write a track with all its segments"""
+        self.StartTrack(track)
+        for segment in track.segments:
+            self.WriteSegment(segment)
+        self.EndTrack()
+
+    def WriteTrackData(self, trackData: 'TrackData'):
+        """Write the waypoints and tracks of track data, formatted with :func:`TrackDataXml`"""
+        waypointXml, trackXml = TrackDataXml(trackData)
+        self.WriteWaypointXml(waypointXml)
+        self.WriteTrackXml(trackXml)
+
+    def WriteTrackXml(self, trackXml: str):
+        """Write tracks formatted with :func:`TrackXml`"""
+        self._tracks.write(trackXml)
+
+    def StartTrack(self, track: GPXTrack):
+        """Write the name and other properties of a track, its segments follow with :meth:`WriteSegment`"""
+        segments = track.segments
+        track.segments = []
+        try:
+            self._tracks.write(_ElementXml(track, 'trk', '  ').removesuffix('\n  </trk>'))
+        finally:
+            track.segments = segments
+        self._trackOpen = True
+
+    def WriteSegment(self, segment: GPXTrackSegment):
+        self._tracks.write(_ElementXml(segment, 'trkseg', '    '))
+
+    def EndTrack(self):
+        self._tracks.write('\n  </trk>')
+        self._trackOpen = False
+
+    def Close(self):
+        """Append the tracks, finish the document and close the file"""
+        if self._trackOpen:
+            self.EndTrack()
+        self._tracks.seek(0)
+        shutil.copyfileobj(self._tracks, self._file)
+        self._file.write(_CLOSING_TAG)
+        self._tracks.close()
+        self._file.close()
+
+    def _Abort(self):
+        """Close and remove the incomplete file"""
+        self._tracks.close()
+        self._file.close()
+        if os.path.exists(self.fileName):
+            os.remove(self.fileName)
@@ -0,0 +1,90 @@
+import collections
+import logging
+import math
+import os
+
+import numpy as np
+
+from gpxpert.Profiler import Count
+
+_logger = logging.getLogger(__name__)
+
+
+def _TileName(latitude: float, longitude: float) -> str:
+    """Name of the SRTM tile containing a point, e.g. N46E008"""
+    tileLatitude = math.floor(latitude)
+    tileLongitude = math.floor(longitude)
+    return f'{"N" if tileLatitude >= 0 else "S"}{abs(tileLatitude):02d}' \
+           f'{"E" if tileLongitude >= 0 else "W"}{abs(tileLongitude):03d}'
+
+
+class HgtTile:
+    """Memory-mapped SRTM height grid, compatible with what :class:`ElevationLookup` reads from srtm.py tiles"""
+
+    def __init__(self, fileName: str, latitude: int, longitude: int):
+        """
+        Args:
+            fileName: .hgt file, a square grid of big-endian int16 heights
+            latitude: latitude of the south edge of the tile
+            longitude: longitude of the west edge of the tile
+
+        Raises:
+            ValueError: if the file is no square grid
+        """
+        self.file_name = fileName
+        self.latitude = latitude
+        self.longitude = longitude
+        self.data = np.memmap(fileName, dtype='>i2', mode='r')
+        self.square_side = math.isqrt(len(self.data))
+        if self.square_side < 2 or self.square_side * self.square_side != len(self.data):
+            raise ValueError(f'Invalid size {os.path.getsize(fileName)} of elevation tile {fileName}')
+
+
+class HgtTileStore:
+    """Offline elevation provider that memory-maps .hgt files from a local directory
+
+    Tiles are looked up as <directory>/N46E008.hgt and never downloaded, points without a tile have
+    no elevation. At most maxTiles tiles stay mapped, the least recently used are unmapped first.
+    Can be used wherever srtm.py's GeoElevationData is, see :class:`ElevationLookup`.
+    """
+
+    def __init__(self, directory: str, maxTiles: int = 16):
+        """
+        Args:
+            directory: directory of the .hgt files
+            maxTiles: maximum number of tiles mapped at the same time
+        """
+        self.directory = directory
+        self.maxTiles = max(1, maxTiles)
+        self.hits: int = 0
+        self.misses: int = 0
+        self._tiles = collections.OrderedDict()
+
+    def get_file(self, latitude: float, longitude: float) -> HgtTile | None:
+        """Tile containing a point, or None if the directory has none
+
+        Raises:
+            ValueError: if the tile file is invalid
+        """
+        tileName = _TileName(latitude, longitude)
+        if tileName in self._tiles:
+            self.hits += 1
+            Count('tileCacheHits')
+            self._tiles.move_to_end(tileName)
+            return self._tiles[tileName]
+
+        self.misses += 1
+        Count('tileCacheMisses')
+        fileName = os.path.join(self.directory, tileName + '.hgt')
+        if not os.path.isfile(fileName):
+            _logger.debug(f'no elevation tile {fileName}')
+            return None
+        tile = HgtTile(fileName, math.floor(latitude), math.floor(longitude))
+        self._tiles[tileName] = tile
+        while len(self._tiles) > self.maxTiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def MappedTiles(self) -> list[str]:
+        """Names of the currently mapped tiles, least recently used first"""
+        return list(self._tiles)
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+
+from gpxpert.JobGraph import ContentHash
+
+_logger = logging.getLogger(__name__)
+
+_VERSION = 1
+
+
+class IncrementalManifest:
+    """Outputs derived from each gpx file of an output, stored next to the output for incremental reruns
+
+    For every file the manifest records a fingerprint of size, modification time and content hash,
+    together with the formatted gpx of what the file contributes to each output. A file whose
+    fingerprint is unchanged does not need to be read again. Touched but unmodified files are
+    recognized by their content hash. Derived outputs are dropped when the settings they were made
+    with change.
+    """
+
+    def __init__(self, fileName: str, settings: dict, contentHashes: dict | None = None):
+        """
+        Args:
+            fileName: manifest file, usually the output file name with the extension .manifest.json
+            settings: settings the derived outputs depend on, e.g. the simplification mode
+            contentHashes: content hashes of files already read, by file name, the hashes computed
+                here are added, so each file is hashed at most once
+        """
+        self.fileName = fileName
+        self.settings = settings
+        self.contentHashes = contentHashes if contentHashes is not None else {}
+        self.entries: dict = {}
+        self.sources: dict = {}
+        self._baseDir = os.path.dirname(os.path.abspath(fileName))
+        self._Load()
+
+    def _Load(self):
+        try:
+            with open(self.fileName, 'r', encoding='utf-8') as manifestFile:
+                manifest = json.load(manifestFile)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            _logger.warning(f'Ignoring unreadable manifest {self.fileName}: {e}')
+            return
+        if manifest.get('version') != _VERSION:
+            return
+        self.entries = manifest['entries']
+        self.sources = manifest['sources']
+        if manifest['settings'] != self.settings:
+            _logger.info(f'Settings changed since {self.fileName} was written, derived outputs are rebuilt')
+            self.sources = {}
+            for entry in self.entries.values():
+                entry['outputs'] = {}
+
+    def _Key(self, gpxFileName: str) -> str:
+        return os.path.relpath(os.path.abspath(gpxFileName), self._baseDir)
+
+    def _ContentHash(self, gpxFileName: str) -> str:
+        if gpxFileName not in self.contentHashes:
+            self.contentHashes[gpxFileName] = ContentHash(gpxFileName)
+        return self.contentHashes[gpxFileName]
+
+    def Get(self, gpxFileName: str, output: str) -> dict | None:
+        """Recorded output of a file, or None if the file is new, modified or the output was not recorded"""
+        entry = self.entries.get(self._Key(gpxFileName))
+        if entry is None or output not in entry['outputs']:
+            return None
+        try:
+            stat = os.stat(gpxFileName)
+        except OSError:
+            return None
+        if (entry['size'], entry['mtime']) == (stat.st_size, stat.st_mtime_ns):
+            return entry['outputs'][output]
+        if entry['size'] != stat.st_size or entry['hash'] != self._ContentHash(gpxFileName):
+            return None
+        entry['mtime'] = stat.st_mtime_ns
+        return entry['outputs'][output]
+
+    def Set(self, gpxFileName: str, output: str, value: dict):
+        """Record the output of a file, outputs recorded for an older version of the file are dropped"""
+        key = self._Key(gpxFileName)
+        stat = os.stat(gpxFileName)
+        entry = self.entries.get(key)
+        if entry is None or (entry['size'], entry['mtime']) != (stat.st_size, stat.st_mtime_ns):
+            entry = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': self._ContentHash(gpxFileName),
+                     'outputs': {}}
+            self.entries[key] = entry
+        entry['outputs'][output] = value
+
+    def Unchanged(self, output: str, gpxFileNames: list) -> bool:
+        """True if the output was last written from the same files in the same order"""
+        return self.sources.get(output) == [self._Key(gpxFileName) for gpxFileName in gpxFileNames]
+
+    def Save(self, output: str, gpxFileNames: list):
+        """Record the files of an output and write the manifest, entries of files no longer used are dropped"""
+        keys = [self._Key(gpxFileName) for gpxFileName in gpxFileNames]
+        self.sources[output] = keys
+        keys = set(keys)
+        self.entries = {key: entry for key, entry in self.entries.items() if key in keys}
+        manifest = {'version': _VERSION, 'settings': self.settings, 'sources': self.sources, 'entries': self.entries}
+        tempName = self.fileName + '.tmp'
+        with open(tempName, 'w', encoding='utf-8') as manifestFile:
+            json.dump(manifest, manifestFile)
+        os.replace(tempName, self.fileName)
@@ -0,0 +1,214 @@
+import collections
+import functools
+import hashlib
+import itertools
+import logging
+import os
+
+from gpxpert.Profiler import MergeProfile, ProfiledCall, ProfilingEnabled
+from gpxpert.ZipMember import OpenSource, ZipMember
+
+_logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1 << 20
+# tasks submitted to the worker pool ahead of the consumer, per worker
+_TASKS_PER_WORKER = 4
+
+
+def ContentHash(source: str | ZipMember) -> str:
+    """SHA-1 of the content of a file or an archive member
+
+    Raises:
+        OSError: if the source cannot be read
+    """
+    digest = hashlib.sha1()
+    with OpenSource(source) as stream:
+        for chunk in iter(functools.partial(stream.read, _CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def BoundedMap(function, calls: list, jobs: int = 1):
+    """Yield function(*arguments) for each tuple of arguments in calls, in order
+
+    With more than one job the calls run on a pool of worker processes and only a few calls per
+    worker are submitted ahead of the consumer, so results do not pile up in memory. Calls are
+    profiled in the workers if profiling is enabled.
+
+    Args:
+        function: picklable function
+        calls: tuples of arguments
+        jobs: number of worker processes
+    """
+    if jobs <= 1 or len(calls) <= 1:
+        for arguments in calls:
+            yield function(*arguments)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(jobs, len(calls))
+    # workers profile each call and send the profile back with the result
+    profiling = ProfilingEnabled()
+    if profiling:
+        function = functools.partial(ProfiledCall, function)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+
+        def NextResult():
+            result = pending.popleft().result()
+            if not profiling:
+                return result
+            result, profile = result
+            MergeProfile(profile)
+            return result
+
+        try:
+            for arguments in calls:
+                pending.append(executor.submit(function, *arguments))
+                if len(pending) >= _TASKS_PER_WORKER * workers:
+                    yield NextResult()
+            while pending:
+                yield NextResult()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _SourceIdentity(source: str | ZipMember):
+    """Resolved path of a file, or of the archive chain and name of an archive member"""
+    if isinstance(source, ZipMember):
+        return _SourceIdentity(source.archive), source.name
+    return os.path.realpath(source)
+
+
+def _SourceSize(source: str | ZipMember) -> int | None:
+    try:
+        return source.Size() if isinstance(source, ZipMember) else os.path.getsize(source)
+    except Exception as e:
+        # unreadable sources are not deduplicated, their task reports the error
+        _logger.debug(f'Cannot get the size of {source}: {e}')
+        return None
+
+
+def _TaskKeys(sources: list, contentHashes: dict) -> dict:
+    """Task key of each distinct source, equal for sources with the same content
+
+    Sources are compared by resolved path, then by size. Only sources whose size equals that of
+    another source are hashed, hashes already in contentHashes are reused and new ones added.
+    """
+    identities = {source: _SourceIdentity(source) for source in sources}
+    sizes = {identity: _SourceSize(source) for source, identity in identities.items()}
+    sizeCounts = collections.Counter(size for size in sizes.values() if size is not None)
+    hashes = {}
+    keys = {}
+    for source, identity in identities.items():
+        if sizeCounts[sizes[identity]] > 1 and identity not in hashes:
+            try:
+                if source not in contentHashes:
+                    contentHashes[source] = ContentHash(source)
+                hashes[identity] = contentHashes[source]
+            except Exception as e:
+                _logger.debug(f'Cannot hash {source}: {e}')
+                hashes[identity] = None
+        keys[source] = ('content', hashes[identity]) if hashes.get(identity) else ('source', identity)
+    return keys
+
+
+class OutputGroup:
+    """Gpx sources written to the same output files, e.g. the gpx files of a directory or an archive"""
+
+    def __init__(self, destinationDir: str, saveFileName: str, sources: list | None = None, outputs: tuple = ()):
+        """
+        Args:
+            destinationDir: directory of the output files
+            saveFileName: name of the output files without extension
+            sources: gpx file names or ZipMember objects
+            outputs: kinds of output written for the group, passed on to the task function
+        """
+        self.destinationDir = destinationDir
+        self.saveFileName = saveFileName
+        self.sources: list = sources if sources is not None else []
+        self.outputs: tuple = outputs
+
+
+class JobGraph:
+    """Flat graph of the tasks of several output groups, identical sources are processed only once
+
+    Sources are deduplicated by content, so a gpx file that is contained in several archives or
+    stored twice is parsed once. Sources are compared by path and size first, only sources of equal
+    size are hashed. Each unique source becomes one task that computes all outputs any of its
+    groups needs. Tasks run on a bounded pool of worker processes, see :func:`BoundedMap`, so memory
+    use does not grow with the number of sources.
+
+    Usage::
+
+        for group, results in JobGraph(groups).Run(function, jobs=4):
+            for source, result in results:
+                ...
+    """
+
+    def __init__(self, groups: list[OutputGroup], contentHashes: dict | None = None):
+        """
+        Args:
+            groups: output groups in the order they are written
+            contentHashes: content hashes of sources already read, see :func:`ContentHash`, the hashes
+                computed here are added
+        """
+        self.groups = groups
+        self.sources: list = []
+        self.outputs: list[set] = []
+        self.contentHashes = contentHashes if contentHashes is not None else {}
+        self._groupTasks: list[list[int]] = []
+        keys = _TaskKeys([source for group in groups for source in group.sources], self.contentHashes)
+        taskByKey = {}
+        for group in groups:
+            tasks = []
+            for source in group.sources:
+                key = keys[source]
+                if key not in taskByKey:
+                    taskByKey[key] = len(self.sources)
+                    self.sources.append(source)
+                    self.outputs.append(set())
+                task = taskByKey[key]
+                self.outputs[task].update(group.outputs)
+                tasks.append(task)
+            self._groupTasks.append(tasks)
+
+    def Run(self, function, jobs: int = 1):
+        """Call function(source, outputs) once per unique source, in a process pool if jobs > 1
+
+        Args:
+            function: picklable function, outputs is the sorted tuple of the outputs of all groups of the source
+            jobs: number of worker processes
+
+        Yields:
+            each group with an iterator of (source, result) pairs in input order, the iterator must be
+            consumed before the next group is requested
+        """
+        results = self._Results(function, jobs)
+        useCount = collections.Counter(itertools.chain.from_iterable(self._groupTasks))
+        retained = {}
+
+        def GroupResults(group: OutputGroup, tasks: list[int]):
+            for source, task in zip(group.sources, tasks):
+                # tasks are numbered in order of first use, so a task not seen before is the next result
+                if task not in retained:
+                    retained[task] = next(results)
+                result = retained[task]
+                useCount[task] -= 1
+                if not useCount[task]:
+                    del retained[task]
+                yield source, result
+
+        try:
+            for group, tasks in zip(self.groups, self._groupTasks):
+                groupResults = GroupResults(group, tasks)
+                yield group, groupResults
+                for _ in groupResults:
+                    pass
+        finally:
+            results.close()
+
+    def _Results(self, function, jobs: int):
+        calls = [(source, tuple(sorted(outputs))) for source, outputs in zip(self.sources, self.outputs)]
+        return BoundedMap(function, calls, jobs)
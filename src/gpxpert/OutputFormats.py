@@ -0,0 +1,19 @@
+"""Names and file extensions of the formats of the compressed tracks, importable without numpy"""
+
+GPX = 'gpx'
+BINARY = 'binary'
+GEOJSON = 'geojson'
+POLYLINE = 'polyline'
+OUTPUT_FORMATS = [GPX, BINARY, GEOJSON, POLYLINE]
+EXTENSIONS = {GPX: '.gpx', BINARY: '.gpxb', GEOJSON: '.geojson', POLYLINE: '.polyline.json'}
+
+# levels of detail are written to one file per level, or to one gpx file with the level of each point
+LOD_FILES = 'files'
+LOD_TAGS = 'tags'
+LOD_OUTPUTS = [LOD_FILES, LOD_TAGS]
+
+# per-track statistics of the summary go to the description of its waypoints or to a sidecar file
+STATISTICS_DESCRIPTION = 'description'
+STATISTICS_CSV = 'csv'
+STATISTICS_JSON = 'json'
+STATISTICS_OUTPUTS = [STATISTICS_DESCRIPTION, STATISTICS_CSV, STATISTICS_JSON]
@@ -0,0 +1,117 @@
+# Per-stage timers and counters of the converters. Profiling is off by default, then Timer returns a
+# shared object whose enter and exit do nothing and Count returns after one check, so the
+# instrumentation costs nothing measurable. Stages are timed per file or per batch, never per point.
+import time
+
+_enabled = False
+_startTime = 0.
+# stage name -> [calls, seconds]
+_stages: dict = {}
+_counters: dict = {}
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        stage = _stages.get(self.name)
+        if stage is None:
+            stage = _stages[self.name] = [0, 0.]
+        stage[0] += 1
+        stage[1] += time.perf_counter() - self.start
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def EnableProfiling():
+    """Start collecting timers and counters, previously collected data is dropped"""
+    global _enabled
+    ResetProfile()
+    _enabled = True
+
+
+def DisableProfiling():
+    global _enabled
+    _enabled = False
+
+
+def ProfilingEnabled() -> bool:
+    return _enabled
+
+
+def ResetProfile():
+    global _startTime
+    _stages.clear()
+    _counters.clear()
+    _startTime = time.perf_counter()
+
+
+def Timer(name: str):
+    """Context manager adding the time spent in a stage to its total
+
+    Usage::
+
+        with Timer('parse'):
+            ...
+    """
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def Count(name: str, value: int = 1):
+    """Add value to a counter"""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def ProfileReport() -> dict:
+    """Calls and seconds of each stage and the counters, as collected since profiling was enabled
+
+    Stages may be nested, e.g. parse includes sanitize, so their seconds do not add up to the wall time.
+    Stages run in worker processes add up the time of all workers.
+    """
+    return {
+        'wallSeconds': time.perf_counter() - _startTime,
+        'stages': {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in sorted(_stages.items())},
+        'counters': dict(sorted(_counters.items())),
+    }
+
+
+def ProfiledCall(function, *args) -> tuple:
+    """Call function with profiling enabled, e.g. in a worker process
+
+    Returns:
+        result of function and the stages and counters of the call, to be passed to :func:`MergeProfile`
+    """
+    EnableProfiling()
+    result = function(*args)
+    return result, (dict(_stages), dict(_counters))
+
+
+def MergeProfile(profile: tuple):
+    """Add the stages and counters returned by :func:`ProfiledCall` to the profile of this process"""
+    stages, counters = profile
+    for name, (calls, seconds) in stages.items():
+        stage = _stages.setdefault(name, [0, 0.])
+        stage[0] += calls
+        stage[1] += seconds
+    for name, value in counters.items():
+        Count(name, value)
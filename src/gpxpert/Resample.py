@@ -0,0 +1,100 @@
+"""Resampling of track segments to points at a fixed time or distance interval
+
+All segments of a track data are resampled at once. Positions along the segments are mapped to one
+increasing axis, with a gap between segments, so the samples of all segments are interpolated with
+a single np.interp per column.
+"""
+import numpy as np
+
+from gpxpert.Simplify import Distance3d
+from gpxpert.SimplifyModes import RESAMPLE_MODES, RESAMPLE_TIME
+
+
+def _SegmentMaximum(values: np.ndarray, pointSegment: np.ndarray, segmentCount: int) -> np.ndarray:
+    """Maximum of the values of each segment, 0 for segments without points"""
+    maximum = np.zeros(segmentCount)
+    if len(values):
+        starts = np.flatnonzero(np.concatenate(([True], pointSegment[1:] != pointSegment[:-1])))
+        maximum[pointSegment[starts]] = np.maximum.reduceat(values, starts)
+    return maximum
+
+
+def _Positions(mode: str, segmentOffsets: np.ndarray, pointSegment: np.ndarray, latitude: np.ndarray,
+               longitude: np.ndarray, time: np.ndarray) -> np.ndarray:
+    """Seconds or meters of each point from the first point of its segment"""
+    firstPoints = segmentOffsets[pointSegment]
+    if mode == RESAMPLE_TIME:
+        return time - time[firstPoints]
+    steps = Distance3d(latitude[1:], longitude[1:], np.nan, latitude[:-1], longitude[:-1], np.nan)
+    distance = np.concatenate(([0.], np.cumsum(steps)))
+    return distance - distance[firstPoints]
+
+
+def _Interpolate(samples: np.ndarray, sampleSegment: np.ndarray, axis: np.ndarray, pointSegment: np.ndarray,
+                 values: np.ndarray, segmentCount: int) -> np.ndarray:
+    """Values at the samples, interpolated between the known (not NaN) values of their segment
+
+    Samples before the first or after the last known value of a segment get that value, samples of
+    segments without known values are NaN.
+    """
+    known = ~np.isnan(values)
+    result = np.full(len(samples), np.nan)
+    if not known.any():
+        return result
+    knownAxis, knownSegment = axis[known], pointSegment[known]
+    starts = np.flatnonzero(np.concatenate(([True], knownSegment[1:] != knownSegment[:-1])))
+    stops = np.concatenate((starts[1:], [len(knownAxis)])) - 1
+    first, last = np.full(segmentCount, np.nan), np.full(segmentCount, np.nan)
+    first[knownSegment[starts]], last[knownSegment[starts]] = knownAxis[starts], knownAxis[stops]
+    # clipping to the known values of the segment keeps neighbor segments out of the interpolation
+    clipped = np.clip(samples, first[sampleSegment], last[sampleSegment])
+    inKnown = ~np.isnan(clipped)
+    result[inKnown] = np.interp(clipped[inKnown], knownAxis, values[known])
+    return result
+
+
+def Resample(mode: str, segmentOffsets: np.ndarray, latitude: np.ndarray, longitude: np.ndarray,
+             elevation: np.ndarray, time: np.ndarray, interval: float) -> tuple:
+    """Resample segments to points at a fixed interval of time or distance along the segment
+
+    Each segment starts with its first point, is sampled every interval and ends with its last
+    point. Coordinates, elevations and times are interpolated linearly, missing (NaN) elevations and
+    times are interpolated from the known ones of the segment. Times going backwards are treated as
+    standing still.
+
+    Args:
+        mode: one of gpxpert.SimplifyModes.RESAMPLE_MODES, RESAMPLE_TIME needs the time of all points
+        segmentOffsets: index ranges of the points of the segments
+        latitude: latitudes of the points in degrees
+        longitude: longitudes of the points in degrees
+        elevation: elevations of the points in meters, NaN where unknown
+        time: times of the points in seconds, NaN where unknown
+        interval: seconds for RESAMPLE_TIME, meters for RESAMPLE_DISTANCE
+
+    Returns:
+        segment offsets, latitude, longitude, elevation and time of the samples
+
+    Raises:
+        ValueError: for an unknown mode or an interval that is not positive
+    """
+    if mode not in RESAMPLE_MODES:
+        raise ValueError(f'Unsupported resampling mode {mode}. Please use one of {", ".join(RESAMPLE_MODES)}')
+    if not interval > 0:
+        raise ValueError(f'Resampling needs a positive interval, not {interval}')
+    segmentCount = len(segmentOffsets) - 1
+    pointCounts = np.diff(segmentOffsets)
+    pointSegment = np.repeat(np.arange(segmentCount), pointCounts)
+    positions = _Positions(mode, segmentOffsets, pointSegment, latitude, longitude, time)
+    # segments are placed one after the other on the axis, at least 1 apart
+    spans = _SegmentMaximum(positions, pointSegment, segmentCount)
+    bases = np.concatenate(([0.], np.cumsum(spans + 1)[:-1]))
+    axis = np.maximum.accumulate(positions + bases[pointSegment]) if len(positions) else positions
+
+    intervalCount = np.floor(spans / interval).astype(np.int64)
+    sampleCounts = np.where(pointCounts > 0, intervalCount + 1 + (intervalCount * interval < spans), 0)
+    sampleOffsets = np.concatenate(([0], np.cumsum(sampleCounts))).astype(np.int64)
+    sampleSegment = np.repeat(np.arange(segmentCount), sampleCounts)
+    sampleIndex = np.arange(sampleOffsets[-1]) - sampleOffsets[:-1][sampleSegment]
+    samples = np.minimum(sampleIndex * interval, spans[sampleSegment]) + bases[sampleSegment]
+    return (sampleOffsets,) + tuple(_Interpolate(samples, sampleSegment, axis, pointSegment, values, segmentCount)
+                                    for values in [latitude, longitude, elevation, time])
@@ -0,0 +1,358 @@
+import math
+
+import numpy as np
+
+from gpxpert.SimplifyModes import DOUGLAS_PEUCKER, MIN_DISTANCE, SIMPLIFY_MODES, VISVALINGAM
+
+EARTH_RADIUS = 6378.137 * 1000
+ONE_DEGREE = (2 * math.pi * EARTH_RADIUS) / 360
+
+_MIN_WINDOW = 16
+_MAX_WINDOW = 1 << 16
+# share of the unlinked points a round of linking all points has to link, else the links still
+# missing are searched on demand
+_MIN_LINKED_SHARE = .05
+# relative difference of squared distances below which the exact distance is computed
+_SQUARED_TOLERANCE = 1e-9
+
+
+def HaversineDistance(latitude1, longitude1, latitude2, longitude2) -> np.ndarray:
+    """Great circle distances in meters between points, like gpxpy's haversine_distance"""
+    dLon = np.radians(longitude1 - longitude2)
+    lat1 = np.radians(latitude1)
+    lat2 = np.radians(latitude2)
+    dLat = lat1 - lat2
+    a = np.sin(dLat / 2) ** 2 + np.sin(dLon / 2) ** 2 * np.cos(lat1) * np.cos(lat2)
+    return EARTH_RADIUS * 2 * np.arcsin(np.sqrt(a))
+
+
+def Distance3d(latitude1, longitude1, elevation1,
+               latitude2: np.ndarray, longitude2: np.ndarray, elevation2: np.ndarray) -> np.ndarray:
+    """Pairwise distances in meters between points, computed like gpxpy's ``distance_3d``
+
+    The first point may be a scalar or an array. Close points use a flat earth approximation with
+    the cosine of the first latitude, points more than 0.2 degrees apart the haversine formula.
+    Elevation is taken into account where both elevations are known (not NaN), except for the
+    haversine formula.
+    """
+    x = latitude1 - latitude2
+    y = (longitude1 - longitude2) * np.cos(np.radians(latitude1))
+    distance2d = np.sqrt(x * x + y * y) * ONE_DEGREE
+    distant = (np.abs(x) > .2) | (np.abs(longitude1 - longitude2) > .2)
+    if distant.any():
+        latitude1, longitude1 = [np.broadcast_to(value, distant.shape)[distant] for value in [latitude1, longitude1]]
+        distance2d[distant] = HaversineDistance(latitude1, longitude1, latitude2[distant], longitude2[distant])
+
+    dh = elevation1 - elevation2
+    useElevation = ~np.isnan(dh) & (dh != 0) & ~distant
+    return np.where(useElevation, np.sqrt(distance2d ** 2 + dh ** 2), distance2d)
+
+
+def _PathLength(latitude: np.ndarray, longitude: np.ndarray, elevation: np.ndarray,
+                minDistance: float) -> tuple[np.ndarray, np.ndarray] | None:
+    """Cumulative path length along the points that bounds the distance of any two points from above
+
+    Returns:
+        path length and the forward filled elevation it is computed from, 0 without elevations,
+        or None if no safe bound exists, i.e. for invalid coordinates or if minDistance is so large
+        that points far enough apart for the haversine formula have to be compared
+    """
+    absoluteLatitude = np.abs(latitude)
+    if minDistance >= .2 * ONE_DEGREE * math.cos(math.radians(min(float(np.max(absoluteLatitude)), 89.))):
+        return None
+    # the largest cosine of all latitudes scales the longitude differences of all point pairs from above
+    cosMax = math.cos(math.radians(float(np.min(absoluteLatitude)))) * (1 + 1e-9)
+    stepLength = np.hypot(np.diff(latitude), np.diff(longitude) * cosMax) * ONE_DEGREE
+
+    # elevation differences are bounded by the variation of the forward filled elevation
+    known = ~np.isnan(elevation)
+    filled = np.zeros(len(elevation))
+    if known.any():
+        filled = elevation[np.maximum.accumulate(np.where(known, np.arange(len(elevation)), np.argmax(known)))]
+        stepLength += np.abs(np.diff(filled))
+    pathLength = np.concatenate(([0.], np.cumsum(stepLength)))
+    return (pathLength, filled) if np.isfinite(pathLength[-1]) else None
+
+
+def _SearchFarPoint(latitude: np.ndarray, longitude: np.ndarray, elevation: np.ndarray, minDistance: float,
+                    anchor: int, start: int, window: int = _MIN_WINDOW) -> int:
+    """First point from start on at least minDistance away from anchor, searched in growing windows"""
+    pointCount = len(latitude)
+    while start < pointCount:
+        stop = min(pointCount, start + window)
+        distance = Distance3d(latitude[anchor], longitude[anchor], elevation[anchor],
+                              latitude[start:stop], longitude[start:stop], elevation[start:stop])
+        farEnough = np.flatnonzero(distance >= minDistance)
+        if farEnough.size:
+            return start + int(farEnough[0])
+        start = stop
+        window = min(2 * window, _MAX_WINDOW)
+    return pointCount
+
+
+def _FarEnough(latitude: np.ndarray, longitude: np.ndarray, elevation: np.ndarray, cosLatitude: np.ndarray,
+               minDistance: float, anchors: np.ndarray, tested: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Whether the tested points are at least minDistance away from their anchors, and their 2d distances
+
+    Compares squared flat distances, which is cheaper than :func:`Distance3d`. Pairs close to
+    minDistance and pairs far enough apart for the haversine formula are compared with Distance3d,
+    so the result is the same.
+    """
+    x = latitude[anchors] - latitude[tested]
+    dLongitude = longitude[anchors] - longitude[tested]
+    y = dLongitude * cosLatitude[anchors]
+    dh = elevation[anchors] - elevation[tested]
+    # fmax drops the NaN of points without elevation
+    squared = (x * x + y * y) * (ONE_DEGREE * ONE_DEGREE) + np.fmax(dh * dh, 0)
+    squaredMin = minDistance * minDistance
+    farEnough = squared >= squaredMin
+    check = (np.abs(squared - squaredMin) <= _SQUARED_TOLERANCE * squaredMin) | (np.abs(x) > .2) | \
+        (np.abs(dLongitude) > .2)
+    if check.any():
+        checkAnchors, checkTested = anchors[check], tested[check]
+        farEnough[check] = Distance3d(latitude[checkAnchors], longitude[checkAnchors], elevation[checkAnchors],
+                                      latitude[checkTested], longitude[checkTested],
+                                      elevation[checkTested]) >= minDistance
+    return farEnough, np.sqrt(x * x + y * y) * ONE_DEGREE
+
+
+def MinDistanceIndices(latitude: np.ndarray, longitude: np.ndarray, elevation: np.ndarray,
+                       minDistance: float) -> np.ndarray:
+    """Indices of the points kept by a minimum distance reduction of one segment
+
+    Keeps the first point and then every point at least minDistance meters (3d) away from the
+    previously kept point, which gives the same result as gpxpy's ``reduce_points``.
+
+    Every point is linked to the first following point far enough away, for all points at once in
+    a few rounds. The cumulative path length bounds the distance of two points from above, so a
+    tested point at distance d is followed by at least minDistance - d of path before the next
+    candidate. The rounds stop once they link only few points, the kept points are then collected by
+    following the links from the first point and missing links are searched on demand.
+
+    On the one million points of benchmarks/bench_simplify.py this takes 0.5 to 0.75 seconds, about
+    half the time of Douglas-Peucker and a few times slower than Visvalingam. Tracks meandering
+    within minDistance, like a random walk with short steps, need more rounds and take up to about
+    1.5 seconds per million points.
+    """
+    pointCount = len(latitude)
+    if not pointCount:
+        return np.empty(0, dtype=np.int64)
+
+    candidate = np.arange(1, pointCount + 1)
+    bound = _PathLength(latitude, longitude, elevation, minDistance)
+    if bound is not None:
+        pathLength, filledElevation = bound
+        margin = 1e-15 * pointCount * (pathLength[-1] + minDistance)
+        candidate = np.maximum(candidate, np.searchsorted(pathLength, pathLength + (minDistance - margin)))
+
+    cosLatitude = np.cos(np.radians(latitude))
+    following = np.full(pointCount, -1, dtype=np.int64)
+    anchors = np.arange(pointCount)
+    # the first round tests the path length candidates, which are rarely far enough, and is always followed by another
+    firstRound = True
+    while anchors.size:
+        unlinkedCount = anchors.size
+        tested = candidate[anchors]
+        beyondEnd = tested >= pointCount
+        following[anchors[beyondEnd]] = pointCount
+        anchors, tested = anchors[~beyondEnd], tested[~beyondEnd]
+        farEnough, distance2d = _FarEnough(latitude, longitude, elevation, cosLatitude, minDistance, anchors, tested)
+        following[anchors[farEnough]] = tested[farEnough]
+        anchors, tested, distance2d = anchors[~farEnough], tested[~farEnough], distance2d[~farEnough]
+        candidate[anchors] = tested + 1
+        if bound is not None:
+            # the elevation of the tested point may be unknown, the filled one bounds the difference
+            distance = distance2d + np.fmax(np.abs(elevation[anchors] - filledElevation[tested]), 0)
+            remaining = minDistance * (1 - _SQUARED_TOLERANCE) - distance - margin
+            candidate[anchors] = np.maximum(candidate[anchors],
+                                            np.searchsorted(pathLength, pathLength[tested] + remaining))
+        if not firstRound and anchors.size > (1 - _MIN_LINKED_SHARE) * unlinkedCount:
+            break
+        firstRound = False
+
+    kept = [0]
+    following = following.tolist()
+    anchor = 0
+    while True:
+        nextAnchor = following[anchor]
+        if nextAnchor < 0:
+            # the previous gap is a good guess for the size of the search window
+            window = min(max(_MIN_WINDOW, 2 * (anchor - kept[-2] if len(kept) > 1 else 0)), _MAX_WINDOW)
+            nextAnchor = _SearchFarPoint(latitude, longitude, elevation, minDistance, anchor,
+                                         int(candidate[anchor]), window)
+        if nextAnchor >= pointCount:
+            break
+        kept.append(nextAnchor)
+        anchor = nextAnchor
+    return np.array(kept, dtype=np.int64)
+
+
+def ProjectToMeters(latitude: np.ndarray, longitude: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Project coordinates to a local equirectangular x/y plane in meters, centered on the points"""
+    if not len(latitude):
+        return np.empty(0), np.empty(0)
+    latitude0 = float(np.mean(latitude))
+    longitude0 = float(np.mean(longitude))
+    x = (longitude - longitude0) * (math.cos(math.radians(latitude0)) * ONE_DEGREE)
+    y = (latitude - latitude0) * ONE_DEGREE
+    return x, y
+
+
+def _SquaredLineDistance(px: np.ndarray, py: np.ndarray, rangeIndex: np.ndarray,
+                         ax: np.ndarray, ay: np.ndarray, bx: np.ndarray, by: np.ndarray) -> np.ndarray:
+    """Squared distances of points to the lines through a and b of their ranges
+
+    The line parameters are computed once per range, ranges with a == b (closed loops) use the
+    distance to a instead.
+    """
+    dx = bx - ax
+    dy = by - ay
+    lengthSquared = dx * dx + dy * dy
+    isLine = lengthSquared > 0
+    scale = np.divide(1, np.sqrt(lengthSquared), out=np.zeros(len(dx)), where=isLine)
+    dx *= scale
+    dy *= scale
+    offset = ax * dy - ay * dx
+    distance = px * dy[rangeIndex] - py * dx[rangeIndex] - offset[rangeIndex]
+    distance *= distance
+    if not isLine.all():
+        isPoint = ~isLine[rangeIndex]
+        pointRange = rangeIndex[isPoint]
+        distance[isPoint] = (px[isPoint] - ax[pointRange]) ** 2 + (py[isPoint] - ay[pointRange]) ** 2
+    return distance
+
+
+def DouglasPeuckerIndices(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """Indices of the points kept by Douglas-Peucker simplification of projected coordinates
+
+    Instead of recursing, all open ranges between kept points are split at once per round: the
+    distances of all undecided points to the line of their range are computed in one vectorized
+    step, and every range whose farthest point is more than tolerance away is split at that point.
+    """
+    pointCount = len(x)
+    if pointCount <= 2:
+        return np.arange(pointCount)
+
+    keep = np.zeros(pointCount, dtype=bool)
+    keep[[0, -1]] = True
+    # undecided points, the points of one range are contiguous and the ranges ordered
+    candidates = np.arange(1, pointCount - 1)
+    rangeIndex = np.zeros(len(candidates), dtype=np.int64)
+    rangeStart = np.array([0])
+    rangeEnd = np.array([pointCount - 1])
+    squaredTolerance = tolerance * tolerance
+    while candidates.size:
+        # drop ranges without undecided points and number the others consecutively
+        isFirstOfRange = np.diff(rangeIndex, prepend=-1) != 0
+        firstOfRange = np.flatnonzero(isFirstOfRange)
+        rangeStart = rangeStart[rangeIndex[firstOfRange]]
+        rangeEnd = rangeEnd[rangeIndex[firstOfRange]]
+        rangeIndex = np.cumsum(isFirstOfRange) - 1
+
+        distance = _SquaredLineDistance(x[candidates], y[candidates], rangeIndex,
+                                        x[rangeStart], y[rangeStart], x[rangeEnd], y[rangeEnd])
+        rangeMax = np.maximum.reduceat(distance, firstOfRange)
+        split = rangeMax > squaredTolerance
+
+        farthest = np.flatnonzero((distance == rangeMax[rangeIndex]) & split[rangeIndex])
+        farthest = farthest[np.diff(rangeIndex[farthest], prepend=-1) != 0]
+        splitPoint = candidates[farthest]
+        keep[splitPoint] = True
+
+        # every split range becomes the two ranges left and right of its split point
+        splitRanges = np.flatnonzero(split)
+        rangeStart = np.column_stack((rangeStart[split], splitPoint)).ravel()
+        rangeEnd = np.column_stack((splitPoint, rangeEnd[split])).ravel()
+        newRangeIndex = np.full(len(split), -1, dtype=np.int64)
+        newRangeIndex[splitRanges] = 2 * np.arange(len(splitRanges))
+
+        stillOpen = split[rangeIndex]
+        stillOpen[farthest] = False
+        candidates = candidates[stillOpen]
+        rangeIndex = rangeIndex[stillOpen]
+        rangeIndex = newRangeIndex[rangeIndex] + (candidates > splitPoint[newRangeIndex[rangeIndex] // 2])
+    return np.flatnonzero(keep)
+
+
+def VisvalingamIndices(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """Indices of the points kept by Visvalingam-Whyatt simplification of projected coordinates
+
+    Points are removed while the triangle they form with their neighbours has an area below
+    tolerance² square meters. Removal happens in vectorized rounds: each round drops the
+    non-adjacent points whose area is below the threshold and not larger than that of their
+    neighbours, then the areas of the remaining points are recomputed.
+    """
+    pointCount = len(x)
+    if pointCount <= 2:
+        return np.arange(pointCount)
+
+    threshold = tolerance * tolerance
+    indices = np.arange(pointCount)
+    while len(indices) > 2:
+        px = x[indices]
+        py = y[indices]
+        area = 0.5 * np.abs(px[:-2] * (py[1:-1] - py[2:]) + px[1:-1] * (py[2:] - py[:-2])
+                            + px[2:] * (py[:-2] - py[1:-1]))
+        remove = (area < threshold) & (area <= np.r_[np.inf, area[:-1]]) & (area <= np.r_[area[1:], np.inf])
+        if not remove.any():
+            break
+        # of a run of adjacent minima (equal areas) only every second point is removed in this round
+        position = np.arange(len(remove))
+        runStart = np.maximum.accumulate(np.where(remove & ~np.r_[False, remove[:-1]], position, 0))
+        remove &= (position - runStart) % 2 == 0
+
+        keep = np.ones(len(indices), dtype=bool)
+        keep[1:-1] = ~remove
+        indices = indices[keep]
+    return indices
+
+
+def SimplifyIndices(mode: str, latitude: np.ndarray, longitude: np.ndarray, elevation: np.ndarray,
+                    tolerance: float) -> np.ndarray:
+    """Indices of the points of one segment kept by the given simplification mode
+
+    Args:
+        mode: one of SIMPLIFY_MODES
+        tolerance: minimum distance between points for MIN_DISTANCE, maximum deviation for
+            DOUGLAS_PEUCKER, square root of the minimum triangle area for VISVALINGAM, in meters
+    """
+    if mode == MIN_DISTANCE:
+        return MinDistanceIndices(latitude, longitude, elevation, tolerance)
+    if mode == DOUGLAS_PEUCKER:
+        return DouglasPeuckerIndices(*ProjectToMeters(latitude, longitude), tolerance)
+    if mode == VISVALINGAM:
+        return VisvalingamIndices(*ProjectToMeters(latitude, longitude), tolerance)
+    raise ValueError(f'Unsupported simplification mode {mode}, use one of {", ".join(SIMPLIFY_MODES)}')
+
+
+def SimplifyLevels(mode: str, latitude: np.ndarray, longitude: np.ndarray, elevation: np.ndarray,
+                   tolerances: list[float]) -> np.ndarray:
+    """Nested simplifications of one segment with increasing tolerances, as the level of each point
+
+    Level 0 simplifies the segment with the first tolerance, each further level simplifies the points
+    of the previous level with the next tolerance, so every level is a subset of the previous one.
+    The points are projected once for all levels.
+
+    Args:
+        mode: one of SIMPLIFY_MODES
+        tolerances: tolerances of the levels in meters, ascending, see :func:`SimplifyIndices`
+
+    Returns:
+        highest level keeping each point, -1 for points of no level
+    """
+    if mode not in SIMPLIFY_MODES:
+        raise ValueError(f'Unsupported simplification mode {mode}, use one of {", ".join(SIMPLIFY_MODES)}')
+    levels = np.full(len(latitude), -1, dtype=np.int8)
+    if mode != MIN_DISTANCE:
+        x, y = ProjectToMeters(latitude, longitude)
+    indices = np.arange(len(latitude))
+    for level, tolerance in enumerate(tolerances):
+        if mode == MIN_DISTANCE:
+            kept = MinDistanceIndices(latitude[indices], longitude[indices], elevation[indices], tolerance)
+        elif mode == DOUGLAS_PEUCKER:
+            kept = DouglasPeuckerIndices(x[indices], y[indices], tolerance)
+        else:
+            kept = VisvalingamIndices(x[indices], y[indices], tolerance)
+        indices = indices[kept]
+        levels[indices] = level
+    return levels
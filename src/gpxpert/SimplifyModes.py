@@ -0,0 +1,11 @@
+"""Names of the simplification modes, importable without numpy"""
+
+MIN_DISTANCE = 'min-distance'
+DOUGLAS_PEUCKER = 'douglas-peucker'
+VISVALINGAM = 'visvalingam'
+SIMPLIFY_MODES = [MIN_DISTANCE, DOUGLAS_PEUCKER, VISVALINGAM]
+
+# tracks are resampled to points at a fixed time interval in seconds or distance interval in meters
+RESAMPLE_TIME = 'time'
+RESAMPLE_DISTANCE = 'distance'
+RESAMPLE_MODES = [RESAMPLE_TIME, RESAMPLE_DISTANCE]
@@ -0,0 +1,191 @@
+import copy
+import itertools
+import math
+
+import numpy as np
+
+from gpxpert.Simplify import EARTH_RADIUS
+
+
+def _Cartesian(latitude, longitude) -> np.ndarray:
+    """Points on the sphere of EARTH_RADIUS as x, y, z in meters, one row per point"""
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    return EARTH_RADIUS * np.column_stack((np.cos(latitude) * np.cos(longitude),
+                                           np.cos(latitude) * np.sin(longitude), np.sin(latitude)))
+
+
+def _Chord(distance: float) -> float:
+    """Straight line distance of two points with a great circle distance in meters"""
+    return 2 * EARTH_RADIUS * math.sin(min(distance, math.pi * EARTH_RADIUS) / (2 * EARTH_RADIUS))
+
+
+class SpatialIndex:
+    """Grid index of points on the earth for radius and bounding box queries
+
+    Points are placed on a sphere in 3D and sorted into cubic cells, so distances are exact
+    great circle distances and queries work across the poles and the antimeridian. Building the
+    index sorts the points, O(n log n). A radius query visits the cells overlapping the radius, a
+    bounding box query does a binary search on the latitudes.
+
+    Usage::
+
+        index = SpatialIndex(latitude, longitude, cellSize=100)
+        nearby = index.QueryRadius(46.02, 8.88, radius=200)
+    """
+
+    def __init__(self, latitude, longitude, cellSize: float = 100.):
+        """
+        Args:
+            latitude: latitudes of the points in degrees
+            longitude: longitudes of the points in degrees
+            cellSize: edge length of the cells in meters, best about the radius of typical queries
+        """
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        self.cellSize = cellSize
+        self._points = _Cartesian(self.latitude, self.longitude)
+        cells = np.floor(self._points / cellSize).astype(np.int64)
+        self._order = np.lexsort(cells.T[::-1])
+        sortedCells = cells[self._order]
+        cellStarts = np.flatnonzero(np.concatenate(([True], np.any(sortedCells[1:] != sortedCells[:-1], axis=1))))
+        cellStops = np.append(cellStarts[1:], len(self._order))
+        self._cells = {tuple(cell): (start, stop) for cell, start, stop in
+                       zip(sortedCells[cellStarts].tolist(), cellStarts.tolist(), cellStops.tolist())} \
+            if len(self) else {}
+        self._latitudeOrder = np.argsort(self.latitude, kind='stable')
+        self._sortedLatitude = self.latitude[self._latitudeOrder]
+
+    def __len__(self) -> int:
+        return len(self.latitude)
+
+    def QueryRadius(self, latitude: float, longitude: float, radius: float) -> np.ndarray:
+        """Indices of the points within radius meters of a position, in ascending order"""
+        center = _Cartesian(latitude, longitude)[0]
+        chord = _Chord(radius)
+        low = np.floor((center - chord) / self.cellSize).astype(np.int64).tolist()
+        high = np.floor((center + chord) / self.cellSize).astype(np.int64).tolist()
+        if math.prod(h - l + 1 for l, h in zip(low, high)) > len(self._cells):
+            candidates = np.arange(len(self))
+        else:
+            ranges = [self._cells.get(cell) for cell in itertools.product(*(range(l, h + 1) for l, h in zip(low, high)))]
+            candidates = np.concatenate([self._order[start:stop] for start, stop in filter(None, ranges)] or
+                                        [np.empty(0, dtype=np.int64)])
+        distances = np.linalg.norm(self._points[candidates] - center, axis=1)
+        return np.sort(candidates[distances <= chord])
+
+    def QueryBoundingBox(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """Indices of the points within a bounding box in degrees, in ascending order
+
+        The box crosses the antimeridian if west is greater than east.
+        """
+        first = np.searchsorted(self._sortedLatitude, south, side='left')
+        last = np.searchsorted(self._sortedLatitude, north, side='right')
+        candidates = self._latitudeOrder[first:last]
+        longitude = self.longitude[candidates]
+        if west <= east:
+            inside = (longitude >= west) & (longitude <= east)
+        else:
+            inside = (longitude >= west) | (longitude <= east)
+        return np.sort(candidates[inside])
+
+    def MergeWithin(self, radius: float) -> np.ndarray:
+        """Group the points into clusters of points within radius meters of their first point
+
+        Points are visited in order, a point within radius of the first point of an earlier cluster
+        joins the earliest such cluster, otherwise it starts a new one. Only the cells around each
+        point are searched, so this takes O(n log n) for the sorting and O(n) for the clustering.
+
+        Returns:
+            index of the first point of its cluster for each point
+        """
+        chord = _Chord(radius)
+        # cells of the size of the radius, the leaders within radius are in the 27 surrounding cells
+        cellSize = max(chord, 1e-3)
+        cells = np.floor(self._points / cellSize).astype(np.int64).tolist()
+        points = self._points.tolist()
+        leadersOfCell: dict = {}
+        leaders = np.empty(len(self), dtype=np.int64)
+        neighbours = list(itertools.product((-1, 0, 1), repeat=3))
+        for i, ((cx, cy, cz), (x, y, z)) in enumerate(zip(cells, points)):
+            leader = i
+            for dx, dy, dz in neighbours:
+                for j in leadersOfCell.get((cx + dx, cy + dy, cz + dz), ()):
+                    if j < leader:
+                        lx, ly, lz = points[j]
+                        if (lx - x) ** 2 + (ly - y) ** 2 + (lz - z) ** 2 <= chord * chord:
+                            leader = j
+            if leader == i:
+                leadersOfCell.setdefault((cx, cy, cz), []).append(i)
+            leaders[i] = leader
+        return leaders
+
+
+def MergeWaypoints(waypoints: list, radius: float) -> list:
+    """Merge waypoints within radius meters of an earlier waypoint into it, see :meth:`SpatialIndex.MergeWithin`
+
+    A merged waypoint keeps the position of its first waypoint, its name gets the number of merged
+    waypoints appended and its description lists the names of all of them, one per line, each
+    followed by the description of its waypoint if it has one.
+
+    Args:
+        waypoints: GPXWaypoint or GPXTrackPoint objects
+        radius: merge radius in meters
+
+    Returns:
+        copies of the first waypoint of each cluster, in order
+    """
+    if not waypoints:
+        return []
+    index = SpatialIndex([waypoint.latitude for waypoint in waypoints],
+                         [waypoint.longitude for waypoint in waypoints], max(radius, 1.))
+    clusters: dict = {}
+    for waypoint, leader in zip(waypoints, index.MergeWithin(radius).tolist()):
+        clusters.setdefault(leader, []).append(waypoint)
+    merged = []
+    for cluster in clusters.values():
+        if len(cluster) == 1:
+            merged.append(cluster[0])
+            continue
+        waypoint = copy.copy(cluster[0])
+        waypoint.name = f'{cluster[0].name} (+{len(cluster) - 1})'
+        waypoint.description = '\n'.join(f'{member.name}: {member.description}' if member.description
+                                          else str(member.name) for member in cluster)
+        merged.append(waypoint)
+    return merged
+
+
+class TrackStartIndex:
+    """Spatial index of the start points of tracks, to find the tracks starting in an area
+
+    Usage::
+
+        starts = TrackToWaypointConverter('library').StartIndex()
+        for gpxSource, firstPoint in starts.WithinRadius(46.02, 8.88, 500):
+            ...
+    """
+
+    def __init__(self, sources: list, firstPoints: list, cellSize: float = 100.):
+        """
+        Args:
+            sources: gpx file names or ZipMember objects
+            firstPoints: first track point of each source
+            cellSize: edge length of the grid cells in meters
+        """
+        self.sources = sources
+        self.firstPoints = firstPoints
+        self.index = SpatialIndex([point.latitude for point in firstPoints],
+                                  [point.longitude for point in firstPoints], cellSize)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def WithinRadius(self, latitude: float, longitude: float, radius: float) -> list[tuple]:
+        """Source and first point of the tracks starting within radius meters of a position"""
+        return self._Tracks(self.index.QueryRadius(latitude, longitude, radius))
+
+    def WithinBoundingBox(self, south: float, west: float, north: float, east: float) -> list[tuple]:
+        """Source and first point of the tracks starting within a bounding box, see :meth:`SpatialIndex.QueryBoundingBox`"""
+        return self._Tracks(self.index.QueryBoundingBox(south, west, north, east))
+
+    def _Tracks(self, indices: np.ndarray) -> list[tuple]:
+        return [(self.sources[i], self.firstPoints[i]) for i in indices.tolist()]
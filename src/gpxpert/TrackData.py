@@ -0,0 +1,328 @@
+import copy
+import datetime
+import json
+import math
+
+import gpxpy
+import numpy as np
+from gpxpy.gpx import GPX
+
+from gpxpert.GpxReader import PointFields, SetPointFields
+from gpxpert.Simplify import MIN_DISTANCE, SimplifyIndices, SimplifyLevels
+from gpxpert.SimplifyModes import RESAMPLE_TIME
+
+_UTC = datetime.timezone.utc
+
+MISSING_ELEVATION = np.iinfo(np.int32).min
+
+
+def _ToSeconds(time: datetime.datetime | None) -> float:
+    if time is None:
+        return math.nan
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=_UTC)
+    return time.timestamp()
+
+
+def _ElevationList(elevation: np.ndarray) -> list:
+    if np.issubdtype(elevation.dtype, np.integer):
+        return [None if ele == MISSING_ELEVATION else ele for ele in elevation.tolist()]
+    return [None if math.isnan(ele) else ele for ele in elevation.tolist()]
+
+
+def _FillMissingElevation(latitude: np.ndarray, longitude: np.ndarray, elevation: np.ndarray, elevationFunction):
+    # like gpxpy's 'point.elevation or ...', an elevation of 0 counts as missing
+    missing = np.isnan(elevation) | (elevation == 0)
+    if missing.any():
+        elevation[missing] = elevationFunction(latitude[missing], longitude[missing])
+
+
+def _RoundElevation(elevation: np.ndarray) -> np.ndarray:
+    rounded = np.full(len(elevation), MISSING_ELEVATION, dtype=np.int32)
+    known = ~np.isnan(elevation)
+    rounded[known] = np.round(elevation[known])
+    return rounded
+
+
+class TrackData:
+    """Columnar representation of the waypoints and tracks of a gpx file
+
+    The track points of all segments are stored in contiguous float64 arrays. Segments are index
+    ranges into these arrays (segmentOffsets), tracks are index ranges into the segments
+    (trackOffsets). Missing elevations and times are NaN, times are seconds since the epoch (UTC).
+    Once rounded, elevations are int32 with MISSING_ELEVATION for unknown values. After
+    :meth:`SimplifyLevels`, levels holds the level of detail of each track point.
+
+    Optional fields of track points, like name, description, symbol or satellites, are rare and kept
+    sparsely: pointFields holds the (tag, text) pairs of the points at the ascending indices
+    fieldIndices. They are written to gpx, but not to the compact formats, and resampling drops them.
+
+    The processing methods work in place on whole arrays at once.
+    """
+
+    def __init__(self):
+        self.waypointNames: list = []
+        self.waypointLatitude = np.empty(0)
+        self.waypointLongitude = np.empty(0)
+        self.waypointElevation = np.empty(0)
+
+        self.trackNames: list = []
+        self.trackDescriptions: list = []
+        self.trackOffsets = np.zeros(1, dtype=np.int64)
+        self.segmentOffsets = np.zeros(1, dtype=np.int64)
+
+        self.latitude = np.empty(0)
+        self.longitude = np.empty(0)
+        self.elevation = np.empty(0)
+        self.time = np.empty(0)
+        self.levels: np.ndarray | None = None
+        self.fieldIndices = np.empty(0, dtype=np.int64)
+        self.pointFields: list = []
+
+    @property
+    def pointCount(self) -> int:
+        return len(self.latitude)
+
+    def TrackSegments(self, trackIndex: int) -> list[slice]:
+        """Index ranges of the points of all segments of a track"""
+        firstSegment, lastSegment = self.trackOffsets[trackIndex], self.trackOffsets[trackIndex + 1]
+        return [slice(int(self.segmentOffsets[i]), int(self.segmentOffsets[i + 1]))
+                for i in range(firstSegment, lastSegment)]
+
+    def FirstTrackPoint(self) -> gpxpy.gpx.GPXTrackPoint | None:
+        """First point of the first segment of the first track, named after its track"""
+        if not self.trackNames:
+            return None
+        segments = self.TrackSegments(0)
+        if not segments or segments[0].start == segments[0].stop:
+            return None
+        i = segments[0].start
+        point = gpxpy.gpx.GPXTrackPoint(latitude=float(self.latitude[i]), longitude=float(self.longitude[i]),
+                                        elevation=_ElevationList(self.elevation[i:i + 1])[0])
+        SetPointFields(point, self._PointFields(i))
+        point.name = self.trackNames[0]
+        return point
+
+    def _PointFields(self, i: int) -> list:
+        """(tag, text) pairs of the optional fields of track point i"""
+        position = int(np.searchsorted(self.fieldIndices, i))
+        if position < len(self.fieldIndices) and self.fieldIndices[position] == i:
+            return self.pointFields[position]
+        return []
+
+    def SelectPoints(self, keep: np.ndarray):
+        """Keep only the track points selected by a boolean mask, empty segments are retained"""
+        keptBefore = np.concatenate(([0], np.cumsum(keep)))
+        self.segmentOffsets = keptBefore[self.segmentOffsets].astype(np.int64)
+        for key in ['latitude', 'longitude', 'elevation', 'time']:
+            setattr(self, key, getattr(self, key)[keep])
+        if self.levels is not None:
+            self.levels = self.levels[keep]
+        if len(self.fieldIndices):
+            keptFields = keep[self.fieldIndices]
+            self.pointFields = [fields for fields, kept in zip(self.pointFields, keptFields.tolist()) if kept]
+            self.fieldIndices = keptBefore[self.fieldIndices[keptFields]].astype(np.int64)
+
+    def ReducePoints(self, minDistance: float):
+        """Reduce each segment to points at least minDistance meters apart, like gpxpy's reduce_points"""
+        self.Simplify(MIN_DISTANCE, minDistance)
+
+    def Simplify(self, mode: str, tolerance: float):
+        """Simplify each segment, see :func:`gpxpert.Simplify.SimplifyIndices` for the modes
+
+        Args:
+            mode: one of gpxpert.Simplify.SIMPLIFY_MODES
+            tolerance: tolerance of the mode in meters
+        """
+        keep = np.zeros(self.pointCount, dtype=bool)
+        for start, stop in zip(self.segmentOffsets[:-1].tolist(), self.segmentOffsets[1:].tolist()):
+            keep[start + SimplifyIndices(mode, self.latitude[start:stop], self.longitude[start:stop],
+                                         self.elevation[start:stop], tolerance)] = True
+        self.SelectPoints(keep)
+
+    def SimplifyLevels(self, mode: str, tolerances: list[float]):
+        """Simplify each segment to nested levels of detail, see :func:`gpxpert.Simplify.SimplifyLevels`
+
+        Keeps the points of the finest level and sets levels to the highest level of each point.
+
+        Args:
+            mode: one of gpxpert.Simplify.SIMPLIFY_MODES
+            tolerances: tolerances of the levels in meters, ascending
+        """
+        levels = np.full(self.pointCount, -1, dtype=np.int8)
+        for start, stop in zip(self.segmentOffsets[:-1].tolist(), self.segmentOffsets[1:].tolist()):
+            levels[start:stop] = SimplifyLevels(mode, self.latitude[start:stop], self.longitude[start:stop],
+                                                self.elevation[start:stop], tolerances)
+        self.levels = levels
+        self.SelectPoints(levels >= 0)
+
+    def LevelOfDetail(self, level: int) -> 'TrackData':
+        """Copy with the track points of a level of detail, without levels"""
+        trackData = copy.copy(self)
+        trackData.levels = None
+        trackData.SelectPoints(self.levels >= level)
+        return trackData
+
+    def Resample(self, mode: str, interval: float):
+        """Resample each segment to points at a fixed interval, see :func:`gpxpert.Resample.Resample`
+
+        Points without time are dropped for RESAMPLE_TIME, they cannot be placed in time.
+
+        Args:
+            mode: one of gpxpert.SimplifyModes.RESAMPLE_MODES
+            interval: seconds for RESAMPLE_TIME, meters for RESAMPLE_DISTANCE
+        """
+        from gpxpert.Resample import Resample
+
+        if mode == RESAMPLE_TIME:
+            self.SelectPoints(~np.isnan(self.time))
+        self.levels = None
+        # resampled points are interpolated, they have no fields of their own
+        self.fieldIndices = np.empty(0, dtype=np.int64)
+        self.pointFields = []
+        self.segmentOffsets, self.latitude, self.longitude, self.elevation, self.time = Resample(
+            mode, self.segmentOffsets, self.latitude, self.longitude, self.elevation, self.time, interval)
+
+    def RemoveTime(self):
+        self.time = np.full(self.pointCount, math.nan)
+
+    def RoundTime(self):
+        """Round times to whole seconds, like the times of most gpx files"""
+        self.time = np.round(self.time)
+
+    def RoundCoordinates(self, decimals: int = 5):
+        for key in ['latitude', 'longitude', 'waypointLatitude', 'waypointLongitude']:
+            setattr(self, key, np.round(getattr(self, key), decimals))
+
+    def FillElevation(self, elevationFunction):
+        """Replace missing elevations of waypoints and track points
+
+        Args:
+            elevationFunction: called with latitude and longitude arrays of the points without elevation,
+                returns their elevations, NaN where unknown
+        """
+        _FillMissingElevation(self.waypointLatitude, self.waypointLongitude, self.waypointElevation,
+                              elevationFunction)
+        _FillMissingElevation(self.latitude, self.longitude, self.elevation, elevationFunction)
+
+    def RoundElevation(self):
+        """Round elevations to whole meters, stored as int32"""
+        self.waypointElevation = _RoundElevation(self.waypointElevation)
+        self.elevation = _RoundElevation(self.elevation)
+
+    def ToGpx(self) -> GPX:
+        gpx = gpxpy.gpx.GPX()
+        for name, lat, lon, ele in zip(self.waypointNames, self.waypointLatitude.tolist(),
+                                       self.waypointLongitude.tolist(), _ElevationList(self.waypointElevation)):
+            gpx.waypoints.append(gpxpy.gpx.GPXWaypoint(latitude=lat, longitude=lon, elevation=ele, name=name))
+        for trackIndex, (name, description) in enumerate(zip(self.trackNames, self.trackDescriptions)):
+            track = gpxpy.gpx.GPXTrack(name, description)
+            for points in self.TrackSegments(trackIndex):
+                segment = gpxpy.gpx.GPXTrackSegment()
+                for i, lat, lon, ele, time in zip(
+                        range(points.start, points.stop), self.latitude[points].tolist(),
+                        self.longitude[points].tolist(), _ElevationList(self.elevation[points]),
+                        self.time[points].tolist()):
+                    segment.points.append(SetPointFields(gpxpy.gpx.GPXTrackPoint(
+                        latitude=lat, longitude=lon, elevation=ele,
+                        time=None if math.isnan(time) else datetime.datetime.fromtimestamp(time, _UTC)),
+                        self._PointFields(i)))
+                track.segments.append(segment)
+            gpx.tracks.append(track)
+        return gpx
+
+    @classmethod
+    def FromGpx(cls, gpx: GPX) -> 'TrackData':
+        builder = TrackDataBuilder()
+        for wpt in gpx.waypoints:
+            builder.AddWaypoint(wpt.latitude, wpt.longitude, wpt.elevation, wpt.name)
+        for track in gpx.tracks:
+            for segment in track.segments:
+                for point in segment.points:
+                    builder.AddPoint(point.latitude, point.longitude, point.elevation, _ToSeconds(point.time),
+                                     PointFields(point))
+                builder.EndSegment()
+            builder.EndTrack(track.name, track.description)
+        return builder.Build()
+
+    def Save(self, file):
+        """Store the track data in numpy's npz format
+
+        Args:
+            file: file name or binary file object
+        """
+        header = {'waypointNames': self.waypointNames, 'trackNames': self.trackNames,
+                  'trackDescriptions': self.trackDescriptions, 'pointFields': self.pointFields}
+        np.savez(file, header=np.array(json.dumps(header)),
+                 waypointLatitude=self.waypointLatitude, waypointLongitude=self.waypointLongitude,
+                 waypointElevation=self.waypointElevation,
+                 trackOffsets=self.trackOffsets, segmentOffsets=self.segmentOffsets,
+                 latitude=self.latitude, longitude=self.longitude, elevation=self.elevation, time=self.time,
+                 fieldIndices=self.fieldIndices)
+
+    @classmethod
+    def Load(cls, file) -> 'TrackData':
+        """Load track data stored with :meth:`Save`"""
+        trackData = cls()
+        with np.load(file, allow_pickle=False) as arrays:
+            header = json.loads(str(arrays['header']))
+            trackData.waypointNames = header['waypointNames']
+            trackData.trackNames = header['trackNames']
+            trackData.trackDescriptions = header['trackDescriptions']
+            # stored as lists by json
+            trackData.pointFields = [[tuple(field) for field in fields] for fields in header['pointFields']]
+            for key in ['waypointLatitude', 'waypointLongitude', 'waypointElevation', 'trackOffsets',
+                        'segmentOffsets', 'latitude', 'longitude', 'elevation', 'time', 'fieldIndices']:
+                setattr(trackData, key, arrays[key])
+        return trackData
+
+
+class TrackDataBuilder:
+    """Collects waypoints and track points in document order and builds a :class:`TrackData`"""
+
+    def __init__(self):
+        self.waypointNames: list = []
+        self.waypoints: list = []
+        self.trackNames: list = []
+        self.trackDescriptions: list = []
+        self.trackOffsets: list = [0]
+        self.segmentOffsets: list = [0]
+        self.points: list = []
+        self.fieldIndices: list = []
+        self.pointFields: list = []
+
+    def AddWaypoint(self, latitude: float, longitude: float, elevation: float | None, name: str | None):
+        self.waypoints.append((latitude, longitude, math.nan if elevation is None else elevation))
+        self.waypointNames.append(name)
+
+    def AddPoint(self, latitude: float, longitude: float, elevation: float | None, time: float = math.nan,
+                 fields: list | None = None):
+        if fields:
+            self.fieldIndices.append(len(self.points))
+            self.pointFields.append(fields)
+        self.points.append((latitude, longitude, math.nan if elevation is None else elevation, time))
+
+    def EndSegment(self):
+        self.segmentOffsets.append(len(self.points))
+
+    def EndTrack(self, name: str | None, description: str | None):
+        self.trackOffsets.append(len(self.segmentOffsets) - 1)
+        self.trackNames.append(name)
+        self.trackDescriptions.append(description)
+
+    def Build(self) -> TrackData:
+        trackData = TrackData()
+        trackData.waypointNames = self.waypointNames
+        waypoints = np.array(self.waypoints, dtype=np.float64).reshape(-1, 3)
+        trackData.waypointLatitude, trackData.waypointLongitude, trackData.waypointElevation = \
+            [np.ascontiguousarray(column) for column in waypoints.T]
+        trackData.trackNames = self.trackNames
+        trackData.trackDescriptions = self.trackDescriptions
+        trackData.trackOffsets = np.array(self.trackOffsets, dtype=np.int64)
+        trackData.segmentOffsets = np.array(self.segmentOffsets, dtype=np.int64)
+        points = np.array(self.points, dtype=np.float64).reshape(-1, 4)
+        trackData.latitude, trackData.longitude, trackData.elevation, trackData.time = \
+            [np.ascontiguousarray(column) for column in points.T]
+        trackData.fieldIndices = np.array(self.fieldIndices, dtype=np.int64)
+        trackData.pointFields = self.pointFields
+        return trackData
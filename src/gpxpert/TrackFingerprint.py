@@ -0,0 +1,158 @@
+import functools
+import hashlib
+import re
+
+import numpy as np
+
+from gpxpert.GpxReader import ReadTrackData
+from gpxpert.Simplify import HaversineDistance
+from gpxpert.SpatialIndex import SpatialIndex
+from gpxpert.ZipMember import OpenSource, ZipMember
+
+EXACT = 'exact'
+NEAR = 'near'
+# tracks with all samples this close in meters are near-duplicates
+DUPLICATE_TOLERANCE = 25.
+# relative difference of the lengths of near-duplicates
+_LENGTH_TOLERANCE = .1
+_SAMPLE_COUNT = 16
+_CHUNK_SIZE = 1 << 20
+# 1e-6 degrees, about 0.1 m, coordinates equal at this precision are exact duplicates
+_EXACT_SCALE = 1e6
+_TRACK_POINT = re.compile(rb'<(?:\w+:)?trkpt\b')
+_COORDINATES = re.compile(rb'<(?:\w+:)?trkpt\s+(?:lat\s*=\s*["\']([^"\']*)["\']\s+lon\s*=\s*["\']([^"\']*)["\']|'
+                          rb'lon\s*=\s*["\']([^"\']*)["\']\s+lat\s*=\s*["\']([^"\']*)["\'])')
+
+
+class TrackFingerprint:
+    """Geometry of all track points of a gpx file, reduced to a few numbers
+
+    Holds a hash of the quantized coordinates for exact duplicates, and for near-duplicates the
+    end points, the length and points sampled at equal distances along the track, so tracks
+    recorded with different sampling rates or names compare equal.
+    """
+    __slots__ = ('exactHash', 'length', 'samples', 'contentHash')
+
+    def __init__(self, latitude: np.ndarray, longitude: np.ndarray, contentHash: str | None = None):
+        """
+        Args:
+            latitude: latitudes of the track points in document order, at least one
+            longitude: longitudes of the track points
+            contentHash: SHA-1 of the file content if known, as computed by :func:`gpxpert.JobGraph.ContentHash`
+        """
+        self.contentHash = contentHash
+        coordinates = np.round(np.column_stack((latitude, longitude)) * _EXACT_SCALE).astype(np.int64)
+        self.exactHash = hashlib.sha1(coordinates.tobytes()).hexdigest()
+        steps = HaversineDistance(latitude[1:], longitude[1:], latitude[:-1], longitude[:-1])
+        distance = np.concatenate(([0.], np.cumsum(steps)))
+        self.length = float(distance[-1])
+        positions = np.linspace(0, self.length, _SAMPLE_COUNT)
+        # the samples include both end points
+        self.samples = np.column_stack((np.interp(positions, distance, latitude),
+                                        np.interp(positions, distance, longitude)))
+
+    @property
+    def start(self) -> tuple[float, float]:
+        return float(self.samples[0, 0]), float(self.samples[0, 1])
+
+    def Matches(self, other: 'TrackFingerprint', tolerance: float = DUPLICATE_TOLERANCE) -> bool:
+        """Whether the tracks are near-duplicates, all samples within tolerance meters and similar lengths"""
+        if abs(self.length - other.length) > max(_LENGTH_TOLERANCE * max(self.length, other.length), 2 * tolerance):
+            return False
+        distances = HaversineDistance(self.samples[:, 0], self.samples[:, 1], other.samples[:, 0], other.samples[:, 1])
+        return bool(distances.max() <= tolerance)
+
+
+class _CoordinateScanner:
+    """Track point coordinates of a gpx document fed in chunks, scanned with a regular expression
+
+    A chunk is scanned up to its last tag start, the rest is scanned with the next chunk, so tags
+    split between chunks are found as well. Attribute values cannot contain '<'.
+    """
+
+    def __init__(self):
+        self.matches = []
+        self.complete = True
+        self._rest = b''
+
+    def Feed(self, chunk: bytes):
+        data = self._rest + chunk
+        end = data.rfind(b'<') if chunk else len(data)
+        end = len(data) if end < 0 else end
+        self._rest = data[end:]
+        if self.complete:
+            matches = _COORDINATES.findall(data, 0, end)
+            # a track point with other attributes or unusual quoting needs the parser
+            self.complete = len(matches) == len(_TRACK_POINT.findall(data, 0, end))
+            self.matches += matches
+
+    def Coordinates(self) -> tuple[np.ndarray, np.ndarray]:
+        if not self.matches:
+            return np.empty(0), np.empty(0)
+        columns = np.array(self.matches).T
+        # either attribute order, empty strings where the other order matched
+        latitude = np.where(columns[0] != b'', columns[0], columns[3]).astype(np.float64)
+        longitude = np.where(columns[1] != b'', columns[1], columns[2]).astype(np.float64)
+        return latitude, longitude
+
+
+def ReadFingerprint(gpxSource: str | ZipMember) -> TrackFingerprint | None:
+    """Fingerprint of the track points of a gpx file without parsing it, None if it has no track points
+
+    The file is read in chunks, which also give its content hash. Files whose track points cannot
+    be scanned are parsed in a second pass.
+
+    Raises:
+        OSError: if the file cannot be read
+    """
+    digest = hashlib.sha1()
+    scanner = _CoordinateScanner()
+    with OpenSource(gpxSource) as gpxStream:
+        for chunk in iter(functools.partial(gpxStream.read, _CHUNK_SIZE), b''):
+            digest.update(chunk)
+            scanner.Feed(chunk)
+    scanner.Feed(b'')
+    if scanner.complete:
+        latitude, longitude = scanner.Coordinates()
+    else:
+        with OpenSource(gpxSource) as gpxStream:
+            trackData = ReadTrackData(gpxStream)
+        latitude, longitude = trackData.latitude, trackData.longitude
+    return TrackFingerprint(latitude, longitude, digest.hexdigest()) if len(latitude) else None
+
+
+def FindDuplicates(fingerprints: list, tolerance: float = DUPLICATE_TOLERANCE) -> dict[int, tuple[int, str]]:
+    """Find the tracks that duplicate an earlier track
+
+    Exact duplicates are found by hash. Near-duplicate candidates start within tolerance of the
+    start of an earlier track, they are found with a spatial index and compared by their samples.
+
+    Args:
+        fingerprints: TrackFingerprint of each track, None for tracks that are never duplicates
+        tolerance: distance of the samples of near-duplicates in meters
+
+    Returns:
+        for each duplicate track, the index of the first track it duplicates and EXACT or NEAR
+    """
+    valid = [i for i, fingerprint in enumerate(fingerprints) if fingerprint]
+    if not valid:
+        return {}
+    starts = np.array([fingerprints[i].start for i in valid])
+    index = SpatialIndex(starts[:, 0], starts[:, 1], cellSize=max(tolerance, 1.))
+    firstOfHash: dict = {}
+    kept = set()
+    duplicates = {}
+    for position, i in enumerate(valid):
+        fingerprint = fingerprints[i]
+        if fingerprint.exactHash in firstOfHash:
+            duplicates[i] = (firstOfHash[fingerprint.exactHash], EXACT)
+            continue
+        for candidate in index.QueryRadius(*fingerprint.start, tolerance).tolist():
+            original = valid[candidate]
+            if candidate < position and original in kept and fingerprint.Matches(fingerprints[original], tolerance):
+                duplicates[i] = (original, NEAR)
+                break
+        else:
+            kept.add(i)
+            firstOfHash[fingerprint.exactHash] = i
+    return duplicates
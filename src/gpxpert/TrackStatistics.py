@@ -0,0 +1,152 @@
+import csv
+import datetime
+import json
+import os
+
+import numpy as np
+
+from gpxpert.OutputFormats import STATISTICS_CSV
+from gpxpert.Simplify import Distance3d
+from gpxpert.TrackData import MISSING_ELEVATION, TrackData
+from gpxpert.ZipMember import ZipMember
+
+# columns of the statistics sidecar file, one row per track
+STATISTICS_FIELDS = ['file', 'track', 'points', 'distance', 'ascent', 'descent',
+                     'minLatitude', 'minLongitude', 'maxLatitude', 'maxLongitude', 'duration']
+
+
+def _Smoothed(elevation: np.ndarray, sameSegment: np.ndarray) -> np.ndarray:
+    """Elevations averaged with their neighbors like gpxpy's calculate_uphill_downhill, except at segment ends"""
+    smoothed = elevation.copy()
+    interior = sameSegment[:-1] & sameSegment[1:]
+    smoothed[1:-1][interior] = (.3 * elevation[:-2] + .4 * elevation[1:-1] + .3 * elevation[2:])[interior]
+    return smoothed
+
+
+def _TrackExtremes(values: np.ndarray, trackStarts: np.ndarray, nonEmpty: np.ndarray) -> tuple:
+    """Minimum and maximum of the values of each track, NaN for tracks without points"""
+    minimum, maximum = np.full(len(nonEmpty), np.nan), np.full(len(nonEmpty), np.nan)
+    if nonEmpty.any():
+        minimum[nonEmpty] = np.minimum.reduceat(values, trackStarts[nonEmpty])
+        maximum[nonEmpty] = np.maximum.reduceat(values, trackStarts[nonEmpty])
+    return minimum, maximum
+
+
+def TrackStatistics(trackData: TrackData) -> list[dict]:
+    """Distance, ascent, descent, bounding box and duration of each track, computed for all tracks at once
+
+    Distance is the 2d length in meters like gpxpy's length_2d. Ascent and descent in meters are
+    computed from smoothed elevations like get_uphill_downhill, points without elevation are skipped.
+    Duration is the time in seconds from the first to the last point with a time of each segment,
+    summed over the segments. Steps between segments do not count. Values that cannot be determined
+    are None.
+
+    Returns:
+        statistics of each track, with the keys of STATISTICS_FIELDS except file
+    """
+    trackCount = len(trackData.trackNames)
+    segmentOffsets = trackData.segmentOffsets
+    segmentTrack = np.repeat(np.arange(trackCount), np.diff(trackData.trackOffsets))
+    pointSegment = np.repeat(np.arange(len(segmentOffsets) - 1), np.diff(segmentOffsets))
+    trackOffsets = segmentOffsets[trackData.trackOffsets]
+    pointCounts = np.diff(trackOffsets)
+    nonEmpty = pointCounts > 0
+
+    latitude, longitude = trackData.latitude, trackData.longitude
+    steps = pointSegment[1:] == pointSegment[:-1]
+    stepDistance = Distance3d(latitude[1:][steps], longitude[1:][steps], np.nan,
+                              latitude[:-1][steps], longitude[:-1][steps], np.nan)
+    distance = np.bincount(segmentTrack[pointSegment[1:][steps]], weights=stepDistance, minlength=trackCount)
+
+    elevation = trackData.elevation
+    known = elevation != MISSING_ELEVATION if elevation.dtype.kind in 'iu' else ~np.isnan(elevation)
+    elevationSegment = pointSegment[known]
+    climbs = elevationSegment[1:] == elevationSegment[:-1]
+    climb = np.diff(_Smoothed(elevation[known].astype(np.float64), climbs))[climbs]
+    climbTrack = segmentTrack[elevationSegment[1:][climbs]]
+    ascent = np.bincount(climbTrack, weights=np.maximum(climb, 0), minlength=trackCount)
+    descent = np.bincount(climbTrack, weights=np.maximum(-climb, 0), minlength=trackCount)
+    hasElevation = np.bincount(segmentTrack[elevationSegment], minlength=trackCount) > 0
+
+    timed = ~np.isnan(trackData.time)
+    time, timeSegment = trackData.time[timed], pointSegment[timed]
+    duration = np.full(trackCount, np.nan)
+    if len(time):
+        segmentStarts = np.flatnonzero(np.concatenate(([True], timeSegment[1:] != timeSegment[:-1])))
+        timeTrack = segmentTrack[timeSegment[segmentStarts]]
+        segmentDuration = np.maximum.reduceat(time, segmentStarts) - np.minimum.reduceat(time, segmentStarts)
+        duration[np.unique(timeTrack)] = 0
+        duration += np.bincount(timeTrack, weights=segmentDuration, minlength=trackCount)
+
+    minLatitude, maxLatitude = _TrackExtremes(latitude, trackOffsets[:-1], nonEmpty)
+    minLongitude, maxLongitude = _TrackExtremes(longitude, trackOffsets[:-1], nonEmpty)
+    ascent[~hasElevation] = descent[~hasElevation] = np.nan
+    columns = [distance, ascent, descent, minLatitude, minLongitude, maxLatitude, maxLongitude, duration]
+    values = np.where(np.isnan(np.column_stack(columns)), None, np.column_stack(columns)).tolist()
+    return [dict(zip(STATISTICS_FIELDS[1:], [name, count] + row))
+            for name, count, row in zip(trackData.trackNames, pointCounts.tolist(), values)]
+
+
+def StatisticsDescription(statistics: dict) -> str:
+    """Statistics of a track as text for the description of its summary waypoint"""
+    parts = [f'{statistics["distance"] / 1000:.2f} km']
+    if statistics['ascent'] is not None:
+        parts.append(f'ascent {statistics["ascent"]:.0f} m, descent {statistics["descent"]:.0f} m')
+    if statistics['duration'] is not None:
+        parts.append(f'duration {datetime.timedelta(seconds=round(statistics["duration"]))}')
+    if statistics['minLatitude'] is not None:
+        parts.append(f'bounds {statistics["minLatitude"]:.5f},{statistics["minLongitude"]:.5f} '
+                     f'{statistics["maxLatitude"]:.5f},{statistics["maxLongitude"]:.5f}')
+    return ', '.join(parts)
+
+
+class StatisticsWriter:
+    """Writes the statistics of the tracks of many gpx files to a CSV or JSON file, one row per track
+
+    Usage::
+
+        with StatisticsWriter('summary_STATISTICS.csv', STATISTICS_CSV) as writer:
+            writer.WriteStatistics('Track_01.gpx', TrackStatistics(trackData))
+    """
+
+    def __init__(self, fileName: str, statisticsFormat: str):
+        """
+        Args:
+            fileName: file to write
+            statisticsFormat: STATISTICS_CSV or STATISTICS_JSON of gpxpert.OutputFormats
+        """
+        self.fileName = fileName
+        self._file = open(fileName, 'w', encoding='utf-8', newline='')
+        if statisticsFormat == STATISTICS_CSV:
+            self._csv = csv.DictWriter(self._file, STATISTICS_FIELDS)
+            self._csv.writeheader()
+        else:
+            self._csv = None
+            self._file.write('[')
+            self._separator = '\n'
+
+    def __enter__(self) -> 'StatisticsWriter':
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.Close()
+        else:
+            self._file.close()
+            if os.path.exists(self.fileName):
+                os.remove(self.fileName)
+
+    def WriteStatistics(self, gpxSource: str | ZipMember, statistics: list[dict]):
+        """Write the statistics of the tracks of a gpx file, as returned by :func:`TrackStatistics`"""
+        for row in statistics:
+            row = {'file': str(gpxSource), **row}
+            if self._csv:
+                self._csv.writerow(row)
+            else:
+                self._file.write(self._separator + json.dumps(row))
+                self._separator = ',\n'
+
+    def Close(self):
+        if not self._csv:
+            self._file.write('\n]\n')
+        self._file.close()
@@ -1,43 +1,65 @@
+import contextlib
+import functools
 import logging
 import os
 import re
-import shutil
-import tempfile
+import xml.etree.ElementTree as ET
 import zipfile
+from typing import TYPE_CHECKING
 
 import gpxpy
-import srtm
 from gpxpy.gpx import GPXXMLSyntaxException, GPX, GPXTrackPoint
 
+from gpxpert.ElevationData import GetElevationData
+from gpxpert.GpxReader import ReadFirstTrackPoint, ReadTrackData
+from gpxpert.GpxWriter import GPXPERT_NAMESPACE, GpxWriter, TrackDataXml, WaypointXml
+from gpxpert.IncrementalManifest import IncrementalManifest
+from gpxpert.JobGraph import BoundedMap, JobGraph, OutputGroup
+from gpxpert.OutputFormats import BINARY, EXTENSIONS, GEOJSON, GPX as GPX_FORMAT, LOD_FILES, LOD_OUTPUTS, LOD_TAGS, \
+    OUTPUT_FORMATS, POLYLINE, STATISTICS_DESCRIPTION, STATISTICS_OUTPUTS
+from gpxpert.Profiler import Count, Timer
+from gpxpert.SimplifyModes import MIN_DISTANCE, RESAMPLE_MODES, SIMPLIFY_MODES
+from gpxpert.ZipMember import CloseArchives, ListZipMembers, OpenSource, ZipMember
+
+# numpy, srtm and the modules using them are imported on first use, so the CLI starts fast
+if TYPE_CHECKING:
+    import numpy as np
+
+    from gpxpert.SpatialIndex import TrackStartIndex
+    from gpxpert.TrackData import TrackData
+
 _logger = logging.getLogger(__name__)
 
+# outputs of an output group, the summary of first track points, the compressed tracks and
+# the sidecar file of the statistics of the summarized tracks
+_SUMMARY = 'summary'
+_COMPRESSED = 'compressed'
+_STATISTICS = 'statistics'
+
 VALID_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
 <gpx xmlns="http://www.topografix.com/GPX/1/1" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.topografix.com/GPX/1/1 http://www.topografix.com/GPX/1/1/gpx.xsd" version="1.1" creator="gpx.py -- https://github.com/tkrajina/gpxpy">"""
 
 
-def _GetGpxObjectFromFile(gpxFileName: str) -> GPX | None:
-    gpx = None
-    try:
-        with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
-            lines = gpxFile.readlines()
-        gpxXml = ''.join(lines)
-        headerRegex = r'^(.*?)<metadata>'
-        extensionRegex = r'<extensions>.*?</extensions>'
+def _FixGpxXml(gpxXml: str) -> str:
+    headerRegex = r'^(.*?)<metadata>'
+    extensionRegex = r'<extensions>.*?</extensions>'
+    with Timer('sanitize'):
         gpxXml = re.sub(headerRegex, VALID_HEADER + '\n<metadata>', gpxXml, flags=re.DOTALL)
-        gpxXml = re.sub(extensionRegex, '', gpxXml, flags=re.DOTALL)
-        with open(gpxFileName, 'w', encoding='utf-8') as file:
-            file.write(gpxXml)
-        with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
-            gpx = gpxpy.parse(gpxFile)
-    except GPXXMLSyntaxException:
+        return re.sub(extensionRegex, '', gpxXml, flags=re.DOTALL)
+
+
+def _GetGpxObject(gpxSource: str | ZipMember) -> GPX:
+    """Parse a gpx file or an archive member in memory, with the header and extensions fixed if that helps
+
+    The file itself is not changed. Raises if the gpx cannot be parsed.
+    """
+    with Timer('parseFallback'):
+        with OpenSource(gpxSource) as gpxStream:
+            gpxXml = gpxStream.read().decode('utf-8')
         try:
-            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
-                gpx = gpxpy.parse(gpxFile)
-        except GPXXMLSyntaxException as err:
-            _logger.error(f'Failed to parse {gpxFileName}')
-    except:
-        _logger.error(f' Fatal: Failed to parse {gpxFileName}')
-    return gpx
+            return gpxpy.parse(_FixGpxXml(gpxXml))
+        except GPXXMLSyntaxException:
+            return gpxpy.parse(gpxXml)
 
 
 def _GetFirstPointFromGpxFile(gpx: GPX) -> GPXTrackPoint:
@@ -51,18 +73,272 @@ def _GetFirstPointFromGpxFile(gpx: GPX) -> GPXTrackPoint:
             return firstPoint
 
 
+def _ReadTrackDataFromFile(gpxSource: str | ZipMember) -> 'TrackData | None':
+    from gpxpert.TrackData import TrackData
+
+    try:
+        with OpenSource(gpxSource) as gpxStream, Timer('parse'):
+            trackData = ReadTrackData(gpxStream)
+            Count('bytesRead', gpxStream.tell())
+            return trackData
+    except (ET.ParseError, ValueError):
+        _logger.debug(f'Streaming read of {gpxSource} failed, falling back to full parse')
+    return TrackData.FromGpx(_GetGpxObject(gpxSource))
+
+
+def _LoadTrackData(gpxSource: str | ZipMember, cacheDir: str | None) -> 'TrackData | None':
+    # archive members are not cached, they have no file of their own
+    if not cacheDir or isinstance(gpxSource, ZipMember):
+        return _ReadTrackDataFromFile(gpxSource)
+    from gpxpert.GpxParseCache import GpxParseCache
+
+    return GpxParseCache(cacheDir).Load(gpxSource, _ReadTrackDataFromFile)
+
+
+def _GetFirstPointFromGpxFileName(gpxSource: str | ZipMember, cacheDir: str | None = None) -> GPXTrackPoint | None:
+    if cacheDir and not isinstance(gpxSource, ZipMember):
+        from gpxpert.GpxParseCache import GpxParseCache
+
+        trackData = GpxParseCache(cacheDir).Get(gpxSource)
+        if trackData:
+            return trackData.FirstTrackPoint()
+    try:
+        with OpenSource(gpxSource) as gpxStream, Timer('parse'):
+            firstPoint = ReadFirstTrackPoint(gpxStream)
+            Count('bytesRead', gpxStream.tell())
+            return firstPoint
+    except (ET.ParseError, ValueError, OSError):
+        _logger.debug(f'Streaming read of {gpxSource} failed, falling back to full parse')
+    return _GetFirstPointFromGpxFile(_GetGpxObject(gpxSource))
+
+
+def _CallSafely(function, gpxSource: str | ZipMember, *args) -> tuple:
+    """Result of function for one gpx source and None, or None and the error if the function raises"""
+    try:
+        return function(gpxSource, *args), None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+def _LookupElevations(latitude: 'np.ndarray', longitude: 'np.ndarray',
+                      elevationDir: str | None = None) -> 'np.ndarray':
+    from gpxpert.ElevationLookup import ElevationLookup
+
+    return ElevationLookup(GetElevationData(elevationDir)).GetElevations(latitude, longitude)
+
+
+def _CompressTrackData(trackData: 'TrackData', gpxFileName: str | ZipMember, simplify: str, tolerance: float,
+                       elevationDir: str | None, lodTolerances: tuple = (), keepTime: bool = False,
+                       resample: str | None = None, resampleInterval: float = 0) -> 'TrackData':
+    """Simplify or resample and elevation-fill the track data of a single gpx file
+
+    All steps are array operations on the columnar track data. With levels of detail, the points of
+    all levels are simplified and elevation-filled at once.
+
+    Returns:
+        compressed track data, without times unless keepTime
+    """
+    from gpxpert.TrackData import MISSING_ELEVATION
+
+    Count('pointsIn', len(trackData.latitude))
+    if resample:
+        with Timer('resample'):
+            trackData.Resample(resample, resampleInterval)
+    else:
+        with Timer('simplify'):
+            if lodTolerances:
+                trackData.SimplifyLevels(simplify, lodTolerances)
+            else:
+                trackData.Simplify(simplify, tolerance)
+    Count('pointsOut', len(trackData.latitude))
+    if keepTime:
+        trackData.RoundTime()
+    else:
+        trackData.RemoveTime()
+    trackData.RoundCoordinates(5)
+    with Timer('elevation'):
+        trackData.FillElevation(functools.partial(_LookupElevations, elevationDir=elevationDir))
+    trackData.RoundElevation()
+    missingCount = int((trackData.elevation == MISSING_ELEVATION).sum()) + \
+        int((trackData.waypointElevation == MISSING_ELEVATION).sum())
+    if missingCount:
+        _logger.error(f'unable to determine elevation of {missingCount} points in {gpxFileName}')
+    return trackData
+
+
+def _ProcessGpxSource(gpxSource: str | ZipMember, outputs: tuple, cacheDir: str | None = None,
+                      simplify: str = MIN_DISTANCE, tolerance: float = 50, elevationDir: str | None = None,
+                      lodTolerances: tuple = (), statistics: str | None = None, keepTime: bool = False,
+                      resample: str | None = None, resampleInterval: float = 0) -> tuple:
+    """First track point, compressed track data and track statistics of a gpx file, the file is parsed once
+
+    Args:
+        statistics: one of gpxpert.OutputFormats.STATISTICS_OUTPUTS to compute the statistics of the
+            tracks of the summary, with STATISTICS_DESCRIPTION they are the description of the first point
+
+    Returns:
+        first point if outputs contains the summary, compressed track data if it contains the
+        compressed tracks and the statistics of each track if it contains the statistics, None otherwise
+    """
+    summaryStatistics = statistics and _SUMMARY in outputs
+    if _COMPRESSED not in outputs and not summaryStatistics:
+        return _GetFirstPointFromGpxFileName(gpxSource, cacheDir), None, None
+    trackData = _LoadTrackData(gpxSource, cacheDir)
+    if trackData is None:
+        return None, None, None
+    firstPoint = trackData.FirstTrackPoint() if _SUMMARY in outputs else None
+    trackStatistics = None
+    if summaryStatistics:
+        from gpxpert.TrackStatistics import StatisticsDescription, TrackStatistics
+
+        with Timer('statistics'):
+            trackStatistics = TrackStatistics(trackData)
+        if firstPoint and statistics == STATISTICS_DESCRIPTION:
+            firstPoint.description = StatisticsDescription(trackStatistics[0])
+    if _COMPRESSED in outputs:
+        trackData = _CompressTrackData(trackData, gpxSource, simplify, tolerance, elevationDir, lodTolerances,
+                                       keepTime, resample, resampleInterval)
+    return (firstPoint, trackData if _COMPRESSED in outputs else None,
+            trackStatistics if _STATISTICS in outputs else None)
+
+
+def _RecordedOutputs(result: tuple | None, error: str | None, outputs: tuple) -> dict:
+    """Formatted gpx a processed file contributes to each output, as recorded in the incremental manifest"""
+    if error:
+        return {output: {'waypoints': '', 'tracks': '', 'error': error} for output in outputs}
+    firstPoint, trackData, _ = result
+    recorded = {}
+    if _SUMMARY in outputs:
+        recorded[_SUMMARY] = {'waypoints': WaypointXml(firstPoint) if firstPoint else '', 'tracks': '', 'error': None}
+    if _COMPRESSED in outputs:
+        waypointXml, trackXml = TrackDataXml(trackData) if trackData else ('', '')
+        recorded[_COMPRESSED] = {'waypoints': waypointXml, 'tracks': trackXml, 'error': None}
+    return recorded
+
+
+def _Stem(fileName: str) -> str:
+    return os.path.splitext(os.path.basename(fileName))[0]
+
+
+def _ExpandArchive(archive: str | ZipMember, destinationDir: str, saveFileName: str) -> list[OutputGroup]:
+    """Output groups of an archive and all archives nested in it, each gets a summary and compressed tracks
+
+    Nested archives are written next to the outermost one, named after the archives containing them.
+
+    Raises:
+        OSError: if the archive cannot be read
+        zipfile.BadZipFile: if the file is no ZIP archive
+    """
+    group = OutputGroup(destinationDir, saveFileName, outputs=(_SUMMARY, _COMPRESSED))
+    groups = [group]
+    for member in ListZipMembers(archive):
+        if member.name.endswith('.gpx'):
+            group.sources.append(member)
+        elif member.name.endswith('.zip'):
+            groups += _ExpandNestedArchive(member, destinationDir, saveFileName + '_' + _Stem(member.name))
+    return groups
+
+
+def _ExpandNestedArchive(archive: str | ZipMember, destinationDir: str, saveFileName: str) -> list[OutputGroup]:
+    try:
+        return _ExpandArchive(archive, destinationDir, saveFileName)
+    except (OSError, zipfile.BadZipFile) as e:
+        _logger.error(f'Failed to read archive {archive}: {e}')
+        return []
+
+
+class _LazyElevationData:
+    """Class attribute that sets up srtm.py's elevation data on first access"""
+
+    def __get__(self, instance, owner):
+        return GetElevationData()
+
+
 class TrackToWaypointConverter:
-    ELEVATION_DATA = srtm.get_data()
+    ELEVATION_DATA = _LazyElevationData()
 
-    def __init__(self, contentToConvert: list | str):
+    def __init__(self, contentToConvert: list | str, jobs: int = 1, cacheDir: str | None = None,
+                 simplify: str = MIN_DISTANCE, tolerance: float = 50, elevationDir: str | None = None,
+                 gzipOutput: bool = False, incremental: bool = False, outputFormat: str = GPX_FORMAT,
+                 mergeRadius: float = 0, skipDuplicates: bool = False, lodTolerances: list | None = None,
+                 lodOutput: str = LOD_FILES, statistics: str | None = None, keepTime: bool = False,
+                 resample: str | None = None, resampleInterval: float = 10):
         """
         Args:
             contentToConvert: List of gpx files, directory that contains gpx files, or a ZIP file containing gpx files
+                Archives in the directory or nested in the ZIP file get their own summary and compressed
+                output, written by the first call of Convert or Compress.
+            jobs: number of worker processes used to process the gpx files, 0 uses all available cores
+            cacheDir: directory of a persistent parse cache, unchanged gpx files are not parsed again
+            simplify: simplification mode used by Compress, one of gpxpert.Simplify.SIMPLIFY_MODES
+            tolerance: tolerance of the simplification mode in meters
+            elevationDir: directory of local .hgt elevation tiles used instead of downloading SRTM data
+            gzipOutput: write gzip compressed .gpx.gz files
+            incremental: keep a manifest next to the output, reruns only process new or modified gpx files
+                and do not rewrite unchanged outputs, only supported for gpx output
+            outputFormat: format of the compressed tracks, one of gpxpert.OutputFormats.OUTPUT_FORMATS,
+                see :mod:`gpxpert.CompactTrackFormat` for the compact formats
+            mergeRadius: merge summary waypoints within this many meters of an earlier one, like the
+                starts of tracks at the same car park, 0 keeps all waypoints
+            skipDuplicates: skip gpx files whose track points duplicate those of an earlier file of the
+                same output, exactly or within a few meters, they are listed in duplicateFiles
+            lodTolerances: tolerances of nested levels of detail written by Compress instead of tolerance,
+                e.g. [5, 20, 50, 200], each file is parsed and elevation-filled once for all levels
+            lodOutput: one of gpxpert.OutputFormats.LOD_OUTPUTS, LOD_FILES writes one file per level,
+                LOD_TAGS one gpx file with the highest level of each point as extension, a client
+                shows the points with a level at least k at level k
+            statistics: one of gpxpert.OutputFormats.STATISTICS_OUTPUTS to add the distance, ascent, descent,
+                bounding box and duration of the tracks to the summary, STATISTICS_DESCRIPTION as description
+                of the summary waypoints, STATISTICS_CSV or STATISTICS_JSON as a sidecar file named after
+                the summary with suffix _STATISTICS, with a row per track. The files are parsed completely
+                instead of only up to their first track point.
+            keepTime: keep the times of the compressed tracks, rounded to whole seconds, for pace and timing
+                analysis. The compact formats store them as differences to the previous time.
+            resample: one of gpxpert.SimplifyModes.RESAMPLE_MODES to resample the tracks to points at a
+                fixed time or distance interval instead of simplifying them, RESAMPLE_TIME drops the
+                points without time
+            resampleInterval: interval of the resampled points in seconds or meters
         """
         self.gpxFiles: list = []
         self.destinationDir: str = ''
         self.saveFileName: str = ''
-        self.temp_dir = None
+        self.archives: list[OutputGroup] = []
+        self.failedFiles: list = []
+        self.duplicateFiles: list = []
+        self.jobs: int = jobs or os.cpu_count() or 1
+        self.cacheDir: str | None = cacheDir
+        self.simplify: str = simplify
+        self.tolerance: float = tolerance
+        self.elevationDir: str | None = elevationDir
+        self.gzipOutput: bool = gzipOutput
+        self.incremental: bool = incremental
+        self.outputFormat: str = outputFormat
+        self.mergeRadius: float = mergeRadius
+        self.skipDuplicates: bool = skipDuplicates
+        self.lodTolerances: tuple = tuple(sorted(lodTolerances or ()))
+        self.lodOutput: str = lodOutput
+        self.statistics: str | None = statistics
+        self.keepTime: bool = keepTime
+        self.resample: str | None = resample
+        self.resampleInterval: float = resampleInterval
+        if simplify not in SIMPLIFY_MODES:
+            raise ValueError(f'Unsupported simplification mode {simplify}. Please use one of {", ".join(SIMPLIFY_MODES)}')
+        if outputFormat not in OUTPUT_FORMATS:
+            raise ValueError(f'Unsupported output format {outputFormat}. Please use one of {", ".join(OUTPUT_FORMATS)}')
+        if lodOutput not in LOD_OUTPUTS:
+            raise ValueError(f'Unsupported level of detail output {lodOutput}. Please use one of {", ".join(LOD_OUTPUTS)}')
+        if len(set(self.lodTolerances)) != len(self.lodTolerances) or any(t <= 0 for t in self.lodTolerances):
+            raise ValueError(f'Levels of detail need distinct positive tolerances, not {lodTolerances}')
+        if self.lodTolerances and lodOutput == LOD_TAGS and outputFormat != GPX_FORMAT:
+            raise ValueError(f'Levels of detail as tags are only supported for {GPX_FORMAT} output')
+        if resample is not None and resample not in RESAMPLE_MODES:
+            raise ValueError(f'Unsupported resampling mode {resample}. Please use one of {", ".join(RESAMPLE_MODES)}')
+        if resample and not resampleInterval > 0:
+            raise ValueError(f'Resampling needs a positive interval, not {resampleInterval}')
+        if resample and self.lodTolerances:
+            raise ValueError('Levels of detail are simplified, they cannot be combined with resampling')
+        if statistics is not None and statistics not in STATISTICS_OUTPUTS:
+            raise ValueError(f'Unsupported statistics output {statistics}. Please use one of {", ".join(STATISTICS_OUTPUTS)}')
 
         if isinstance(contentToConvert, list):
             self.gpxFiles = contentToConvert
@@ -75,7 +351,6 @@ class TrackToWaypointConverter:
             self.saveFileName = os.path.basename(contentToConvert)
             self._ProcessGpxFilesFromDir(contentToConvert)
         elif contentToConvert.endswith('.zip'):
-            self.temp_dir = tempfile.mkdtemp()
             self.destinationDir = os.path.dirname(contentToConvert)
             self.saveFileName = os.path.basename(os.path.splitext(contentToConvert)[0])
             self._ProcessGpxFilesFromZip(contentToConvert)
@@ -92,80 +367,299 @@ class TrackToWaypointConverter:
             if filename.endswith('.gpx'):
                 self.gpxFiles.append(filename)
             elif filename.endswith('.zip'):
-                converter = TrackToWaypointConverter(filename)
-                converter.Convert()
-                converter.Compress()
+                self.archives += _ExpandNestedArchive(filename, os.path.dirname(filename), _Stem(filename))
 
     def _ProcessGpxFilesFromDir(self, directory: str):
         files = os.listdir(directory)
         self._ProcessGpxFilesFromList([os.path.join(directory, file) for file in files])
 
     def _ProcessGpxFilesFromZip(self, zip_path: str):
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(self.temp_dir)
-            self._ProcessGpxFilesFromDir(self.temp_dir)
-
-    def __del__(self):
-        # Cleanup the temporary directory when the instance is deleted
-        if self.temp_dir and os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        # gpx members are read in place, without extracting the archive
+        for member in ListZipMembers(zip_path):
+            if member.name.endswith('.gpx'):
+                self.gpxFiles.append(member)
+            elif member.name.endswith('.zip'):
+                self.archives += _ExpandNestedArchive(member, self.destinationDir,
+                                                      self.saveFileName + '_' + _Stem(member.name))
 
     def Convert(self) -> str:
-        newGpx = gpxpy.gpx.GPX()
-        newGpx.name = f'{self.saveFileName}'
-
-        for gpxFileName in self.gpxFiles:
-            gpx = _GetGpxObjectFromFile(gpxFileName)
-            firstPoint = _GetFirstPointFromGpxFile(gpx)
-            if firstPoint:
-                newGpx.waypoints.append(firstPoint)
-
-        return self._Save(newGpx)
-
-    def Compress(self) -> str:
-        newGpx = gpxpy.gpx.GPX()
-        newGpx.name = f'{self.saveFileName}'
-
-        resultList = []
-        for gpxFileName in self.gpxFiles:
-            gpx = _GetGpxObjectFromFile(gpxFileName)
-            gpx.reduce_points(min_distance=50)
-            for wpt in gpx.waypoints:
-                newWpt = gpxpy.gpx.GPXWaypoint(
-                    latitude=round(wpt.latitude, 5),
-                    longitude=round(wpt.longitude, 5),
-                    elevation=self._GetAdjustedElevation(wpt),
-                    name=wpt.name
-                )
-                newGpx.waypoints.append(newWpt)
-
-            for track in gpx.tracks:
-                newTrack = gpxpy.gpx.GPXTrack(track.name, track.description)
-                for segment in track.segments:
-                    newSegment = gpxpy.gpx.GPXTrackSegment()
-                    for point in segment.points:
-                        point.remove_time()
-                        point.latitude = round(point.latitude, 5)
-                        point.longitude = round(point.longitude, 5)
-                        point.elevation = self._GetAdjustedElevation(point)
-
-                        newSegment.points.append(point)
-                    newTrack.segments.append(newSegment)
-                newGpx.tracks.append(newTrack)
+        group = OutputGroup(self.destinationDir, self.saveFileName, self.gpxFiles, (_SUMMARY,))
+        return self._Run(group)[_SUMMARY]
+
+    def Compress(self) -> str | list[str]:
+        """Write the simplified tracks of all gpx files to one output file
 
+        Each file is parsed, simplified, elevation-filled and written before the next file is read,
+        so peak memory is bounded by the largest single track, not by the size of the directory or
+        archive. With several jobs, a few files per worker are in flight. Incremental mode keeps the
+        recorded gpx of all files in its manifest.
+
+        Returns:
+            file name of the compressed tracks, for levels of detail in files the file names of the levels
+        """
+        group = OutputGroup(self.destinationDir, self.saveFileName, self.gpxFiles, (_COMPRESSED,))
         self.saveFileName = self.saveFileName + '_SMALL'
-        return self._Save(newGpx)
+        return self._Run(group)[_COMPRESSED]
 
-    def _GetAdjustedElevation(self, point) -> int | None:
-        try:
-            ele = point.elevation or self.ELEVATION_DATA.get_elevation(point.latitude, point.longitude)
-            return round(ele)
-        except:
-            _logger.error(f'unable to determine elevation in {point.name}')
-        return
-
-    def _Save(self, newGpx) -> str:
-        newGpxFileName = os.path.join(self.destinationDir, self.saveFileName) + '.gpx'
-        with open(newGpxFileName, 'w', encoding='utf-8') as gpxFile:
-            gpxFile.write(newGpx.to_xml())
-        return newGpxFileName
+    def StartIndex(self) -> 'TrackStartIndex':
+        """Spatial index of the first track points of the gpx files and of the archives not written yet
+
+        Use it to find the tracks starting within a radius or bounding box. Files that cannot be read
+        are logged and listed in failedFiles.
+        """
+        from gpxpert.SpatialIndex import TrackStartIndex
+
+        self.failedFiles = []
+        sources = list(self.gpxFiles) + [gpxSource for group in self.archives for gpxSource in group.sources]
+        process = functools.partial(_CallSafely, _GetFirstPointFromGpxFileName)
+        starts = []
+        for gpxSource, (firstPoint, error) in zip(
+                sources, BoundedMap(process, [(gpxSource, self.cacheDir) for gpxSource in sources], self.jobs)):
+            if error:
+                self._AddFailure(gpxSource, error)
+            elif firstPoint:
+                starts.append((gpxSource, firstPoint))
+        CloseArchives()
+        return TrackStartIndex([gpxSource for gpxSource, _ in starts], [firstPoint for _, firstPoint in starts])
+
+    def _Run(self, group: OutputGroup) -> dict:
+        """Write the outputs of a group and of all archives not written yet, as one job graph
+
+        Files are processed in a process pool if more than one job is configured. Identical files
+        are processed once, the output does not depend on the number of jobs. Files that cannot be
+        processed are logged and listed in failedFiles, the other files are processed.
+
+        Returns:
+            file names of the outputs of group
+        """
+        groups = [group] + self.archives
+        self.archives = []
+        self.failedFiles = []
+        self.duplicateFiles = []
+        # each file is hashed at most once, by whichever step needs its hash first
+        contentHashes = {}
+        if self.skipDuplicates:
+            groups = self._SkipDuplicates(groups, contentHashes)
+        if self.statistics and self.statistics != STATISTICS_DESCRIPTION:
+            # each summary gets a statistics file
+            groups = [OutputGroup(outputGroup.destinationDir, outputGroup.saveFileName, outputGroup.sources,
+                                  outputGroup.outputs + (_STATISTICS,)) if _SUMMARY in outputGroup.outputs
+                      else outputGroup for outputGroup in groups]
+        group = groups[0]
+        process = functools.partial(_CallSafely, functools.partial(
+            _ProcessGpxSource, cacheDir=self.cacheDir, simplify=self.simplify, tolerance=self.tolerance,
+            elevationDir=self.elevationDir, lodTolerances=self.lodTolerances, statistics=self.statistics,
+            keepTime=self.keepTime, resample=self.resample, resampleInterval=self.resampleInterval))
+        manifest = self._OpenManifest(group, contentHashes)
+        if manifest:
+            changedSources = [gpxSource for gpxSource in group.sources
+                              if any(manifest.Get(gpxSource, output) is None for output in group.outputs)]
+            groups[0] = OutputGroup(group.destinationDir, group.saveFileName, changedSources, group.outputs)
+        groupResults = JobGraph(groups, contentHashes).Run(process, self.jobs)
+        if manifest:
+            fileNames = [self._WriteIncremental(group, next(groupResults)[1], manifest)]
+        else:
+            fileNames = [self._WriteGroup(*next(groupResults))]
+        fileNames += [self._WriteGroup(*archiveResults) for archiveResults in groupResults]
+        CloseArchives()
+        if self.failedFiles:
+            fileCount = sum(len(group.sources) for group in groups)
+            _logger.warning(f'{len(self.failedFiles)} of {fileCount} gpx files could not be read')
+        if self.duplicateFiles:
+            _logger.info(f'{len(self.duplicateFiles)} duplicate gpx files skipped')
+        return fileNames[0]
+
+    def _SkipDuplicates(self, groups: list[OutputGroup], contentHashes: dict) -> list[OutputGroup]:
+        """Groups without the gpx files duplicating an earlier file of the group, these are added to duplicateFiles
+
+        The geometry fingerprints are read without parsing the files, before any file is processed.
+        The content hashes read with them are added to contentHashes.
+        """
+        from gpxpert.TrackFingerprint import FindDuplicates, ReadFingerprint
+
+        sources = list(dict.fromkeys(gpxSource for group in groups for gpxSource in group.sources))
+        read = functools.partial(_CallSafely, ReadFingerprint)
+        with Timer('fingerprint'):
+            # unreadable files get no fingerprint, their processing reports the error
+            fingerprints = {gpxSource: fingerprint for gpxSource, (fingerprint, _) in
+                            zip(sources, BoundedMap(read, [(gpxSource,) for gpxSource in sources], self.jobs))}
+        contentHashes.update((gpxSource, fingerprint.contentHash) for gpxSource, fingerprint in fingerprints.items()
+                             if fingerprint)
+        uniqueGroups = []
+        for group in groups:
+            duplicates = FindDuplicates([fingerprints[gpxSource] for gpxSource in group.sources])
+            for i, (original, kind) in sorted(duplicates.items()):
+                _logger.info(f'Skipping {group.sources[i]}, {kind} duplicate of {group.sources[original]}')
+                self.duplicateFiles.append((str(group.sources[i]), str(group.sources[original]), kind))
+            Count('duplicatesSkipped', len(duplicates))
+            uniqueSources = [gpxSource for i, gpxSource in enumerate(group.sources) if i not in duplicates]
+            uniqueGroups.append(OutputGroup(group.destinationDir, group.saveFileName, uniqueSources, group.outputs))
+        return uniqueGroups
+
+    def _WriteGroup(self, group: OutputGroup, results) -> dict:
+        with contextlib.ExitStack() as stack:
+            writers = {output: stack.enter_context(self._OpenWriter(group, output)) for output in group.outputs}
+            # waypoints to merge are collected and written at the end, there is one per file
+            firstPoints = []
+            for gpxSource, (result, error) in results:
+                if error:
+                    self._AddFailure(gpxSource, error)
+                    continue
+                firstPoint, trackData, trackStatistics = result
+                with Timer('write'):
+                    if firstPoint and _SUMMARY in writers:
+                        if self.mergeRadius:
+                            firstPoints.append(firstPoint)
+                        else:
+                            writers[_SUMMARY].WriteWaypoint(firstPoint)
+                    if trackData and _COMPRESSED in writers:
+                        writers[_COMPRESSED].WriteTrackData(trackData)
+                    if trackStatistics and _STATISTICS in writers:
+                        writers[_STATISTICS].WriteStatistics(gpxSource, trackStatistics)
+            if firstPoints:
+                from gpxpert.SpatialIndex import MergeWaypoints
+
+                with Timer('merge'):
+                    mergedPoints = MergeWaypoints(firstPoints, self.mergeRadius)
+                Count('waypointsMerged', len(firstPoints) - len(mergedPoints))
+                for waypoint in mergedPoints:
+                    writers[_SUMMARY].WriteWaypoint(waypoint)
+        return {output: writer.fileName for output, writer in writers.items()}
+
+    def _WriteIncremental(self, group: OutputGroup, results, manifest: IncrementalManifest) -> dict:
+        """Write a group from the outputs recorded in the manifest and the results of new or modified files
+
+        The output files are not rewritten if all files are unchanged, in the same order as before.
+        """
+        results = iter(results)
+        changed = False
+        recorded = []
+        for gpxSource in group.sources:
+            values = {output: manifest.Get(gpxSource, output) for output in group.outputs}
+            if None in values.values():
+                _, (result, error) = next(results)
+                values = _RecordedOutputs(result, error, group.outputs)
+                for output, value in values.items():
+                    manifest.Set(gpxSource, output, value)
+                changed = True
+            else:
+                Count('filesUnchanged')
+            recorded.append((gpxSource, values))
+
+        fileNames = {output: self._OutputFileName(group, output) for output in group.outputs}
+        if not changed and all(manifest.Unchanged(output, group.sources) and os.path.exists(fileName)
+                               for output, fileName in fileNames.items()):
+            _logger.info(f'{group.saveFileName} is up to date')
+            for gpxSource, values in recorded:
+                for value in values.values():
+                    if value['error']:
+                        self._AddFailure(gpxSource, value['error'])
+                        break
+        else:
+            with contextlib.ExitStack() as stack:
+                writers = {output: stack.enter_context(self._OpenWriter(group, output)) for output in group.outputs}
+                for gpxSource, values in recorded:
+                    for output, value in values.items():
+                        if value['error']:
+                            self._AddFailure(gpxSource, value['error'])
+                            break
+                        with Timer('write'):
+                            writers[output].WriteWaypointXml(value['waypoints'])
+                            writers[output].WriteTrackXml(value['tracks'])
+        for output in group.outputs:
+            manifest.Save(output, group.sources)
+        return fileNames
+
+    def _OpenManifest(self, group: OutputGroup, contentHashes: dict) -> IncrementalManifest | None:
+        # archive members have no fingerprint of their own, archives are always processed completely
+        if not self.incremental or not all(isinstance(gpxSource, str) for gpxSource in group.sources):
+            return None
+        # the manifest records the formatted gpx of each file, merged waypoints depend on all files
+        if _COMPRESSED in group.outputs and self.outputFormat != GPX_FORMAT:
+            _logger.warning(f'Incremental mode is not supported for {self.outputFormat} output, '
+                            f'{group.saveFileName} is written completely')
+            return None
+        if _COMPRESSED in group.outputs and self.lodTolerances:
+            _logger.warning(f'Incremental mode is not supported for levels of detail, '
+                            f'{group.saveFileName} is written completely')
+            return None
+        if _STATISTICS in group.outputs:
+            _logger.warning(f'Incremental mode is not supported for a statistics file, '
+                            f'{group.saveFileName} is written completely')
+            return None
+        if _SUMMARY in group.outputs and self.mergeRadius:
+            _logger.warning(f'Incremental mode is not supported for merged waypoints, '
+                            f'{group.saveFileName} is written completely')
+            return None
+        settings = {'simplify': self.simplify, 'tolerance': self.tolerance, 'elevationDir': self.elevationDir}
+        # settings added later are only recorded if used, existing manifests stay valid
+        if self.statistics:
+            settings['statistics'] = self.statistics
+        if self.keepTime:
+            settings['keepTime'] = self.keepTime
+        if self.resample:
+            settings.update(resample=self.resample, resampleInterval=self.resampleInterval)
+        return IncrementalManifest(os.path.join(group.destinationDir, group.saveFileName + '.manifest.json'),
+                                   settings, contentHashes)
+
+    def _AddFailure(self, gpxSource: str | ZipMember, error: str):
+        _logger.error(f'Failed to read {gpxSource}: {error}')
+        self.failedFiles.append((str(gpxSource), error))
+
+    def _OutputFileName(self, group: OutputGroup, output: str, suffix: str = '') -> str:
+        if output == _COMPRESSED:
+            saveFileName, extension = group.saveFileName + '_SMALL' + suffix, EXTENSIONS[self.outputFormat]
+        elif output == _STATISTICS:
+            # sidecar files are not compressed
+            return os.path.join(group.destinationDir, group.saveFileName + '_STATISTICS.' + self.statistics)
+        else:
+            saveFileName, extension = group.saveFileName, EXTENSIONS[GPX_FORMAT]
+        return os.path.join(group.destinationDir, saveFileName) + extension + ('.gz' if self.gzipOutput else '')
+
+    def _OpenWriter(self, group: OutputGroup, output: str):
+        """Writer of an output, a GpxWriter or for compact compressed tracks a writer of gpxpert.CompactTrackFormat
+
+        Levels of detail written to one file per level get a :class:`_LevelWriters`, statistics a
+        :class:`gpxpert.TrackStatistics.StatisticsWriter`.
+        """
+        if output == _STATISTICS:
+            from gpxpert.TrackStatistics import StatisticsWriter
+
+            return StatisticsWriter(self._OutputFileName(group, output), self.statistics)
+        if output != _COMPRESSED:
+            return GpxWriter(self._OutputFileName(group, output), group.saveFileName)
+        if self.lodTolerances and self.lodOutput == LOD_FILES:
+            return _LevelWriters([self._OpenTrackWriter(self._OutputFileName(group, output, f'_{tolerance:g}m'),
+                                                        group.saveFileName) for tolerance in self.lodTolerances])
+        return self._OpenTrackWriter(self._OutputFileName(group, output), group.saveFileName)
+
+    def _OpenTrackWriter(self, fileName: str, name: str):
+        if self.outputFormat == GPX_FORMAT:
+            levelTags = self.lodTolerances and self.lodOutput == LOD_TAGS
+            return GpxWriter(fileName, name, {'gpxpert': GPXPERT_NAMESPACE} if levelTags else None)
+        from gpxpert.CompactTrackFormat import CompactTrackWriter, GeoJsonWriter, PolylineWriter
+
+        writerClass = {BINARY: CompactTrackWriter, GEOJSON: GeoJsonWriter, POLYLINE: PolylineWriter}[self.outputFormat]
+        return writerClass(fileName, name)
+
+
+class _LevelWriters:
+    """Writers of the compressed tracks of each level of detail, used like a single writer"""
+
+    def __init__(self, writers: list):
+        self.writers = writers
+
+    @property
+    def fileName(self) -> list[str]:
+        return [writer.fileName for writer in self.writers]
+
+    def __enter__(self) -> '_LevelWriters':
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        for writer in self.writers:
+            writer.__exit__(excType, excValue, traceback)
+
+    def WriteTrackData(self, trackData: 'TrackData'):
+        for level, writer in enumerate(self.writers):
+            writer.WriteTrackData(trackData.LevelOfDetail(level))
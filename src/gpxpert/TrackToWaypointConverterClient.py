@@ -1,7 +1,8 @@
 import logging
 import sys
 
-from common.client import parse_args, setup_logging
+from common.client import parse_track_args, setup_logging, write_profile
+from gpxpert.Profiler import EnableProfiling
 from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
 
 _logger = logging.getLogger(__name__)
@@ -14,14 +15,26 @@ def main(args):
       args (List[str]): command line parameters as list of strings
           (for example  ``["--verbose"]``).
     """
-    args = parse_args(args)
+    args = parse_track_args(args)
     setup_logging(args.loglevel)
     _logger.debug("Starting conversion")
-    tableFile = args.file
-    converter = TrackToWaypointConverter(tableFile)
-    converter.Convert()
-
-    print(f"Convert {args.file}")
+    if args.profile:
+        EnableProfiling()
+    gpxContent = args.file[0] if len(args.file) == 1 else args.file
+    converter = TrackToWaypointConverter(gpxContent, args.jobs, args.cacheDir, elevationDir=args.elevationDir,
+                                         gzipOutput=args.gzipOutput, incremental=args.incremental,
+                                         mergeRadius=args.mergeRadius, skipDuplicates=args.skipDuplicates,
+                                         statistics=args.statistics)
+    if args.compress:
+        converter.Compress()
+    else:
+        converter.Convert()
+    if args.profile:
+        write_profile(args.profile)
+
+    print(f"{'Compress' if args.compress else 'Convert'} {' '.join(args.file)}")
+    for duplicate, original, kind in converter.duplicateFiles:
+        print(f"Skipped {duplicate}, {kind} duplicate of {original}")
     _logger.info("Script ends here")
 
 
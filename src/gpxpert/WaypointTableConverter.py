@@ -1,9 +1,16 @@
+import glob
+import io
+import itertools
+import locale
 import logging
+import math
 import os.path
 import re
 
-import gpxpy
-import srtm
+from gpxpert.ElevationData import GetElevationData
+from gpxpert.GpxWriter import GpxWriter, SimpleWaypointXml
+from gpxpert.JobGraph import BoundedMap
+from gpxpert.Profiler import Count, Timer
 
 _logger = logging.getLogger(__name__)
 
@@ -11,43 +18,128 @@ PATTERN = r"(\d{2}) ([\w\s.-]+) N([\d.]+) E([\d.]+)"
 REPLACEMENT = r'<wpt lat="\3" lon="\4">\n\t<name>\1 \2</name>\n</wpt>'
 
 
-def _ExtractWaypointInformationFromMatch(match):
-    gpx_wps = gpxpy.gpx.GPXWaypoint()
+_COMPILED_PATTERN = re.compile(PATTERN)
+# the table is read and converted in chunks of about this size, split at line boundaries
+_CHUNK_BYTES = 1 << 20
+
+
+def _WaypointFromMatch(match) -> tuple[float, float, str]:
     number = int(match.group(1))
     name = str(match.group(2))
-    gpx_wps.latitude = float(match.group(3))
-    gpx_wps.longitude = float(match.group(4))
-    gpx_wps.name = f'{number} {name}'
-    return gpx_wps
+    return float(match.group(3)), float(match.group(4)), f'{number} {name}'
+
+
+def _ChunkOffsets(textFile: str, chunkBytes: int) -> list[tuple[int, int]]:
+    """Start and end offsets of chunks of about chunkBytes bytes that end at line boundaries"""
+    fileSize = os.path.getsize(textFile)
+    offsets = [0]
+    with open(textFile, 'rb') as tableFile:
+        while offsets[-1] + chunkBytes < fileSize:
+            tableFile.seek(offsets[-1] + chunkBytes)
+            tableFile.readline()
+            offsets.append(tableFile.tell())
+    if offsets[-1] < fileSize:
+        offsets.append(fileSize)
+    return list(zip(offsets[:-1], offsets[1:]))
+
+
+def _TableFiles(textFiles: str | list) -> list[str]:
+    """Table files of a file name, directory, glob pattern or list of these, directories contribute their .txt files
+
+    Raises:
+        FileNotFoundError: if a file does not exist
+    """
+    tableFiles = []
+    for textFile in [textFiles] if isinstance(textFiles, str) else textFiles:
+        if os.path.isdir(textFile):
+            tableFiles += sorted(entry.path for entry in os.scandir(textFile)
+                                 if entry.is_file() and entry.name.endswith('.txt'))
+        elif any(character in textFile for character in '*?['):
+            tableFiles += sorted(fileName for fileName in glob.glob(textFile) if os.path.isfile(fileName))
+        elif os.path.isfile(textFile):
+            tableFiles.append(textFile)
+        else:
+            raise FileNotFoundError(f'No table file {textFile}')
+    return tableFiles
+
+
+def _ConvertChunk(textFile: str, start: int, end: int, elevationDir: str | None) -> str:
+    """Waypoints of the lines of a chunk, formatted as gpx, with elevations looked up in one batch"""
+    # numpy and srtm are imported on first use, so the CLI starts fast
+    import numpy as np
+
+    from gpxpert.ElevationLookup import ElevationLookup
+
+    with open(textFile, 'rb') as tableFile, Timer('read'):
+        tableFile.seek(start)
+        data = tableFile.read(end - start)
+    Count('bytesRead', len(data))
+    with Timer('parse'):
+        # decoded and split into lines like the table file opened in text mode
+        lines = io.StringIO(data.decode(locale.getpreferredencoding(False)), newline=None).readlines()
+        waypoints = [_WaypointFromMatch(match) for match in map(_COMPILED_PATTERN.match, map(str.strip, lines))
+                     if match]
+    Count('linesIn', len(lines))
+    Count('waypointsOut', len(waypoints))
+    if not waypoints:
+        return ''
+
+    latitude, longitude, names = zip(*waypoints)
+    with Timer('elevation'):
+        elevations = ElevationLookup(GetElevationData(elevationDir)).GetElevations(np.array(latitude),
+                                                                                    np.array(longitude))
+    with Timer('format'):
+        return ''.join(SimpleWaypointXml(lat, lon, None if math.isnan(ele) else round(ele), name)
+                       for lat, lon, ele, name in zip(latitude, longitude, elevations.tolist(), names))
 
 
 class WaypointTableConverter:
-    def __init__(self, textFile):
+    def __init__(self, textFile: str | list, elevationDir: str | None = None, gzipOutput: bool = False,
+                 jobs: int = 1):
+        """
+        Args:
+            textFile: text file with one waypoint per line, a directory of .txt table files, a glob pattern,
+                or a list of these
+            elevationDir: directory of local .hgt elevation tiles used instead of downloading SRTM data
+            gzipOutput: write gzip compressed .gpx.gz files
+            jobs: number of worker processes the chunks of the tables are converted in, 0 uses all available cores
+
+        Raises:
+            FileNotFoundError: if a table file does not exist
+            ValueError: if no table file is found
+        """
         _logger.info(f'textFile to parse: {textFile}')
-        assert os.path.isfile(textFile)
-        self.textFile = textFile
-
-    def Convert(self):
-        gpx = gpxpy.gpx.GPX()
-        gpx.name = self.textFile
-        elevation_data = srtm.get_data()
-        with open(self.textFile, 'r') as tableFile:
-            lines = tableFile.readlines()
-            for line in lines:
-                match = re.match(PATTERN, line.strip())
-
-                if match:
-                    gpx_wps = _ExtractWaypointInformationFromMatch(match)
-                    gpx_wps.elevation = elevation_data.get_elevation(gpx_wps.latitude, gpx_wps.longitude)
-                    gpx.waypoints.append(gpx_wps)
-
-        gpxFileName = self._Save(gpx)
-
-        return gpxFileName
-
-    def _Save(self, gpx):
-        gpxFileName = os.path.splitext(self.textFile)[0] + '_GPX' + '.gpx'
-        with open(gpxFileName, 'w', encoding='utf-8') as gpxFile:
-            _logger.info(f'write results to: {gpxFile.name}')
-            gpxFile.write(gpx.to_xml())
-        return gpxFileName
+        self.textFiles: list[str] = _TableFiles(textFile)
+        if not self.textFiles:
+            raise ValueError(f'No table files found in {textFile}')
+        self.textFile = self.textFiles[0]
+        self.singleFile: bool = isinstance(textFile, str) and self.textFiles == [textFile]
+        self.elevationDir = elevationDir
+        self.gzipOutput = gzipOutput
+        self.jobs = jobs or os.cpu_count() or 1
+        self.chunkBytes: int = _CHUNK_BYTES
+
+    def Convert(self) -> str | list[str]:
+        """Convert each table to a <table>_GPX.gpx file next to it, chunk by chunk
+
+        Memory use does not depend on the size of the tables. All tables are converted in this process
+        or one pool of worker processes, sharing the elevation data. Waypoints are written in table
+        order, also if the chunks are converted in parallel.
+
+        Returns:
+            the gpx file name if a single table file was given, otherwise the gpx file names in table order
+        """
+        chunkOffsets = [_ChunkOffsets(textFile, self.chunkBytes) for textFile in self.textFiles]
+        calls = [(textFile, start, end, self.elevationDir)
+                 for textFile, offsets in zip(self.textFiles, chunkOffsets) for start, end in offsets]
+        chunks = BoundedMap(_ConvertChunk, calls, self.jobs)
+        gpxFileNames = []
+        for textFile, offsets in zip(self.textFiles, chunkOffsets):
+            gpxFileName = os.path.splitext(textFile)[0] + '_GPX' + ('.gpx.gz' if self.gzipOutput else '.gpx')
+            _logger.info(f'write results to: {gpxFileName}')
+            with GpxWriter(gpxFileName, textFile) as writer:
+                for waypointXml in itertools.islice(chunks, len(offsets)):
+                    with Timer('write'):
+                        writer.WriteWaypointXml(waypointXml)
+            gpxFileNames.append(gpxFileName)
+        return gpxFileNames[0] if self.singleFile else gpxFileNames
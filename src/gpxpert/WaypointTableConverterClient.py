@@ -1,7 +1,8 @@
 import logging
 import sys
 
-from common.client import parse_args, setup_logging
+from common.client import parse_args, setup_logging, write_profile
+from gpxpert.Profiler import EnableProfiling
 from gpxpert.WaypointTableConverter import WaypointTableConverter
 
 _logger = logging.getLogger(__name__)
@@ -17,11 +18,15 @@ def main(args):
     args = parse_args(args)
     setup_logging(args.loglevel)
     _logger.debug("Starting conversion")
-    tableFile = args.file
-    converter = WaypointTableConverter(tableFile)
+    if args.profile:
+        EnableProfiling()
+    tableFile = args.file[0] if len(args.file) == 1 else args.file
+    converter = WaypointTableConverter(tableFile, args.elevationDir, args.gzipOutput, args.jobs)
     converter.Convert()
+    if args.profile:
+        write_profile(args.profile)
 
-    print(f"Convert {args.file}")
+    print(f"Convert {' '.join(args.file)}")
     _logger.info("Script ends here")
 
 
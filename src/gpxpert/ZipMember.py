@@ -0,0 +1,100 @@
+import functools
+import io
+import os
+import zipfile
+
+
+def _ArchiveFile(archive: 'str | ZipMember'):
+    # nested archives are read into memory, seeking in a compressed member would decompress it over and over
+    if isinstance(archive, ZipMember):
+        with archive.Open() as archiveStream:
+            return io.BytesIO(archiveStream.read())
+    return archive
+
+
+@functools.lru_cache(maxsize=8)
+def _OpenArchive(archive: 'str | ZipMember', processId: int, modificationTime: int) -> zipfile.ZipFile:
+    # one handle per process and archive version, forked workers must not share the
+    # file position of a handle opened by their parent
+    return zipfile.ZipFile(_ArchiveFile(archive))
+
+
+class ZipMember:
+    """File inside a ZIP archive, read in place without extracting the archive
+
+    Members are picklable and can be opened in worker processes, each process reads the archive
+    through its own handle. The archive may itself be a member of another archive.
+    """
+
+    def __init__(self, archive: 'str | ZipMember', name: str):
+        """
+        Args:
+            archive: ZIP file name, or the member of an outer archive for nested archives
+            name: name of the member inside the archive
+        """
+        self.archive = archive
+        self.name = name
+
+    def ArchiveFileName(self) -> str:
+        """File name of the outermost archive"""
+        if isinstance(self.archive, ZipMember):
+            return self.archive.ArchiveFileName()
+        return self.archive
+
+    def Open(self):
+        """Open the member as a binary file object, decompressed while reading
+
+        Raises:
+            OSError: if the archive cannot be read
+            zipfile.BadZipFile: if the archive or the member is corrupt
+        """
+        return self._Archive().open(self.name)
+
+    def Size(self) -> int:
+        """Uncompressed size of the member in bytes, read from the archive directory
+
+        Raises:
+            OSError: if the archive cannot be read
+            zipfile.BadZipFile: if the archive is corrupt
+            KeyError: if the archive has no such member
+        """
+        return self._Archive().getinfo(self.name).file_size
+
+    def _Archive(self) -> zipfile.ZipFile:
+        modificationTime = os.stat(self.ArchiveFileName()).st_mtime_ns
+        return _OpenArchive(self.archive, os.getpid(), modificationTime)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ZipMember) and (self.archive, self.name) == (other.archive, other.name)
+
+    def __hash__(self) -> int:
+        return hash((self.archive, self.name))
+
+    def __str__(self) -> str:
+        return os.path.join(str(self.archive), self.name)
+
+    def __repr__(self) -> str:
+        return f'ZipMember({self.archive!r}, {self.name!r})'
+
+
+def ListZipMembers(archive: str | ZipMember) -> list[ZipMember]:
+    """All files in a ZIP archive, in archive order
+
+    Raises:
+        OSError: if the archive cannot be read
+        zipfile.BadZipFile: if the file is no ZIP archive
+    """
+    with zipfile.ZipFile(_ArchiveFile(archive)) as zipFile:
+        return [ZipMember(archive, info.filename) for info in zipFile.infolist() if not info.is_dir()]
+
+
+def OpenSource(source: str | ZipMember):
+    """Open a file name or an archive member as a binary file object"""
+    if isinstance(source, ZipMember):
+        return source.Open()
+    return open(source, 'rb')
+
+
+def CloseArchives():
+    """Close the archive handles opened by this process"""
+    _OpenArchive.cache_clear()
@@ -0,0 +1,98 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import gpxpy
+import numpy as np
+
+from gpxpert.CompactTrackFormat import DecodePolyline, EncodePolyline, ReadCompactTracks, ReadPolylineTracks
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+
+class CompactTrackFormatTest(unittest.TestCase):
+    filesToSummarize: list = ['../res/test/Track_01.gpx', '../res/test/Track_22.gpx']
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempDir)
+        self.gpxFiles = [shutil.copy(gpxFileName, self.tempDir) for gpxFileName in self.filesToSummarize]
+
+    def _Compress(self, outputFormat: str, gzipOutput: bool = False, **kwargs) -> str:
+        return TrackToWaypointConverter(self.gpxFiles, elevationDir=self.tempDir, gzipOutput=gzipOutput,
+                                        outputFormat=outputFormat, **kwargs).Compress()
+
+    def test_EncodePolyline_GoogleExample(self):
+        # setup
+        latitude, longitude = np.array([38.5, 40.7, 43.252]), np.array([-120.2, -120.95, -126.453])
+        # assert
+        assert EncodePolyline(latitude, longitude) == '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+        decodedLatitude, decodedLongitude = DecodePolyline('_p~iF~ps|U_ulLnnqC_mqNvxq`@')
+        assert decodedLatitude.tolist() == latitude.tolist()
+        assert decodedLongitude.tolist() == longitude.tolist()
+
+    def test_Binary_LoadsSameTracksAsGpx(self):
+        for gzipOutput in [False, True]:
+            # setup
+            gpxFileName = self._Compress('gpx')
+            binaryFileName = self._Compress('binary', gzipOutput)
+            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+                gpxXml = gpxFile.read()
+            gpx = ReadCompactTracks(binaryFileName).ToGpx()
+            gpx.name = os.path.basename(gpxFileName).removesuffix('_SMALL.gpx')
+            # assert
+            assert binaryFileName.endswith('_SMALL.gpxb.gz' if gzipOutput else '_SMALL.gpxb')
+            assert os.path.getsize(binaryFileName) * 5 < os.path.getsize(gpxFileName)
+            assert gpx.to_xml() == gpxXml
+
+    def test_Polyline_LoadsSameTracksAsBinary(self):
+        # setup
+        expected = ReadCompactTracks(self._Compress('binary'))
+        trackData = ReadPolylineTracks(self._Compress('polyline'))
+        # assert
+        assert trackData.ToGpx().to_xml() == expected.ToGpx().to_xml()
+
+    def test_KeepTime_LoadsSameTracksAsGpx(self):
+        # setup, times every 5 s with a break of an hour, the first point without time
+        start = datetime.datetime(2024, 5, 1, 8, tzinfo=datetime.timezone.utc)
+        for gpxFileName in self.gpxFiles:
+            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+                gpx = gpxpy.parse(gpxFile)
+            for i, point in enumerate(gpx.walk(only_points=True)):
+                point.time = None if i == 0 else start + datetime.timedelta(seconds=5 * i + 3600 * (i > 50))
+            with open(gpxFileName, 'w', encoding='utf-8') as gpxFile:
+                gpxFile.write(gpx.to_xml())
+        with open(self._Compress('gpx', keepTime=True), 'r', encoding='utf-8') as gpxFile:
+            gpxXml = gpxFile.read()
+        binaryFileName = self._Compress('binary', keepTime=True)
+        trackDatas = [ReadCompactTracks(binaryFileName), ReadPolylineTracks(self._Compress('polyline', keepTime=True))]
+        with open(self._Compress('geojson', keepTime=True), 'r', encoding='utf-8') as geoJsonFile:
+            coordTimes = [feature['properties']['coordTimes'] for feature in json.load(geoJsonFile)['features']
+                          if feature['geometry']['type'] == 'MultiLineString']
+        # assert
+        assert gpxXml.count('<time>') == gpxXml.count('<trkpt') - 2
+        for trackData in trackDatas:
+            gpx = trackData.ToGpx()
+            gpx.name = os.path.basename(binaryFileName).removesuffix('_SMALL.gpxb')
+            assert gpx.to_xml() == gpxXml
+        assert [times[0][0] for times in coordTimes] == [None, None]
+        assert all(time.startswith('2024-05-01T') for times in coordTimes for time in times[0][1:])
+        assert os.path.getsize(binaryFileName) < 2 * os.path.getsize(self._Compress('binary'))
+
+    def test_GeoJson_Features(self):
+        # setup
+        with open(self._Compress('geojson'), 'r', encoding='utf-8') as geoJsonFile:
+            features = json.load(geoJsonFile)['features']
+        trackData = ReadCompactTracks(self._Compress('binary'))
+        # assert
+        lines = [feature['geometry']['coordinates'] for feature in features
+                 if feature['geometry']['type'] == 'MultiLineString']
+        assert len(lines) == len(trackData.trackNames)
+        assert sum(len(line) for segments in lines for line in segments) == trackData.pointCount
+        assert lines[0][0][0][:2] == [trackData.longitude[0], trackData.latitude[0]]
+
+
+if __name__ == '__main__':
+    unittest.main()
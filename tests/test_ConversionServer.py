@@ -0,0 +1,151 @@
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from gpxpert.ConversionServer import ConversionServer
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+from gpxpert.WaypointTableConverter import WaypointTableConverter
+
+
+def _Request(port: int, method: str, path: str, body: bytes = b'') -> tuple[int, dict, bytes]:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request(method, path, body)
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def _BlockingConvertBatch(requests: list, elevationDir: str | None, cacheDir: str | None) -> list[tuple]:
+    """Converts like the server once the file of the release parameter of the first request exists"""
+    while requests and not os.path.exists(requests[0][2]['release']):
+        time.sleep(.01)
+    return ConversionServer.convertBatch(requests, elevationDir, cacheDir)
+
+
+class _BlockingServer(ConversionServer):
+    convertBatch = staticmethod(_BlockingConvertBatch)
+
+
+async def _WaitFor(condition):
+    while not condition():
+        await asyncio.sleep(.01)
+
+
+class ConversionServerTest(unittest.IsolatedAsyncioTestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    tableFile = '../res/test/waypoints_table.txt'
+
+    async def asyncSetUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempDir)
+        # flat elevation tiles around the waypoints of the table
+        self.elevationDir = os.path.join(self.tempDir, 'hgt')
+        os.makedirs(self.elevationDir)
+        for latitude, longitude in [(45, 8), (46, 8), (46, 9)]:
+            np.full((121, 121), 100 * latitude + 10 * longitude, dtype='>i2').tofile(
+                os.path.join(self.elevationDir, f'N{latitude:02d}E{longitude:03d}.hgt'))
+        with open(self.gpx1, 'rb') as gpxFile:
+            self.gpxData = gpxFile.read()
+
+    async def _StartServer(self, **kwargs) -> int:
+        server = ConversionServer(port=0, elevationDir=self.elevationDir, **kwargs)
+        self.addAsyncCleanup(server.Close)
+        return await server.Start()
+
+    def _Expected(self, function, fileName: str, data: bytes) -> bytes:
+        with open(os.path.join(self.tempDir, fileName), 'wb') as inputFile:
+            inputFile.write(data)
+        with open(function(inputFile.name), 'rb') as outputFile:
+            return outputFile.read()
+
+    async def test_Endpoints_SameAsConverters(self):
+        # setup
+        port = await self._StartServer()
+        summary = await asyncio.to_thread(_Request, port, 'POST', '/summarize?name=Track_01', self.gpxData)
+        compressed = await asyncio.to_thread(_Request, port, 'POST', '/compress?name=Track_01&tolerance=20',
+                                             self.gpxData)
+        with open(self.tableFile, 'rb') as tableFile:
+            table = await asyncio.to_thread(_Request, port, 'POST', '/table?name=waypoints', tableFile.read())
+            tableData = tableFile.seek(0) or tableFile.read()
+        # assert
+        assert summary[0] == compressed[0] == table[0] == 200
+        assert summary[1]['Content-Type'] == 'application/gpx+xml'
+        assert summary[2] == self._Expected(lambda gpxFile: TrackToWaypointConverter(gpxFile).Convert(),
+                                            'Track_01.gpx', self.gpxData)
+        assert compressed[2] == self._Expected(lambda gpxFile: TrackToWaypointConverter(gpxFile, tolerance=20)
+                                               .Compress(), 'Track_01.gpx', self.gpxData)
+        # the metadata name of tables is the path of the table file
+        expectedTable = self._Expected(lambda textFile: WaypointTableConverter(textFile, self.elevationDir).Convert(),
+                                       'waypoints.txt', tableData)
+        assert table[2].split(b'</metadata>')[1] == expectedTable.split(b'</metadata>')[1]
+        assert b'<ele>4680</ele>' in table[2]
+
+    async def test_Errors(self):
+        # setup
+        port = await self._StartServer(maxBodyBytes=1 << 20)
+        requests = [('POST', '/summarize?tolerance=far', self.gpxData), ('POST', '/compress?format=svg', self.gpxData),
+                    ('POST', '/unknown', b''), ('GET', '/table', b''), ('POST', '/table', bytes(2 << 20))]
+        responses = await asyncio.gather(*(asyncio.to_thread(_Request, port, method, path, body)
+                                           for method, path, body in requests))
+        stats = json.loads((await asyncio.to_thread(_Request, port, 'GET', '/stats'))[2])
+        # assert
+        assert [status for status, _, _ in responses] == [400, 400, 404, 405, 413]
+        assert stats['endpoints']['summarize']['errors'] == stats['endpoints']['compress']['errors'] == 1
+
+    async def test_MalformedGpx_Unprocessable(self):
+        # setup
+        port = await self._StartServer()
+        malformed = b'<gpx><metadata><trk><trkseg><trkpt lat="46.0"'
+        responses = await asyncio.gather(*(asyncio.to_thread(_Request, port, 'POST', path, malformed)
+                                           for path in ['/summarize?name=Broken', '/compress?name=Broken']))
+        # assert
+        assert [status for status, _, _ in responses] == [422, 422]
+
+    async def test_Backpressure_RejectsWhenQueueIsFull(self):
+        # setup, the only worker busy with a blocked batch and one request queued
+        server = _BlockingServer(port=0, elevationDir=self.elevationDir, maxQueued=1, batchSize=1)
+        self.addAsyncCleanup(server.Close)
+        port = await server.Start()
+        releaseFileName = os.path.join(self.tempDir, 'release')
+        path = f'/compress?release={releaseFileName}'
+        accepted = [asyncio.create_task(asyncio.to_thread(_Request, port, 'POST', path, self.gpxData))]
+        await _WaitFor(lambda: server.Stats()['busyWorkers'] == 1)
+        accepted.append(asyncio.create_task(asyncio.to_thread(_Request, port, 'POST', path, self.gpxData)))
+        await _WaitFor(lambda: server.Stats()['queued'] == 1)
+        rejected = await asyncio.gather(*(asyncio.to_thread(_Request, port, 'POST', path, self.gpxData)
+                                          for _ in range(4)))
+        open(releaseFileName, 'w').close()
+        responses = await asyncio.gather(*accepted)
+        stats = server.Stats()
+        # assert
+        assert [status for status, _, _ in rejected] == [503] * 4
+        assert rejected[0][1]['Retry-After'] == '1'
+        assert [status for status, _, _ in responses] == [200] * 2
+        assert stats['rejected'] == 4
+        assert stats['endpoints']['compress']['requests'] == stats['batches'] == 2
+        assert 0 < stats['endpoints']['compress']['latencyMs']['p50'] <= stats['endpoints']['compress']['latencyMs']['max']
+
+    async def test_Batching_QueuedRequestsShareAWorkerCall(self):
+        # setup
+        port = await self._StartServer(batchSize=8)
+        responses = await asyncio.gather(*(asyncio.to_thread(_Request, port, 'POST', '/summarize', self.gpxData)
+                                           for _ in range(6)))
+        stats = json.loads((await asyncio.to_thread(_Request, port, 'GET', '/stats'))[2])
+        # assert
+        assert [status for status, _, _ in responses] == [200] * 6
+        assert len({body for _, _, body in responses}) == 1
+        assert stats['batches'] * stats['meanBatchSize'] == 6
+        assert stats['endpoints']['summarize']['bytesIn'] == 6 * len(self.gpxData)
+
+
+if __name__ == '__main__':
+    unittest.main()
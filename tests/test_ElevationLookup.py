@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+from srtm.data import GeoElevationFile
+
+from gpxpert.ElevationLookup import ElevationLookup
+
+_SIDE = 121
+
+
+def _Tile(fileName: str, heights: np.ndarray) -> GeoElevationFile:
+    return GeoElevationFile(fileName, heights.astype('>i2').tobytes(), None)
+
+
+class _ElevationData:
+    """Synthetic tiles in place of srtm.py's GeoElevationData"""
+
+    def __init__(self, tiles: dict):
+        self.tiles = tiles
+        self.requests: list = []
+
+    def get_file(self, latitude, longitude):
+        self.requests.append((latitude, longitude))
+        key = (int(np.floor(latitude)), int(np.floor(longitude)))
+        if key == (47, 9):
+            raise Exception('Cannot retrieve N47E009.hgt')
+        return self.tiles.get(key)
+
+
+class ElevationLookupTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        heights = rng.integers(0, 3000, (_SIDE, _SIDE))
+        heights[5, 7] = -32768
+        ramp = np.add.outer(np.arange(_SIDE)[::-1] * 2, np.arange(_SIDE) * 3)
+        self.tiles = {(46, 8): _Tile('N46E008.hgt', heights), (46, 9): _Tile('N46E009.hgt', ramp)}
+        self.elevationData = _ElevationData(self.tiles)
+
+    def test_GetElevations_SameAsSrtm(self):
+        # setup
+        rng = np.random.default_rng(1)
+        latitude = 46 + rng.random(2000)
+        longitude = 8 + 2 * rng.random(2000)
+        latitude[0], longitude[0] = 46 + 1 - 5.5 / (_SIDE - 1), 8 + 7.5 / (_SIDE - 1)
+        elevation = ElevationLookup(self.elevationData).GetElevations(latitude, longitude)
+        # assert
+        expected = [self.tiles[(46, int(lon))].get_elevation(lat, lon) for lat, lon in zip(latitude, longitude)]
+        assert [None if np.isnan(ele) else ele for ele in elevation.tolist()] == expected
+        assert np.isnan(elevation[0])
+        assert len(self.elevationData.requests) == 2
+
+    def test_GetElevations_Interpolate(self):
+        # setup
+        latitude = np.array([46.5, 46.25 + .1 / (_SIDE - 1)])
+        longitude = np.array([9.5, 9.75 + .3 / (_SIDE - 1)])
+        elevation = ElevationLookup(self.elevationData, interpolate=True).GetElevations(latitude, longitude)
+        # assert, the ramp rises 2 m per row to the north and 3 m per column to the east
+        expected = [(1 - lat + 46) * (_SIDE - 1) * -2 + 2 * (_SIDE - 1) + (lon - 9) * (_SIDE - 1) * 3
+                    for lat, lon in zip(latitude, longitude)]
+        np.testing.assert_allclose(elevation, expected)
+
+    def test_GetElevations_DuplicatesAndMissingTiles(self):
+        # setup
+        latitude = np.array([46.123456, 46.123459, 47.5, 0.5, np.nan])
+        longitude = np.array([8.5, 8.5, 9.5, 0.5, 8.5])
+        with self.assertLogs('gpxpert.ElevationLookup', level='WARNING'):
+            elevation = ElevationLookup(self.elevationData, decimals=5).GetElevations(latitude, longitude)
+        # assert
+        assert elevation[0] == elevation[1] == self.tiles[(46, 8)].get_elevation(46.12346, 8.5)
+        assert np.isnan(elevation[2:]).all()
+        assert len(self.elevationData.requests) == 3
+
+
+if __name__ == '__main__':
+    unittest.main()
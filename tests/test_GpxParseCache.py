@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from gpxpert.GpxParseCache import GpxParseCache
+from gpxpert.GpxReader import ReadTrackData
+
+
+class GpxParseCacheTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.cache = GpxParseCache(os.path.join(self.tempDir, 'cache'))
+        self.gpxFileName = shutil.copy(self.gpx1, os.path.join(self.tempDir, 'Track.gpx'))
+        self.readFiles = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _Read(self, gpxFileName):
+        self.readFiles.append(gpxFileName)
+        return ReadTrackData(gpxFileName)
+
+    def test_Load_SecondLoadIsHit(self):
+        # setup
+        trackData = self.cache.Load(self.gpxFileName, self._Read)
+        cachedTrackData = self.cache.Load(self.gpxFileName, self._Read)
+        # assert
+        assert self.readFiles == [self.gpxFileName]
+        assert (self.cache.hits, self.cache.misses) == (1, 1)
+        assert cachedTrackData.trackNames == trackData.trackNames
+        assert cachedTrackData.waypointNames == trackData.waypointNames
+        assert np.array_equal(cachedTrackData.latitude, trackData.latitude)
+        assert np.array_equal(cachedTrackData.segmentOffsets, trackData.segmentOffsets)
+
+    def test_Load_ModifiedFileIsMiss(self):
+        # setup
+        self.cache.Load(self.gpxFileName, self._Read)
+        shutil.copy(self.gpx2, self.gpxFileName)
+        trackData = self.cache.Load(self.gpxFileName, self._Read)
+        # assert
+        assert len(self.readFiles) == 2
+        assert trackData.trackNames == ['Tess_02_Monte Lema']
+
+    def test_Load_TouchedOrCopiedFileIsHit(self):
+        # setup
+        self.cache.Load(self.gpxFileName, self._Read)
+        os.utime(self.gpxFileName, ns=(0, 0))
+        copiedFileName = shutil.copy(self.gpxFileName, os.path.join(self.tempDir, 'Copy.gpx'))
+        # assert
+        assert self.cache.Load(self.gpxFileName, self._Read)
+        assert self.cache.Load(copiedFileName, self._Read)
+        assert len(self.readFiles) == 1
+
+    def test_Get_OnlyCurrentReferencesAreHits(self):
+        # setup
+        missing = self.cache.Get(self.gpxFileName)
+        self.cache.Load(self.gpxFileName, self._Read)
+        cached = self.cache.Get(self.gpxFileName)
+        os.utime(self.gpxFileName, ns=(0, 0))
+        # assert, Get does not hash files without a current reference, so a touched file is a miss
+        assert missing is None and cached is not None
+        assert self.cache.Get(self.gpxFileName) is None
+        assert (self.cache.hits, self.cache.misses) == (1, 3)
+
+    def test_Load_EvictsLeastRecentlyUsed(self):
+        # setup
+        secondFileName = shutil.copy(self.gpx2, os.path.join(self.tempDir, 'Second.gpx'))
+        thirdFileName = os.path.join(self.tempDir, 'Third.gpx')
+        with open(self.gpxFileName, 'rb') as gpxFile, open(thirdFileName, 'wb') as thirdFile:
+            thirdFile.write(gpxFile.read() + b'\n')
+        self.cache.Load(self.gpxFileName, self._Read)
+        firstSize = self.cache.Size()
+        self.cache.Load(secondFileName, self._Read)
+        self.cache.maxBytes = self.cache.Size() + firstSize - 1
+        self.cache.Get(self.gpxFileName)
+        self.cache.Load(thirdFileName, self._Read)
+        # assert
+        assert self.cache.Size() <= self.cache.maxBytes
+        assert self.cache.Get(secondFileName) is None
+        assert self.cache.Get(self.gpxFileName)
+        assert self.cache.Get(thirdFileName)
+
+    def test_InvalidateAndClear(self):
+        # setup
+        secondFileName = shutil.copy(self.gpx2, os.path.join(self.tempDir, 'Second.gpx'))
+        self.cache.Load(self.gpxFileName, self._Read)
+        self.cache.Load(secondFileName, self._Read)
+        # assert
+        self.cache.Invalidate(self.gpxFileName)
+        assert self.cache.Get(self.gpxFileName) is None
+        assert self.cache.Get(secondFileName)
+        self.cache.Clear()
+        assert self.cache.Get(secondFileName) is None
+        assert self.cache.Size() == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import unittest
+
+import gpxpy
+
+from gpxpert.GpxReader import ReadFirstTrackPoint
+from gpxpert.GpxWriter import WaypointXml
+
+
+class GpxReaderTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def test_ReadFirstTrackPoint_SameAsFullParse(self):
+        for gpxFileName in [self.gpx1, self.gpx2]:
+            # setup
+            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+                track = gpxpy.parse(gpxFile).tracks[0]
+            expectedPoint = track.segments[0].points[0]
+            # assert
+            firstPoint = ReadFirstTrackPoint(gpxFileName)
+            assert firstPoint.latitude == expectedPoint.latitude
+            assert firstPoint.longitude == expectedPoint.longitude
+            assert firstPoint.elevation == expectedPoint.elevation
+            assert firstPoint.name == track.name
+
+    def test_ReadFirstTrackPoint_StopsAfterFirstPoint(self):
+        # setup: everything behind the first point is malformed and must not be read
+        gpxXml = b'<gpx><trk><name>Truncated</name><trkseg>' \
+                 b'<trkpt lat="46.1" lon="8.9"><ele>512</ele></trkpt><trkpt lat='
+        # assert
+        firstPoint = ReadFirstTrackPoint(io.BytesIO(gpxXml))
+        assert (firstPoint.latitude, firstPoint.longitude, firstPoint.elevation) == (46.1, 8.9, 512.0)
+        assert firstPoint.name == 'Truncated'
+
+    def test_ReadFirstTrackPoint_NameAfterSegment(self):
+        # setup: gpx puts the name before the segments, the rest of the track is not read
+        gpxXml = b'<gpx><trk><trkseg><trkpt lat="46.1" lon="8.9"/><trkpt lat=' \
+                 b'<name>Late name</name></trk></gpx>'
+        # assert
+        firstPoint = ReadFirstTrackPoint(io.BytesIO(gpxXml))
+        assert (firstPoint.latitude, firstPoint.longitude, firstPoint.elevation) == (46.1, 8.9, None)
+        assert firstPoint.name is None
+
+    def test_ReadFirstTrackPoint_FieldsSameAsFullParse(self):
+        # setup
+        gpxXml = b'<gpx xmlns="http://www.topografix.com/GPX/1/1"><trk><name>Fields</name><trkseg>' \
+                 b'<trkpt lat="46.1" lon="8.9"><ele>3.5</ele><time>2024-05-01T08:00:00Z</time>' \
+                 b'<magvar>1.5</magvar><name>p</name><cmt>c</cmt><desc>d</desc><src>s</src>' \
+                 b'<link href="https://example.com"><text>t</text><type>text/html</type></link><sym>s</sym>' \
+                 b'<type>y</type><fix>3d</fix><sat>7</sat><hdop>0.8</hdop><dgpsid>12</dgpsid></trkpt>' \
+                 b'</trkseg></trk></gpx>'
+        expectedPoint = gpxpy.parse(gpxXml.decode()).tracks[0].segments[0].points[0]
+        expectedPoint.name = 'Fields'
+        expectedPoint.time = None
+        # assert
+        assert WaypointXml(ReadFirstTrackPoint(io.BytesIO(gpxXml))) == WaypointXml(expectedPoint)
+        assert '<desc>d</desc>' in WaypointXml(expectedPoint)
+
+    def test_ReadFirstTrackPoint_NoTrack(self):
+        # setup
+        gpxXml = b'<gpx><wpt lat="46.1" lon="8.9"><name>Only a waypoint</name></wpt></gpx>'
+        # assert
+        assert ReadFirstTrackPoint(io.BytesIO(gpxXml)) is None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+import gpxpy
+import numpy as np
+
+from gpxpert import FixedPrecisionXml
+from gpxpert.GpxReader import ReadTrackData
+from gpxpert.GpxWriter import GPXPERT_NAMESPACE, GpxWriter, TrackDataXml, TrackXml, WaypointXml
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+
+class GpxWriterTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.gpx = gpxpy.gpx.GPX()
+        self.gpx.name = 'Tracks & <Waypoints>'
+        for gpxFileName in [self.gpx1, self.gpx2]:
+            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+                gpx = gpxpy.parse(gpxFile)
+            self.gpx.waypoints.append(gpxpy.gpx.GPXWaypoint(46.1, 8.9, 808, name=gpxFileName))
+            self.gpx.tracks.extend(gpx.tracks)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def test_Write_SameAsToXml(self):
+        # setup, tracks may be written before waypoints
+        gpxFileName = os.path.join(self.tempDir, 'Tracks.gpx')
+        with GpxWriter(gpxFileName, self.gpx.name) as writer:
+            writer.WriteTrack(self.gpx.tracks[0])
+            for waypoint in self.gpx.waypoints:
+                writer.WriteWaypoint(waypoint)
+            writer.StartTrack(self.gpx.tracks[1])
+            for segment in self.gpx.tracks[1].segments:
+                writer.WriteSegment(segment)
+        # assert
+        with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+            assert gpxFile.read() == self.gpx.to_xml()
+
+    def test_WriteXml_SameAsToXml(self):
+        # setup
+        gpxFileName = os.path.join(self.tempDir, 'Tracks.gpx')
+        with GpxWriter(gpxFileName, self.gpx.name) as writer:
+            writer.WriteWaypointXml(''.join(WaypointXml(waypoint) for waypoint in self.gpx.waypoints))
+            writer.WriteTrackXml(TrackXml(self.gpx.tracks[0]))
+            writer.WriteTrack(self.gpx.tracks[1])
+        # assert
+        with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+            assert gpxFile.read() == self.gpx.to_xml()
+
+    def test_TrackDataXml_SameAsToGpx(self):
+        # setup, times, fractional seconds, float and rounded elevations with missing values, tiny coordinates
+        trackData = ReadTrackData(self.gpx1)
+        trackData.time[:] = 1704067200 + np.arange(trackData.pointCount)
+        trackData.time[1] += .25
+        trackData.time[2] = float('nan')
+        trackData.elevation[3] = float('nan')
+        trackData.latitude[4], trackData.longitude[4] = 5e-05, -1e-07
+        roundedTrackData = ReadTrackData(self.gpx2)
+        roundedTrackData.RemoveTime()
+        roundedTrackData.RoundCoordinates(5)
+        roundedTrackData.elevation[0] = float('nan')
+        roundedTrackData.RoundElevation()
+        roundedTrackData.latitude[1:5] = [-0., -5e-05, 1e-05, -46.]
+        roundedTrackData.longitude[1:4] = [179.99999, -8.8859, 0.]
+        roundedTrackData.elevation[1] = -12
+        for data in [trackData, roundedTrackData]:
+            gpx = data.ToGpx()
+            # assert
+            assert TrackDataXml(data) == (''.join(WaypointXml(waypoint) for waypoint in gpx.waypoints),
+                                          ''.join(TrackXml(track) for track in gpx.tracks))
+
+    def test_TrackDataXml_PointFieldsSameAsGpxpy(self):
+        # setup, optional fields of track points are written like gpxpy does, also for rounded points
+        gpxXml = '<gpx><trk><name>T</name><trkseg>' \
+                 '<trkpt lat="46.0" lon="8.9"><ele>500.25</ele><time>2024-01-01T00:00:00Z</time><name>a</name>' \
+                 '<cmt>c &amp; d</cmt><sym>Flag</sym><sat>7</sat><hdop>1.5</hdop><dgpsid>3</dgpsid></trkpt>' \
+                 '<trkpt lat="46.1" lon="8.9"><ele>501.75</ele></trkpt>' \
+                 '<trkpt lat="46.2" lon="8.9"><magvar>2</magvar><desc>e</desc><type>t</type></trkpt>' \
+                 '</trkseg></trk></gpx>'
+        trackData = ReadTrackData(io.BytesIO(gpxXml.encode('utf-8')))
+        roundedTrackData = ReadTrackData(io.BytesIO(gpxXml.encode('utf-8')))
+        roundedTrackData.RemoveTime()
+        roundedTrackData.RoundElevation()
+        expectedGpx = gpxpy.parse(gpxXml)
+        # assert
+        assert TrackDataXml(trackData)[1] == ''.join(TrackXml(track) for track in expectedGpx.tracks)
+        for point in expectedGpx.walk(only_points=True):
+            point.time = None
+            point.elevation = None if point.elevation is None else round(point.elevation)
+        assert TrackDataXml(roundedTrackData)[1] == ''.join(TrackXml(track) for track in expectedGpx.tracks)
+
+    def test_TrackDataXml_RoundedTimesSameAsToGpx(self):
+        # setup, compressed tracks with times in whole seconds, some missing
+        trackData = ReadTrackData(self.gpx1)
+        trackData.time[:] = 1704067200 + 7 * np.arange(trackData.pointCount)
+        trackData.time[::5] = float('nan')
+        trackData.RoundCoordinates(5)
+        trackData.RoundElevation()
+        gpx = trackData.ToGpx()
+        # assert
+        assert FixedPrecisionXml.Supported(trackData.latitude, trackData.longitude, trackData.elevation, trackData.time)
+        assert TrackDataXml(trackData)[1] == ''.join(TrackXml(track) for track in gpx.tracks)
+
+    def test_TrackDataXml_LevelsSameAsToXml(self):
+        # setup, levels of rounded and of unrounded points with times
+        trackData = ReadTrackData(self.gpx1)
+        trackData.time[:] = 1704067200 + np.arange(trackData.pointCount)
+        roundedTrackData = ReadTrackData(self.gpx2)
+        roundedTrackData.RemoveTime()
+        roundedTrackData.RoundCoordinates(5)
+        roundedTrackData.RoundElevation()
+        for data in [trackData, roundedTrackData]:
+            data.levels = np.arange(data.pointCount, dtype=np.int8) % 4
+            gpx = data.ToGpx()
+            gpx.nsmap['gpxpert'] = GPXPERT_NAMESPACE
+            for point, level in zip(gpx.walk(only_points=True), data.levels.tolist()):
+                extension = ET.Element(f'{{{GPXPERT_NAMESPACE}}}lod')
+                extension.text = str(level)
+                point.extensions.append(extension)
+            gpxFileName = os.path.join(self.tempDir, 'Levels.gpx')
+            with GpxWriter(gpxFileName, gpx.name, {'gpxpert': GPXPERT_NAMESPACE}) as writer:
+                writer.WriteTrackData(data)
+            # assert
+            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+                assert gpxFile.read() == gpx.to_xml('1.1')
+
+    def test_Write_Gzip(self):
+        # setup
+        gpxFileName = os.path.join(self.tempDir, 'Tracks.gpx.gz')
+        with GpxWriter(gpxFileName, self.gpx.name) as writer:
+            for waypoint in self.gpx.waypoints:
+                writer.WriteWaypoint(waypoint)
+            for track in self.gpx.tracks:
+                writer.WriteTrack(track)
+        # assert
+        with gzip.open(gpxFileName, 'rt', encoding='utf-8') as gpxFile:
+            assert gpxFile.read() == self.gpx.to_xml()
+
+    def test_Write_ErrorRemovesFile(self):
+        # setup
+        gpxFileName = os.path.join(self.tempDir, 'Tracks.gpx')
+        with self.assertRaises(RuntimeError):
+            with GpxWriter(gpxFileName) as writer:
+                writer.WriteWaypoint(self.gpx.waypoints[0])
+                raise RuntimeError('conversion failed')
+        # assert
+        assert not os.path.exists(gpxFileName)
+
+    def test_Compress_GzipOutput(self):
+        # setup
+        gpxFiles = [shutil.copy(gpxFileName, self.tempDir) for gpxFileName in [self.gpx1, self.gpx2]]
+        with open(TrackToWaypointConverter(gpxFiles).Compress(), 'r', encoding='utf-8') as gpxFile:
+            expectedGpx = gpxFile.read()
+        gpxFileName = TrackToWaypointConverter(gpxFiles, gzipOutput=True).Compress()
+        # assert
+        assert gpxFileName.endswith('_SMALL.gpx.gz')
+        with gzip.open(gpxFileName, 'rt', encoding='utf-8') as gpxFile:
+            assert gpxFile.read() == expectedGpx
+
+
+if __name__ == '__main__':
+    unittest.main()
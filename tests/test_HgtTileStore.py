@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from gpxpert.ElevationData import GetElevationData
+from gpxpert.ElevationLookup import ElevationLookup
+from gpxpert.HgtTileStore import HgtTileStore
+from gpxpert.WaypointTableConverter import WaypointTableConverter
+
+_SIDE = 121
+
+
+class HgtTileStoreTest(unittest.TestCase):
+    tableFile = '../res/test/waypoints_table.txt'
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        # each tile has a constant height, 100 m per degree of latitude and 10 m per degree of longitude
+        for latitude, longitude in [(45, 8), (46, 8), (46, 9), (-1, -1)]:
+            tileName = f'{"N" if latitude >= 0 else "S"}{abs(latitude):02d}{"E" if longitude >= 0 else "W"}' \
+                       f'{abs(longitude):03d}.hgt'
+            heights = np.full((_SIDE, _SIDE), 100 * latitude + 10 * longitude, dtype='>i2')
+            heights.tofile(os.path.join(self.tempDir, tileName))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def test_GetFile_LeastRecentlyUsedTilesAreUnmapped(self):
+        # setup
+        store = HgtTileStore(self.tempDir, maxTiles=2)
+        store.get_file(46.5, 8.5)
+        store.get_file(45.5, 8.5)
+        store.get_file(46.1, 8.9)
+        store.get_file(46.5, 9.5)
+        # assert
+        assert store.MappedTiles() == ['N46E008', 'N46E009']
+        assert (store.hits, store.misses) == (1, 3)
+        assert store.get_file(45.5, 8.5).square_side == _SIDE
+        assert store.MappedTiles() == ['N46E009', 'N45E008']
+
+    def test_GetElevations_FromMappedTiles(self):
+        # setup
+        store = HgtTileStore(self.tempDir)
+        elevation = ElevationLookup(store).GetElevations(np.array([46.5, 45.2, -.5, 10.5]),
+                                                        np.array([8.5, 8.7, -.5, 10.5]))
+        # assert
+        np.testing.assert_array_equal(elevation, [4680, 4580, -110, np.nan])
+
+    def test_GetFile_InvalidTile(self):
+        # setup
+        with open(os.path.join(self.tempDir, 'N10E010.hgt'), 'wb') as tileFile:
+            tileFile.write(bytes(10))
+        # assert
+        with self.assertRaises(ValueError):
+            HgtTileStore(self.tempDir).get_file(10.5, 10.5)
+
+    def test_WaypointTableConverter_ElevationDir(self):
+        # setup
+        tableFile = shutil.copy(self.tableFile, self.tempDir)
+        gpxFileName = WaypointTableConverter(tableFile, elevationDir=self.tempDir).Convert()
+        # assert
+        with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+            gpx = gpxFile.read()
+        assert '  <wpt lat="46.022329" lon="8.8859">\n    <ele>4680</ele>\n' in gpx
+        assert '  <wpt lat="45.982053" lon="8.9171">\n    <ele>4580</ele>\n' in gpx
+
+    def test_GetElevationData_SharedByConverters(self):
+        # setup
+        store = GetElevationData(self.tempDir)
+        tableFile = shutil.copy(self.tableFile, self.tempDir)
+        WaypointTableConverter(tableFile, elevationDir=self.tempDir).Convert()
+        # assert, the table converter looked up its elevations in the tiles mapped by the same store
+        assert isinstance(store, HgtTileStore)
+        assert GetElevationData(self.tempDir) is store
+        assert 'N46E008' in store.MappedTiles()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+
+def _ReadFile(fileName: str) -> bytes:
+    with open(fileName, 'rb') as file:
+        return file.read()
+
+
+class IncrementalManifestTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.libraryDir = os.path.join(self.tempDir, 'library')
+        self.referenceDir = os.path.join(self.tempDir, 'reference')
+        for directory in [self.libraryDir, self.referenceDir]:
+            os.mkdir(directory)
+            shutil.copy(self.gpx1, directory)
+        self.manifestFileName = os.path.join(self.tempDir, 'library.manifest.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _AssertSameAsFullRun(self, operation: str):
+        gpxFileName = getattr(TrackToWaypointConverter(self.libraryDir, incremental=True), operation)()
+        referenceFileName = getattr(TrackToWaypointConverter(self.referenceDir), operation)()
+        assert _ReadFile(gpxFileName).replace(b'library', b'reference') == _ReadFile(referenceFileName)
+        return gpxFileName
+
+    def test_Convert_UnchangedOutputIsNotRewritten(self):
+        # setup
+        gpxFileName = self._AssertSameAsFullRun('Convert')
+        os.utime(gpxFileName, ns=(0, 0))
+        TrackToWaypointConverter(self.libraryDir, incremental=True).Convert()
+        # assert
+        assert os.stat(gpxFileName).st_mtime_ns == 0
+        with open(self.manifestFileName, 'r', encoding='utf-8') as manifestFile:
+            assert list(json.load(manifestFile)['entries']) == [os.path.join('library', 'Track_01.gpx')]
+
+    def test_Convert_AddedModifiedAndDeletedFiles(self):
+        # setup
+        self._AssertSameAsFullRun('Convert')
+        for directory in [self.libraryDir, self.referenceDir]:
+            shutil.copy(self.gpx2, directory)
+        gpxFileName = self._AssertSameAsFullRun('Convert')
+        for directory in [self.libraryDir, self.referenceDir]:
+            shutil.copy(self.gpx2, os.path.join(directory, 'Track_01.gpx'))
+            os.remove(os.path.join(directory, 'Track_22.gpx'))
+        self._AssertSameAsFullRun('Convert')
+        # assert
+        assert b'Tess_01' not in _ReadFile(gpxFileName)
+        with open(self.manifestFileName, 'r', encoding='utf-8') as manifestFile:
+            assert list(json.load(manifestFile)['entries']) == [os.path.join('library', 'Track_01.gpx')]
+
+    def test_Compress_SameAsFullRun(self):
+        # setup
+        self._AssertSameAsFullRun('Compress')
+        for directory in [self.libraryDir, self.referenceDir]:
+            shutil.copy(self.gpx2, directory)
+        # assert
+        self._AssertSameAsFullRun('Compress')
+        self._AssertSameAsFullRun('Convert')
+
+
+if __name__ == '__main__':
+    unittest.main()
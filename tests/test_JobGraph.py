@@ -0,0 +1,84 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from gpxpert.JobGraph import JobGraph, OutputGroup
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+from gpxpert.ZipMember import ListZipMembers
+
+
+def _Outputs(source, outputs: tuple) -> tuple:
+    return os.path.basename(str(source)), outputs
+
+
+class JobGraphTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.libraryDir = os.path.join(self.tempDir, 'library')
+        os.mkdir(self.libraryDir)
+        shutil.copy(self.gpx1, self.libraryDir)
+        innerZip = io.BytesIO()
+        with zipfile.ZipFile(innerZip, 'w', zipfile.ZIP_DEFLATED) as zipFile:
+            zipFile.write(self.gpx1, 'Copy_01.gpx')
+            zipFile.write(self.gpx2, 'Track_22.gpx')
+        with zipfile.ZipFile(os.path.join(self.libraryDir, 'Tracks.zip'), 'w') as zipFile:
+            zipFile.write(self.gpx2, 'Track_22.gpx')
+            zipFile.writestr('Inner.zip', innerZip.getvalue())
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def test_Run_IdenticalSourcesOnce(self):
+        # setup
+        members = ListZipMembers(os.path.join(self.libraryDir, 'Tracks.zip'))
+        groups = [OutputGroup(self.tempDir, 'a', [self.gpx1, members[0]], ('summary',)),
+                  OutputGroup(self.tempDir, 'b', [self.gpx2, self.gpx1], ('compressed',))]
+        graph = JobGraph(groups)
+        results = [(group.saveFileName, list(groupResults)) for group, groupResults in graph.Run(_Outputs, jobs=2)]
+        # assert
+        assert graph.sources == [self.gpx1, members[0]]
+        assert results == [('a', [(self.gpx1, ('Track_01.gpx', ('compressed', 'summary'))),
+                                  (members[0], ('Track_22.gpx', ('compressed', 'summary')))]),
+                           ('b', [(self.gpx2, ('Track_22.gpx', ('compressed', 'summary'))),
+                                  (self.gpx1, ('Track_01.gpx', ('compressed', 'summary')))])]
+
+    def test_Init_HashesOnlySourcesOfEqualSize(self):
+        # setup
+        copy = shutil.copy(self.gpx1, os.path.join(self.tempDir, 'Copy_01.gpx'))
+        alias = os.path.join(os.path.dirname(self.gpx1), '.', os.path.basename(self.gpx1))
+        groups = [OutputGroup(self.tempDir, 'a', [self.gpx1, self.gpx2, alias], ('summary',)),
+                  OutputGroup(self.tempDir, 'b', [copy], ('summary',))]
+        graph = JobGraph(groups)
+        # assert, the alias is found by path, the copy by content and the other file is not read
+        assert graph.sources == [self.gpx1, self.gpx2]
+        assert sorted(graph.contentHashes) == sorted([self.gpx1, copy])
+        # known hashes are not computed again
+        assert JobGraph(groups, {self.gpx1: 'known'}).sources == [self.gpx1, self.gpx2, copy]
+
+    def test_Convert_NestedArchives(self):
+        # setup
+        converter = TrackToWaypointConverter(self.libraryDir, jobs=2)
+        gpxFileName = converter.Convert()
+        with open(TrackToWaypointConverter([self.gpx1, self.gpx2]).Convert(), 'rb') as gpxFile:
+            expectedGpx = gpxFile.read()
+        # assert
+        assert sorted(os.listdir(self.tempDir)) == ['library', 'library.gpx']
+        assert sorted(os.listdir(self.libraryDir)) == ['Track_01.gpx', 'Tracks.gpx', 'Tracks.zip', 'Tracks_Inner.gpx',
+                                                       'Tracks_Inner_SMALL.gpx', 'Tracks_SMALL.gpx']
+        with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+            assert gpxFile.read().count('<wpt ') == 1
+        with open(os.path.join(self.libraryDir, 'Tracks_Inner.gpx'), 'rb') as gpxFile:
+            innerGpx = gpxFile.read()
+        assert innerGpx.split(b'<wpt ', 1)[1] == expectedGpx.split(b'<wpt ', 1)[1]
+        assert not converter.archives
+        assert not converter.failedFiles
+
+
+if __name__ == '__main__':
+    unittest.main()
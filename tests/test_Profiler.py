@@ -0,0 +1,39 @@
+import unittest
+
+from gpxpert.Profiler import Count, DisableProfiling, EnableProfiling, ProfileReport, ResetProfile, Timer
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+
+class ProfilerTest(unittest.TestCase):
+    filesToSummarize: list = ['../res/test/Track_01.gpx', '../res/test/Track_22.gpx']
+
+    def tearDown(self):
+        DisableProfiling()
+        ResetProfile()
+
+    def test_Disabled_NothingCollected(self):
+        # setup
+        ResetProfile()
+        TrackToWaypointConverter(self.filesToSummarize).Compress()
+        Count('points', 10)
+        # assert
+        assert Timer('parse') is Timer('write')
+        report = ProfileReport()
+        assert report['stages'] == {} and report['counters'] == {}
+
+    def test_Compress_StagesAndCounters(self):
+        for jobs in [1, 2]:
+            # setup
+            EnableProfiling()
+            TrackToWaypointConverter(self.filesToSummarize, jobs=jobs).Compress()
+            report = ProfileReport()
+            # assert, the stages of worker processes are collected too
+            assert {'parse', 'simplify', 'elevation', 'write'} <= set(report['stages'])
+            assert report['stages']['parse']['calls'] == 2
+            assert report['counters']['pointsIn'] == 289
+            assert report['counters']['pointsOut'] == 106
+            assert report['counters']['bytesRead'] > 0
+
+
+if __name__ == '__main__':
+    unittest.main()
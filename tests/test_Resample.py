@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from gpxpert.GpxReader import ReadTrackData
+from gpxpert.Resample import Resample
+from gpxpert.Simplify import Distance3d
+from gpxpert.SimplifyModes import RESAMPLE_DISTANCE, RESAMPLE_TIME
+
+
+def _RandomSegments(segmentSizes: list, seed: int = 0) -> tuple:
+    """Segment offsets and points of random walks, 30% without elevation and 20% without time"""
+    rng = np.random.default_rng(seed)
+    segmentOffsets = np.concatenate(([0], np.cumsum(segmentSizes))).astype(np.int64)
+    pointCount = int(segmentOffsets[-1])
+    latitude = 46 + np.cumsum(rng.normal(0, 1e-4, pointCount))
+    longitude = 8.9 + np.cumsum(rng.normal(0, 1e-4, pointCount))
+    elevation = 500 + np.cumsum(rng.normal(0, 1, pointCount))
+    elevation[rng.random(pointCount) < .3] = np.nan
+    time = 1.7e9 + np.cumsum(rng.integers(1, 10, pointCount)).astype(np.float64)
+    time[rng.random(pointCount) < .2] = np.nan
+    return segmentOffsets, latitude, longitude, elevation, time
+
+
+def _ResampleSegment(mode: str, latitude, longitude, elevation, time, interval: float) -> list:
+    """Reference of one segment, interpolated with np.interp between the known values of each column"""
+    if mode == RESAMPLE_TIME:
+        positions = time - time[0]
+    else:
+        steps = Distance3d(latitude[1:], longitude[1:], np.nan, latitude[:-1], longitude[:-1], np.nan)
+        positions = np.concatenate(([0.], np.cumsum(steps)))
+    positions = np.maximum.accumulate(positions)
+    samples = np.arange(0, positions[-1], interval)
+    samples = np.append(samples, positions[-1]) if not len(samples) or samples[-1] < positions[-1] else samples
+    columns = []
+    for values in [latitude, longitude, elevation, time]:
+        known = ~np.isnan(values)
+        columns.append(np.interp(samples, positions[known], values[known]) if known.any()
+                       else np.full(len(samples), np.nan))
+    return columns
+
+
+class ResampleTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+
+    def test_Resample_SameAsPerSegment(self):
+        for mode, interval in [(RESAMPLE_DISTANCE, 25.), (RESAMPLE_TIME, 7.)]:
+            # setup, empty segments, segments of one and two points
+            segmentOffsets, latitude, longitude, elevation, time = _RandomSegments([50, 0, 1, 2, 30, 0])
+            if mode == RESAMPLE_TIME:
+                timed = ~np.isnan(time)
+                segmentOffsets = np.concatenate(([0], np.cumsum(timed)))[segmentOffsets]
+                latitude, longitude, elevation, time = latitude[timed], longitude[timed], elevation[timed], time[timed]
+            sampleOffsets, *columns = Resample(mode, segmentOffsets, latitude, longitude, elevation, time, interval)
+            # assert
+            assert len(sampleOffsets) == len(segmentOffsets)
+            for start, stop, sampleStart, sampleStop in zip(segmentOffsets[:-1], segmentOffsets[1:],
+                                                            sampleOffsets[:-1], sampleOffsets[1:]):
+                if start == stop:
+                    assert sampleStart == sampleStop
+                    continue
+                expected = _ResampleSegment(mode, latitude[start:stop], longitude[start:stop],
+                                            elevation[start:stop], time[start:stop], interval)
+                for column, expectedColumn in zip(columns, expected):
+                    assert np.allclose(column[sampleStart:sampleStop], expectedColumn, rtol=1e-12, atol=1e-6,
+                                       equal_nan=True)
+
+    def test_TrackData_Resample(self):
+        # setup
+        trackData = ReadTrackData(self.gpx1)
+        trackData.time[:] = 1704067200 + 4 * np.arange(trackData.pointCount)
+        trackData.time[1::2] = float('nan')
+        distanceData = ReadTrackData(self.gpx1)
+        distanceData.Resample(RESAMPLE_DISTANCE, 10)
+        trackData.Resample(RESAMPLE_TIME, 30)
+        steps = Distance3d(distanceData.latitude[1:], distanceData.longitude[1:], np.nan,
+                           distanceData.latitude[:-1], distanceData.longitude[:-1], np.nan)
+        # assert, points without time are dropped
+        assert np.all(np.diff(trackData.time)[:-1] == 30)
+        assert trackData.time[[0, -1]].tolist() == [1704067200, 1704067200 + 4 * 128]
+        # samples are 10 m apart along the track, straight lines are shorter at bends
+        assert steps.max() < 10.001 and np.median(steps) > 9.9
+        assert np.isnan(distanceData.time).all()
+
+
+if __name__ == '__main__':
+    unittest.main()
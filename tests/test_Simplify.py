@@ -0,0 +1,111 @@
+import unittest
+
+import gpxpy
+import numpy as np
+
+from gpxpert.GpxReader import ReadTrackData
+from gpxpert.Simplify import DOUGLAS_PEUCKER, MIN_DISTANCE, VISVALINGAM, DouglasPeuckerIndices, \
+    MinDistanceIndices, ProjectToMeters, SimplifyIndices, SimplifyLevels, VisvalingamIndices
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+
+def _RandomTrack(pointCount: int, step: float = 2, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    heading = np.cumsum(rng.normal(0, 0.05, pointCount))
+    x = np.cumsum(step * np.cos(heading)) + rng.normal(0, 1, pointCount)
+    y = np.cumsum(step * np.sin(heading)) + rng.normal(0, 1, pointCount)
+    latitude = 46 + y / 111319.49
+    longitude = 8.9 + x / (111319.49 * np.cos(np.radians(46)))
+    elevation = 500 + np.cumsum(rng.normal(0, .5, pointCount))
+    elevation[rng.random(pointCount) < .2] = np.nan
+    return latitude, longitude, elevation
+
+
+def _DouglasPeuckerRecursive(x: np.ndarray, y: np.ndarray, tolerance: float, first: int, last: int) -> list:
+    dx, dy = x[last] - x[first], y[last] - y[first]
+    length = np.hypot(dx, dy)
+    if length > 0:
+        distance = np.abs((x[first + 1:last] - x[first]) * dy - (y[first + 1:last] - y[first]) * dx) / length
+    else:
+        distance = np.hypot(x[first + 1:last] - x[first], y[first + 1:last] - y[first])
+    if not len(distance) or distance.max() <= tolerance:
+        return [first]
+    split = first + 1 + int(np.argmax(distance))
+    return _DouglasPeuckerRecursive(x, y, tolerance, first, split) + _DouglasPeuckerRecursive(x, y, tolerance, split, last)
+
+
+class SimplifyTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def test_MinDistanceIndices_SameAsGpxpy(self):
+        for pointCount, minDistance in [(300, 10), (20000, 5), (20000, 50)]:
+            # setup
+            latitude, longitude, elevation = _RandomTrack(pointCount)
+            segment = gpxpy.gpx.GPXTrackSegment()
+            segment.points = [gpxpy.gpx.GPXTrackPoint(lat, lon, None if np.isnan(ele) else ele)
+                              for lat, lon, ele in zip(latitude.tolist(), longitude.tolist(), elevation.tolist())]
+            pointIndex = {id(point): i for i, point in enumerate(segment.points)}
+            segment.reduce_points(minDistance)
+            # assert
+            assert MinDistanceIndices(latitude, longitude, elevation, minDistance).tolist() == \
+                [pointIndex[id(point)] for point in segment.points]
+
+    def test_DouglasPeuckerIndices_SameAsRecursive(self):
+        for tolerance in [1, 5, 20]:
+            # setup
+            x, y = ProjectToMeters(*_RandomTrack(2000, seed=tolerance)[:2])
+            # closed loop, first and last point are equal
+            x[-1], y[-1] = x[0], y[0]
+            expectedIndices = _DouglasPeuckerRecursive(x, y, tolerance, 0, len(x) - 1) + [len(x) - 1]
+            # assert
+            assert DouglasPeuckerIndices(x, y, tolerance).tolist() == expectedIndices
+
+    def test_VisvalingamIndices(self):
+        # setup
+        x, y = ProjectToMeters(*_RandomTrack(2000)[:2])
+        indices = VisvalingamIndices(x, y, 5)
+        # assert
+        assert indices[0] == 0 and indices[-1] == len(x) - 1
+        assert np.all(np.diff(indices) > 0)
+        assert 2 < len(indices) < len(x) / 2
+        assert len(VisvalingamIndices(x, y, 20)) < len(indices)
+
+    def test_SimplifyIndices_Modes(self):
+        # setup
+        trackData = ReadTrackData(self.gpx2)
+        arrays = trackData.latitude, trackData.longitude, trackData.elevation
+        # assert
+        for mode in [MIN_DISTANCE, DOUGLAS_PEUCKER, VISVALINGAM]:
+            indices = SimplifyIndices(mode, *arrays, 10)
+            assert 1 < len(indices) < trackData.pointCount
+        with self.assertRaises(ValueError):
+            SimplifyIndices('unknown', *arrays, 10)
+
+    def test_SimplifyLevels_Nested(self):
+        arrays = _RandomTrack(5000)
+        for mode in [MIN_DISTANCE, DOUGLAS_PEUCKER, VISVALINGAM]:
+            # setup
+            levels = SimplifyLevels(mode, *arrays, [2, 10, 50])
+            # assert, the first level is the plain simplification, each level a subset of the previous
+            assert np.flatnonzero(levels >= 0).tolist() == SimplifyIndices(mode, *arrays, 2).tolist()
+            counts = [int((levels >= level).sum()) for level in range(3)]
+            assert counts[0] > counts[1] > counts[2] > 1
+            assert levels[0] == levels[-1] == 2
+
+    def test_Compress_DouglasPeucker(self):
+        # setup
+        converter = TrackToWaypointConverter([self.gpx1, self.gpx2], simplify=DOUGLAS_PEUCKER, tolerance=10)
+        gpxFileName = converter.Compress()
+        # assert
+        with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+            gpx = gpxpy.parse(gpxFile)
+        trackDatas = [ReadTrackData(self.gpx1), ReadTrackData(self.gpx2)]
+        assert [track.name for track in gpx.tracks] == trackDatas[0].trackNames + trackDatas[1].trackNames
+        assert 0 < gpx.get_track_points_no() < sum(trackData.pointCount for trackData in trackDatas)
+        with self.assertRaises(ValueError):
+            TrackToWaypointConverter([self.gpx1], simplify='unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
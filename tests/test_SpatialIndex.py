@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import gpxpy
+import numpy as np
+
+from gpxpert.OutputFormats import STATISTICS_DESCRIPTION
+from gpxpert.Simplify import EARTH_RADIUS
+from gpxpert.SpatialIndex import MergeWaypoints, SpatialIndex
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+
+def _Distances(latitude: np.ndarray, longitude: np.ndarray, lat: float, lon: float) -> np.ndarray:
+    latitude, longitude, lat, lon = np.radians(latitude), np.radians(longitude), np.radians(lat), np.radians(lon)
+    a = np.sin((latitude - lat) / 2) ** 2 + np.cos(latitude) * np.cos(lat) * np.sin((longitude - lon) / 2) ** 2
+    return EARTH_RADIUS * 2 * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndexTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def setUp(self):
+        # clustered points around a few car parks, near the antimeridian and the north pole
+        rng = np.random.default_rng(0)
+        centers = np.array([[46.02, 8.88], [46.03, 8.89], [-16.5, 179.999], [89.999, 20.]])
+        self.latitude = np.repeat(centers[:, 0], 500) + rng.normal(0, .002, 2000)
+        self.longitude = np.repeat(centers[:, 1], 500) + rng.normal(0, .002, 2000)
+        self.longitude = (self.longitude + 180) % 360 - 180
+        self.latitude = np.minimum(self.latitude, 90)
+        self.index = SpatialIndex(self.latitude, self.longitude, cellSize=100)
+
+    def test_QueryRadius_SameAsBruteForce(self):
+        for lat, lon, radius in [(46.02, 8.88, 150), (-16.5, -179.9995, 300), (90, 0, 500), (46.025, 8.885, 3000)]:
+            # setup
+            distances = _Distances(self.latitude, self.longitude, lat, lon)
+            # assert, up to rounding at the radius
+            found = set(self.index.QueryRadius(lat, lon, radius).tolist())
+            assert set(np.flatnonzero(distances <= radius - 1e-6).tolist()) <= found
+            assert found <= set(np.flatnonzero(distances <= radius + 1e-6).tolist())
+
+    def test_QueryBoundingBox_SameAsBruteForce(self):
+        for south, west, north, east in [(46.01, 8.87, 46.025, 8.885), (-17, 179.999, -16, -179.999)]:
+            # setup
+            if west <= east:
+                inside = (self.longitude >= west) & (self.longitude <= east)
+            else:
+                inside = (self.longitude >= west) | (self.longitude <= east)
+            inside &= (self.latitude >= south) & (self.latitude <= north)
+            # assert
+            assert self.index.QueryBoundingBox(south, west, north, east).tolist() == np.flatnonzero(inside).tolist()
+
+    def test_MergeWithin_ClustersWithinRadius(self):
+        # setup
+        leaders = self.index.MergeWithin(200)
+        uniqueLeaders = np.unique(leaders)
+        # assert, every point is within radius of its leader, leaders are further apart
+        distances = [_Distances(self.latitude[i], self.longitude[i], self.latitude[leader], self.longitude[leader])
+                     for i, leader in enumerate(leaders.tolist())]
+        assert max(distances) <= 200 + 1e-6
+        assert (leaders[uniqueLeaders] == uniqueLeaders).all()
+        for leader in uniqueLeaders.tolist():
+            others = uniqueLeaders[uniqueLeaders != leader]
+            assert _Distances(self.latitude[others], self.longitude[others],
+                              self.latitude[leader], self.longitude[leader]).min() > 200 - 1e-6
+
+    def test_MergeWaypoints_NamesMergedWaypoints(self):
+        # setup
+        waypoints = [gpxpy.gpx.GPXWaypoint(46.02, 8.88, name='A'), gpxpy.gpx.GPXWaypoint(46.03, 8.88, name='B'),
+                     gpxpy.gpx.GPXWaypoint(46.0201, 8.8801, name='C')]
+        merged = MergeWaypoints(waypoints, 50)
+        # assert
+        assert [waypoint.name for waypoint in merged] == ['A (+1)', 'B']
+        assert merged[0].description == 'A\nC'
+        waypoints[2].description = 'ascent 10 m'
+        assert MergeWaypoints(waypoints, 50)[0].description == 'A\nC: ascent 10 m'
+        assert waypoints[0].name == 'A'
+
+    def test_Convert_MergeRadius(self):
+        # setup, the same track three times
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        gpxFiles = [shutil.copy(self.gpx1, os.path.join(tempDir, f'Track_{i}.gpx')) for i in range(3)]
+        gpxFiles.append(shutil.copy(self.gpx2, tempDir))
+        with open(TrackToWaypointConverter(gpxFiles, mergeRadius=100).Convert(), 'r', encoding='utf-8') as gpxFile:
+            gpx = gpxpy.parse(gpxFile)
+        # assert
+        assert [waypoint.name for waypoint in gpx.waypoints] == ['Tess_01_Cademario - Curio (+2)',
+                                                                 'Tess_02_Monte Lema']
+
+    def test_Convert_MergeRadiusKeepsStatistics(self):
+        # setup
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        gpxFiles = [shutil.copy(self.gpx1, os.path.join(tempDir, f'Track_{i}.gpx')) for i in range(2)]
+        with open(TrackToWaypointConverter(gpxFiles[:1], statistics=STATISTICS_DESCRIPTION).Convert(), 'r',
+                  encoding='utf-8') as gpxFile:
+            statistics = gpxpy.parse(gpxFile).waypoints[0].description
+        with open(TrackToWaypointConverter(gpxFiles, mergeRadius=100, statistics=STATISTICS_DESCRIPTION).Convert(),
+                  'r', encoding='utf-8') as gpxFile:
+            gpx = gpxpy.parse(gpxFile)
+        # assert, the statistics of each merged track are kept after its name
+        assert 'km' in statistics
+        assert gpx.waypoints[0].description == f'Tess_01_Cademario - Curio: {statistics}\n' \
+                                               f'Tess_01_Cademario - Curio: {statistics}'
+
+    def test_StartIndex_TracksNearPosition(self):
+        # setup
+        starts = TrackToWaypointConverter([self.gpx1, self.gpx2]).StartIndex()
+        # assert
+        assert len(starts) == 2
+        assert [source for source, _ in starts.WithinRadius(46.02233, 8.8859, 100)] == [self.gpx1]
+        assert [source for source, _ in starts.WithinBoundingBox(45, 8, 47, 9)] == [self.gpx1, self.gpx2]
+        assert starts.WithinBoundingBox(0, 0, 1, 1) == []
+
+
+if __name__ == '__main__':
+    unittest.main()
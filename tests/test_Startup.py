@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# import time of each command line entry point, generous so a loaded machine does not fail it,
+# benchmarks/bench_startup.py checks the tighter budget of a cold start without numpy and srtm
+_IMPORT_BUDGET_MS = 500
+
+
+def _ImportInFreshInterpreter(module: str) -> tuple[float, list[str]]:
+    """Import time of a module in ms, like python -X importtime, and the heavy modules it loaded
+
+    The import time does not include the start of the interpreter itself.
+    """
+    code = f'import sys, {module}; print(",".join(m for m in ["numpy", "srtm", "requests"] if m in sys.modules))'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            env=os.environ, check=True)
+    importTime = 0.
+    for line in result.stderr.splitlines():
+        if line.endswith(f'| {module}'):
+            importTime = int(line.split('|')[1]) / 1000
+    return importTime, list(filter(None, result.stdout.strip().split(',')))
+
+
+class StartupTest(unittest.TestCase):
+    entryPoints = ['gpxpert.TrackToWaypointConverterClient', 'gpxpert.WaypointTableConverterClient',
+                   'gpxpert.ConversionServerClient']
+
+    def test_EntryPoints_DoNotImportHeavyModules(self):
+        for module in self.entryPoints:
+            # setup
+            _, heavyModules = _ImportInFreshInterpreter(module)
+            # assert
+            assert heavyModules == [], f'{module} imports {heavyModules}'
+
+    def test_EntryPoints_ImportTimeWithinBudget(self):
+        for module in self.entryPoints:
+            # setup, the best of three runs
+            importTime = min(_ImportInFreshInterpreter(module)[0] for _ in range(3))
+            # assert
+            assert 0 < importTime < _IMPORT_BUDGET_MS, f'{module} takes {importTime} ms to import'
+
+
+if __name__ == '__main__':
+    unittest.main()
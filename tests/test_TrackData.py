@@ -0,0 +1,78 @@
+import io
+import unittest
+
+import gpxpy
+import numpy as np
+
+from gpxpert.GpxReader import ReadTrackData
+from gpxpert.TrackData import MISSING_ELEVATION, TrackData
+
+_FIELDS_GPX = b'<gpx><trk><name>T</name><trkseg>' \
+    b'<trkpt lat="46.0" lon="8.9"><ele>500</ele><name>a</name><sym>Flag</sym></trkpt>' \
+    b'<trkpt lat="46.1" lon="8.9"></trkpt>' \
+    b'<trkpt lat="46.2" lon="8.9"><desc>c</desc><sat>7</sat></trkpt></trkseg></trk></gpx>'
+
+
+class TrackDataTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def test_ReducePoints_SameAsGpxpy(self):
+        for gpxFileName in [self.gpx1, self.gpx2]:
+            # setup
+            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+                gpx = gpxpy.parse(gpxFile)
+            gpx.reduce_points(min_distance=50)
+            expectedPoints = [(p.latitude, p.longitude) for p in gpx.walk(only_points=True)]
+            trackData = ReadTrackData(gpxFileName)
+            trackData.ReducePoints(minDistance=50)
+            # assert
+            assert list(zip(trackData.latitude.tolist(), trackData.longitude.tolist())) == expectedPoints
+
+    def test_RoundCoordinates_SameAsRound(self):
+        # setup
+        trackData = ReadTrackData(self.gpx1)
+        expectedLatitude = [round(lat, 5) for lat in trackData.latitude.tolist()]
+        trackData.RoundCoordinates(5)
+        # assert
+        assert trackData.latitude.tolist() == expectedLatitude
+
+    def test_FillAndRoundElevation(self):
+        # setup
+        trackData = ReadTrackData(self.gpx1)
+        trackData.elevation[:3] = [np.nan, 0, 700.4]
+        trackData.FillElevation(lambda lat, lon: np.where(lat > 46.0223, 1000.5, np.nan))
+        trackData.RoundElevation()
+        # assert
+        assert trackData.elevation.dtype == np.int32
+        assert trackData.elevation[:3].tolist() == [1000, MISSING_ELEVATION, 700]
+        points = trackData.ToGpx().tracks[0].segments[0].points
+        assert [point.elevation for point in points[:3]] == [1000, None, 700]
+
+    def test_RemoveTime(self):
+        # setup
+        trackData = ReadTrackData(self.gpx1)
+        trackData.time[:] = 1718745600.0
+        trackData.RemoveTime()
+        # assert
+        assert np.isnan(trackData.time).all()
+        assert trackData.ToGpx().tracks[0].segments[0].points[0].time is None
+
+    def test_PointFields_KeptBySelectPointsAndSave(self):
+        # setup
+        trackData = ReadTrackData(io.BytesIO(_FIELDS_GPX))
+        trackData.SelectPoints(np.array([False, True, True]))
+        savedFile = io.BytesIO()
+        trackData.Save(savedFile)
+        loadedTrackData = TrackData.Load(io.BytesIO(savedFile.getvalue()))
+        # assert, the fields of the dropped first point are gone, those of the last point are kept
+        for data in [trackData, loadedTrackData]:
+            assert data.fieldIndices.tolist() == [1]
+            points = data.ToGpx().tracks[0].segments[0].points
+            assert [(point.description, point.satellites, point.symbol) for point in points] == \
+                [(None, None, None), ('c', 7, None)]
+        assert ReadTrackData(io.BytesIO(_FIELDS_GPX)).FirstTrackPoint().symbol == 'Flag'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import gpxpy
+import numpy as np
+
+from gpxpert.GpxReader import ReadTrackData
+from gpxpert.JobGraph import ContentHash
+from gpxpert.TrackFingerprint import EXACT, NEAR, FindDuplicates, ReadFingerprint, TrackFingerprint
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+
+class TrackFingerprintTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempDir)
+        self.original = shutil.copy(self.gpx1, os.path.join(self.tempDir, 'A_Ride.gpx'))
+        self.other = shutil.copy(self.gpx2, os.path.join(self.tempDir, 'B_Other.gpx'))
+        with open(self.gpx1, 'r', encoding='utf-8') as gpxFile:
+            gpx = gpxpy.parse(gpxFile)
+        # the same ride exported again under another name
+        gpx.tracks[0].name = 'Renamed ride'
+        self.exactCopy = os.path.join(self.tempDir, 'C_Export.gpx')
+        with open(self.exactCopy, 'w', encoding='utf-8') as gpxFile:
+            gpxFile.write(gpx.to_xml())
+        # and recorded with half the points and a few meters of noise
+        rng = np.random.default_rng(0)
+        for segment in gpx.tracks[0].segments:
+            segment.points = segment.points[::2]
+            for point in segment.points:
+                point.latitude += rng.normal(0, 2e-5)
+                point.longitude += rng.normal(0, 2e-5)
+        self.nearCopy = os.path.join(self.tempDir, 'D_Recorded.gpx')
+        with open(self.nearCopy, 'w', encoding='utf-8') as gpxFile:
+            gpxFile.write(gpx.to_xml())
+
+    def test_ReadFingerprint_SameAsParsed(self):
+        for gpxFileName in [self.gpx1, self.exactCopy]:
+            # setup
+            trackData = ReadTrackData(gpxFileName)
+            expected = TrackFingerprint(trackData.latitude, trackData.longitude)
+            fingerprint = ReadFingerprint(gpxFileName)
+            # assert
+            assert fingerprint.exactHash == expected.exactHash
+            assert fingerprint.samples.tolist() == expected.samples.tolist()
+            assert fingerprint.contentHash == ContentHash(gpxFileName)
+
+    def test_ReadFingerprint_ChunkedAndParsedSameAsParsed(self):
+        # setup, a file read in several chunks with both attribute orders and one with another attribute first
+        points = ''.join(f'<trkpt lat="{46 + i * 1e-5:.5f}" lon="{8 + i * 1e-5:.5f}"></trkpt>' if i % 2 else
+                         f'<trkpt lon="{8 + i * 1e-5:.5f}" lat="{46 + i * 1e-5:.5f}"><ele>5</ele></trkpt>'
+                         for i in range(40000))
+        largeGpx = os.path.join(self.tempDir, 'E_Large.gpx')
+        unusualGpx = os.path.join(self.tempDir, 'F_Unusual.gpx')
+        for gpxFileName, trackPoints in [(largeGpx, points),
+                                         (unusualGpx, points[:1000] + '<trkpt id="1" lat="46" lon="8"></trkpt>')]:
+            with open(gpxFileName, 'w', encoding='utf-8') as gpxFile:
+                gpxFile.write(f'<gpx><trk><trkseg>{trackPoints}</trkseg></trk></gpx>')
+            trackData = ReadTrackData(gpxFileName)
+            expected = TrackFingerprint(trackData.latitude, trackData.longitude)
+            fingerprint = ReadFingerprint(gpxFileName)
+            # assert
+            assert fingerprint.exactHash == expected.exactHash
+            assert fingerprint.contentHash == ContentHash(gpxFileName)
+        assert os.path.getsize(largeGpx) > 1 << 20
+
+    def test_FindDuplicates_ExactAndNear(self):
+        # setup
+        fingerprints = [ReadFingerprint(gpxFileName)
+                        for gpxFileName in [self.original, self.other, self.exactCopy, self.nearCopy]]
+        # assert
+        assert FindDuplicates(fingerprints + [None]) == {2: (0, EXACT), 3: (0, NEAR)}
+        assert FindDuplicates([fingerprints[1], fingerprints[3], fingerprints[0]]) == {2: (1, NEAR)}
+
+    def test_Compress_SkipDuplicates(self):
+        # setup
+        with open(TrackToWaypointConverter([self.original, self.other]).Compress(), 'r', encoding='utf-8') as gpxFile:
+            expectedGpx = gpxFile.read()
+        converter = TrackToWaypointConverter([self.original, self.other, self.exactCopy, self.nearCopy],
+                                             jobs=2, skipDuplicates=True)
+        with open(converter.Compress(), 'r', encoding='utf-8') as gpxFile:
+            gpx = gpxFile.read()
+        # assert, the same tracks in a file of another name
+        assert gpx.split('</metadata>')[1] == expectedGpx.split('</metadata>')[1]
+        assert converter.duplicateFiles == [(self.exactCopy, self.original, EXACT),
+                                            (self.nearCopy, self.original, NEAR)]
+
+
+if __name__ == '__main__':
+    unittest.main()
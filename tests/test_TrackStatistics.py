@@ -0,0 +1,119 @@
+import csv
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import gpxpy
+import numpy as np
+
+from gpxpert.GpxReader import ReadTrackData
+from gpxpert.OutputFormats import STATISTICS_CSV, STATISTICS_DESCRIPTION, STATISTICS_JSON
+from gpxpert.TrackData import TrackData
+from gpxpert.TrackStatistics import StatisticsDescription, TrackStatistics
+from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
+
+
+def _TimedGpx() -> gpxpy.gpx.GPX:
+    """Two tracks with times, a second segment, points without elevation and a track without points"""
+    rng = np.random.default_rng(0)
+    start = datetime.datetime(2024, 5, 1, 8, tzinfo=datetime.timezone.utc)
+    gpx = gpxpy.gpx.GPX()
+    for trackIndex, segmentSizes in enumerate([[300, 40], [], [1, 150]]):
+        track = gpxpy.gpx.GPXTrack(f'Track {trackIndex}')
+        for size in segmentSizes:
+            segment = gpxpy.gpx.GPXTrackSegment()
+            latitude = 46 + np.cumsum(rng.normal(0, 1e-4, size))
+            longitude = 8.9 + np.cumsum(rng.normal(0, 1e-4, size))
+            elevation = 500 + np.cumsum(rng.normal(0, 2, size))
+            for i, (lat, lon, ele) in enumerate(zip(latitude.tolist(), longitude.tolist(), elevation.tolist())):
+                segment.points.append(gpxpy.gpx.GPXTrackPoint(
+                    lat, lon, None if i % 7 == 3 else ele, start + datetime.timedelta(seconds=3 * i)))
+            track.segments.append(segment)
+            start += datetime.timedelta(hours=1)
+        gpx.tracks.append(track)
+    return gpx
+
+
+class TrackStatisticsTest(unittest.TestCase):
+    gpx1 = '../res/test/Track_01.gpx'
+    gpx2 = '../res/test/Track_22.gpx'
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempDir)
+
+    def test_TrackStatistics_SameAsGpxpy(self):
+        gpxs = [_TimedGpx()]
+        for gpxFileName in [self.gpx1, self.gpx2]:
+            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+                gpxs.append(gpxpy.parse(gpxFile))
+        for gpx in gpxs:
+            # setup
+            statistics = TrackStatistics(TrackData.FromGpx(gpx))
+            # assert
+            assert [track['track'] for track in statistics] == [track.name for track in gpx.tracks]
+            for track, trackStatistics in zip(gpx.tracks, statistics):
+                bounds = track.get_bounds()
+                uphill, downhill = track.get_uphill_downhill()
+                assert trackStatistics['points'] == track.get_points_no()
+                assert np.isclose(trackStatistics['distance'], track.length_2d(), rtol=1e-12)
+                if track.segments:
+                    assert np.isclose(trackStatistics['ascent'], uphill, rtol=1e-12)
+                    assert np.isclose(trackStatistics['descent'], downhill, rtol=1e-12)
+                    assert [trackStatistics[key] for key in ['minLatitude', 'minLongitude', 'maxLatitude',
+                                                             'maxLongitude']] == \
+                           [bounds.min_latitude, bounds.min_longitude, bounds.max_latitude, bounds.max_longitude]
+                    assert trackStatistics['duration'] == track.get_duration()
+                else:
+                    assert trackStatistics['ascent'] is trackStatistics['minLatitude'] is None
+                    assert trackStatistics['duration'] is None
+        assert gpxs[0].tracks[2].get_duration() == 447
+
+    def test_StatisticsDescription(self):
+        # setup
+        statistics = TrackStatistics(TrackData.FromGpx(_TimedGpx()))
+        # assert
+        assert StatisticsDescription(statistics[0]) == \
+               '4.04 km, ascent 127 m, descent 156 m, duration 0:16:54, bounds 45.99884,8.89843 46.00115,8.90075'
+        assert StatisticsDescription(statistics[1]) == '0.00 km'
+
+    def test_Convert_Statistics(self):
+        # setup
+        timedGpx = os.path.join(self.tempDir, 'Timed.gpx')
+        with open(timedGpx, 'w', encoding='utf-8') as gpxFile:
+            gpxFile.write(_TimedGpx().to_xml())
+        gpxFileNames = [shutil.copy(gpxFileName, self.tempDir) for gpxFileName in [self.gpx1, self.gpx2]] + [timedGpx]
+        expected = [{'file': gpxFileName, **trackStatistics} for gpxFileName in gpxFileNames
+                    for trackStatistics in TrackStatistics(ReadTrackData(gpxFileName))]
+        with open(TrackToWaypointConverter(gpxFileNames).Convert(), 'r', encoding='utf-8') as gpxFile:
+            plainGpx = gpxFile.read()
+        with open(TrackToWaypointConverter(gpxFileNames, statistics=STATISTICS_DESCRIPTION).Convert(), 'r',
+                  encoding='utf-8') as gpxFile:
+            described = gpxpy.parse(gpxFile)
+        sidecars = {}
+        for statisticsFormat in [STATISTICS_CSV, STATISTICS_JSON]:
+            summaryFileName = TrackToWaypointConverter(gpxFileNames, jobs=2, statistics=statisticsFormat).Convert()
+            with open(summaryFileName, 'r', encoding='utf-8') as gpxFile:
+                assert gpxFile.read() == plainGpx
+            with open(summaryFileName.removesuffix('.gpx') + '_STATISTICS.' + statisticsFormat, 'r',
+                      encoding='utf-8', newline='') as statisticsFile:
+                sidecars[statisticsFormat] = list(csv.DictReader(statisticsFile)) \
+                    if statisticsFormat == STATISTICS_CSV else json.load(statisticsFile)
+        # assert, the description holds the statistics of the first track of each file
+        assert [waypoint.description for waypoint in described.waypoints] == \
+               [StatisticsDescription(row) for row in expected if row['track'] in ['Tess_01_Cademario - Curio',
+                                                                                   'Tess_02_Monte Lema', 'Track 0']]
+        for waypoint in described.waypoints:
+            waypoint.description = None
+        assert described.to_xml() == gpxpy.parse(plainGpx).to_xml()
+        assert sidecars[STATISTICS_JSON] == expected
+        assert sidecars[STATISTICS_CSV] == [{key: '' if value is None else str(value) for key, value in row.items()}
+                                            for row in expected]
+        assert [row['duration'] for row in expected] == [None, None, 1014, None, 447]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,16 @@
+import datetime
 import os
+import shutil
+import tempfile
+import tracemalloc
 import unittest
+import zipfile
 
+import gpxpy
+import numpy as np
+
+from gpxpert.OutputFormats import BINARY, LOD_TAGS
+from gpxpert.SimplifyModes import DOUGLAS_PEUCKER, RESAMPLE_DISTANCE, RESAMPLE_TIME
 from gpxpert.TrackToWaypointConverter import TrackToWaypointConverter
 
 
@@ -55,6 +65,60 @@ class TrackToWaypointConverterTest(unittest.TestCase):
         with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
             assert expectedWaypointString in gpxFile.read()
 
+    def test_Convert_Parallel_SameAsSerial(self):
+        # setup
+        with open(TrackToWaypointConverter(self.filesToSummarize).Convert(), 'rb') as gpxFile:
+            serialGpx = gpxFile.read()
+        with open(TrackToWaypointConverter(self.filesToSummarize, jobs=2).Convert(), 'rb') as gpxFile:
+            parallelGpx = gpxFile.read()
+        # assert
+        assert parallelGpx == serialGpx
+
+    def test_Compress_Parallel_SameAsSerial(self):
+        # setup
+        with open(TrackToWaypointConverter(self.filesToSummarize).Compress(), 'rb') as gpxFile:
+            serialGpx = gpxFile.read()
+        with open(TrackToWaypointConverter(self.filesToSummarize, jobs=2).Compress(), 'rb') as gpxFile:
+            parallelGpx = gpxFile.read()
+        # assert
+        assert parallelGpx == serialGpx
+
+    def test_Convert_ZipWithBrokenMember(self):
+        # setup
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        zipFileName = os.path.join(tempDir, 'Tracks.zip')
+        with zipfile.ZipFile(zipFileName, 'w', zipfile.ZIP_DEFLATED) as zipFile:
+            zipFile.write(self.gpx1, 'Track_01.gpx')
+            zipFile.writestr('Broken.gpx', '<gpx><trk><trkseg><trkpt lat="46.0"')
+            zipFile.write(self.gpx2, 'Track_22.gpx')
+        for jobs in [1, 2]:
+            converter = TrackToWaypointConverter(zipFileName, jobs=jobs)
+            with open(converter.Convert(), 'r', encoding='utf-8') as gpxFile:
+                gpx = gpxFile.read()
+            # assert
+            assert gpx.count('<wpt ') == 2
+            assert [fileName for fileName, _ in converter.failedFiles] == [os.path.join(zipFileName, 'Broken.gpx')]
+            assert sorted(os.listdir(tempDir)) == ['Tracks.gpx', 'Tracks.zip']
+
+    def test_Convert_BrokenFile(self):
+        # setup
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        brokenFileName = os.path.join(tempDir, 'Broken.gpx')
+        brokenXml = '<gpx><metadata><trk><trkseg><trkpt lat="46.0"'
+        with open(brokenFileName, 'w', encoding='utf-8') as brokenFile:
+            brokenFile.write(brokenXml)
+        for jobs in [1, 2]:
+            converter = TrackToWaypointConverter([self.gpx1, brokenFileName], jobs=jobs)
+            with open(converter.Convert(), 'r', encoding='utf-8') as gpxFile:
+                gpx = gpxFile.read()
+            # assert, the failure is listed like that of an archive member and the file is left as it is
+            assert gpx.count('<wpt ') == 1
+            assert [fileName for fileName, _ in converter.failedFiles] == [brokenFileName]
+            with open(brokenFileName, 'r', encoding='utf-8') as brokenFile:
+                assert brokenFile.read() == brokenXml
+
     def test_Compress(self):
         return
         # setup
@@ -112,6 +176,98 @@ class TrackToWaypointConverterTest(unittest.TestCase):
         with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
             assert expectedWaypointString in gpxFile.read()
 
+    def test_Compress_PeakMemoryIndependentOfFileCount(self):
+        # setup, tracks of random walks with steps of about 100 m, nearly all points are kept
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        library = os.path.join(tempDir, 'library')
+        os.makedirs(library)
+        rng = np.random.default_rng(0)
+        for i in range(8):
+            steps = rng.normal(0, 1e-3, (4000, 3)) * [1, 1, 1e4]
+            latitude, longitude, elevation = (np.cumsum(steps, axis=0) + [46, 8.9, 800]).T
+            points = ''.join(f'<trkpt lat="{lat:.6f}" lon="{lon:.6f}"><ele>{ele:.1f}</ele></trkpt>'
+                             for lat, lon, ele in zip(latitude, longitude, elevation))
+            with open(os.path.join(library, f'Track_{i:02d}.gpx'), 'w', encoding='utf-8') as gpxFile:
+                gpxFile.write(f'<gpx version="1.1"><trk><name>{i}</name><trkseg>{points}</trkseg></trk></gpx>')
+        archive = shutil.make_archive(os.path.join(tempDir, 'archive'), 'zip', library)
+
+        def PeakMemory(contentToConvert) -> int:
+            tracemalloc.start()
+            try:
+                TrackToWaypointConverter(contentToConvert, simplify=DOUGLAS_PEUCKER, tolerance=1).Compress()
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        # imports are done before measuring
+        TrackToWaypointConverter(os.path.join(library, 'Track_00.gpx')).Compress()
+        singleFilePeak = PeakMemory(os.path.join(library, 'Track_00.gpx'))
+        # assert, one file is held at a time
+        assert PeakMemory(library) < 1.1 * singleFilePeak
+        assert PeakMemory(archive) < 1.1 * singleFilePeak
+    def test_Compress_LevelsOfDetail(self):
+        # setup
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        gpxFiles = [shutil.copy(gpxFile, tempDir) for gpxFile in self.filesToSummarize]
+
+        def Parse(gpxFileName: str):
+            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+                return gpxpy.parse(gpxFile)
+
+        levelFileNames = TrackToWaypointConverter(gpxFiles, lodTolerances=[50, 5, 200]).Compress()
+        levels = [Parse(gpxFileName) for gpxFileName in levelFileNames]
+        # the tags and the plain compression are written to the same file
+        tags = Parse(TrackToWaypointConverter(gpxFiles, lodTolerances=[5, 50, 200], lodOutput=LOD_TAGS).Compress())
+        finest = Parse(TrackToWaypointConverter(gpxFiles, tolerance=5).Compress())
+        points = [[(point.latitude, point.longitude) for point in level.walk(only_points=True)] for level in levels]
+        taggedLevels = [int(point.extensions[0].text) for point in tags.walk(only_points=True)]
+        # assert, the finest level is the plain compression, coarser levels are subsets of it
+        assert [os.path.basename(fileName) for fileName in levelFileNames] == \
+            [f'Track_01_Track_22_SUMMARY_SMALL_{tolerance}m.gpx' for tolerance in [5, 50, 200]]
+        assert levels[0].to_xml() == finest.to_xml()
+        assert len(points[0]) > len(points[1]) > len(points[2])
+        for level in range(1, 3):
+            assert set(points[level]) <= set(points[level - 1])
+            assert len(points[level]) == sum(tag >= level for tag in taggedLevels)
+        with self.assertRaises(ValueError):
+            TrackToWaypointConverter(gpxFiles, lodTolerances=[5, 50], lodOutput=LOD_TAGS, outputFormat=BINARY)
+
+
+    def test_Compress_Resample(self):
+        # setup, copies with a point every 4 s
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        gpxFiles = [shutil.copy(gpxFile, tempDir) for gpxFile in self.filesToSummarize]
+        start = datetime.datetime(2024, 5, 1, 8, tzinfo=datetime.timezone.utc)
+        for gpxFileName in gpxFiles:
+            with open(gpxFileName, 'r', encoding='utf-8') as gpxFile:
+                gpx = gpxpy.parse(gpxFile)
+            for i, point in enumerate(gpx.walk(only_points=True)):
+                point.time = start + datetime.timedelta(seconds=4 * i)
+            with open(gpxFileName, 'w', encoding='utf-8') as gpxFile:
+                gpxFile.write(gpx.to_xml())
+
+        def Segments(**kwargs) -> list:
+            with open(TrackToWaypointConverter(gpxFiles, keepTime=True, **kwargs).Compress(), 'r',
+                      encoding='utf-8') as gpxFile:
+                return [segment.points for track in gpxpy.parse(gpxFile).tracks for segment in track.segments]
+
+        timeSegments = Segments(resample=RESAMPLE_TIME, resampleInterval=30)
+        distanceSegments = Segments(resample=RESAMPLE_DISTANCE, resampleInterval=100)
+        # assert, samples every 30 s and the last point of each segment
+        for points in timeSegments:
+            steps = np.diff([point.time.timestamp() for point in points])
+            assert np.all(steps[:-1] == 30) and 0 < steps[-1] <= 30
+        for points in distanceSegments:
+            assert np.all(np.diff([point.time.timestamp() for point in points]) >= 0)
+            assert max(point1.distance_2d(point2) for point1, point2 in zip(points, points[1:])) < 101
+        for kwargs in [{'resample': 'speed'}, {'resample': RESAMPLE_TIME, 'resampleInterval': 0},
+                       {'resample': RESAMPLE_DISTANCE, 'lodTolerances': [5, 50]}]:
+            with self.assertRaises(ValueError):
+                TrackToWaypointConverter(gpxFiles, **kwargs)
+
 
 if __name__ == '__main__':
     unittest.main()
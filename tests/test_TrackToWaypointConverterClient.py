@@ -0,0 +1,27 @@
+import os
+import shutil
+import tempfile
+
+import gpxpy
+
+from gpxpert.TrackToWaypointConverterClient import main
+
+
+def test_main_CompressSkipsDuplicates(capsys):
+    """CLI Tests"""
+    # setup
+    tempDir = tempfile.mkdtemp()
+    try:
+        gpxDir = os.path.join(tempDir, 'tracks')
+        os.mkdir(gpxDir)
+        shutil.copy('../res/test/Track_01.gpx', gpxDir)
+        shutil.copy('../res/test/Track_01.gpx', os.path.join(gpxDir, 'Track_01_Copy.gpx'))
+        main([gpxDir, '--compress', '--skip-duplicates'])
+        captured = capsys.readouterr()
+        # assert, the copy is not in the compressed tracks
+        assert f"Compress {gpxDir}" in captured.out
+        assert "exact duplicate" in captured.out
+        with open(os.path.join(tempDir, 'tracks_SMALL.gpx'), 'r', encoding='utf-8') as gpxFile:
+            assert len(gpxpy.parse(gpxFile).tracks) == 1
+    finally:
+        shutil.rmtree(tempDir)
@@ -1,12 +1,20 @@
+import os
+import shutil
+import tempfile
 import unittest
 
+import gpxpy
+
+from gpxpert.GpxWriter import SimpleWaypointXml, WaypointXml
 from gpxpert.WaypointTableConverter import WaypointTableConverter
 
 
 class WaypointTableConverterTest(unittest.TestCase):
+    tableFile = '../res/test/waypoints_table.txt'
+
     @classmethod
     def setUpClass(cls):
-        tableFile = '../res/test/waypoints_table.txt'
+        tableFile = cls.tableFile
         converter = WaypointTableConverter(tableFile)
         cls.gpxFileName: str = converter.Convert()
 
@@ -22,3 +30,56 @@ class WaypointTableConverterTest(unittest.TestCase):
             '  </wpt>'
         with open(self.gpxFileName, 'r', encoding='utf-8') as gpxFile:
             assert expectedWaypointString in gpxFile.read()
+
+    def test_Convert_ChunksInParallelSameAsSerial(self):
+        # setup, a table of 1000 lines in chunks of about 4 kB, without elevation tiles
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        with open(self.tableFile, 'r') as tableFile:
+            table = tableFile.read()
+        largeTableFile = os.path.join(tempDir, 'large_table.txt')
+        with open(largeTableFile, 'w') as tableFile:
+            tableFile.write(table * 20 + 'not a waypoint\n99 Last Waypoint N45.5 E9.5')
+        gpxFiles = []
+        for jobs, chunkBytes in [(1, 1 << 20), (1, 4096), (3, 4096)]:
+            converter = WaypointTableConverter(largeTableFile, elevationDir=tempDir, jobs=jobs)
+            converter.chunkBytes = chunkBytes
+            with open(converter.Convert(), 'r', encoding='utf-8') as gpxFile:
+                gpxFiles.append(gpxFile.read())
+        # assert
+        assert gpxFiles[0] == gpxFiles[1] == gpxFiles[2]
+        assert gpxFiles[0].count('<wpt ') > 900
+        assert gpxFiles[0].index('<name>1 Cademario') < gpxFiles[0].index('<name>99 Last Waypoint')
+
+    def test_Convert_DirectoryAndGlob_OneGpxPerTable(self):
+        # setup, three tables in a directory, converted serially and in parallel
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        tableFiles = [os.path.join(tempDir, f'table_{i}.txt') for i in range(3)]
+        for i, tableFile in enumerate(tableFiles):
+            shutil.copyfile(self.tableFile, tableFile)
+            with open(tableFile, 'a') as table:
+                table.write(f'\n99 Table {i} N45.5 E9.5')
+        gpxFiles = []
+        for textFile, jobs in [(tempDir, 1), (os.path.join(tempDir, 'table_*.txt'), 2)]:
+            gpxFileNames = WaypointTableConverter(textFile, elevationDir=tempDir, jobs=jobs).Convert()
+            # assert
+            assert gpxFileNames == [os.path.splitext(tableFile)[0] + '_GPX.gpx' for tableFile in tableFiles]
+            gpxFiles.append([open(gpxFileName, 'r', encoding='utf-8').read() for gpxFileName in gpxFileNames])
+        assert gpxFiles[0] == gpxFiles[1]
+        for i, gpxFile in enumerate(gpxFiles[0]):
+            assert f'<name>99 Table {i}</name>' in gpxFile
+            assert gpxFile.count('<wpt ') == gpxFiles[0][0].count('<wpt ')
+
+    def test_Convert_MissingTable_Raises(self):
+        with self.assertRaises(FileNotFoundError):
+            WaypointTableConverter('../res/test/no_table.txt')
+
+    def test_SimpleWaypointXml_SameAsWaypointXml(self):
+        for latitude, longitude, elevation, name in [(46.006348, 8.970043, 289, '9 Monte Bre'),
+                                                     (1e-7, -8.5, None, 'A & <B>'), (45.5, 9.0, 12.5, None),
+                                                     (-0., 0., 0., 'Null Island')]:
+            # setup
+            waypoint = gpxpy.gpx.GPXWaypoint(latitude, longitude, elevation, name=name)
+            # assert
+            assert SimpleWaypointXml(latitude, longitude, elevation, name) == WaypointXml(waypoint)
@@ -1,3 +1,5 @@
+import pytest
+
 from gpxpert.WaypointTableConverterClient import main
 
 
@@ -9,3 +11,11 @@ def test_main(capsys):
     main([tableFile])
     captured = capsys.readouterr()
     assert f"Convert {tableFile}" in captured.out
+
+
+def test_main_RejectsTrackOptions(capsys):
+    # the options of the track converter do not apply to tables
+    tableFile = '../res/test/waypoints_table.txt'
+    for option in ['--merge-radius=10', '--skip-duplicates', '--incremental']:
+        with pytest.raises(SystemExit):
+            main([tableFile, option])